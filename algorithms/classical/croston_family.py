@@ -0,0 +1,445 @@
+import pandas as pd
+import numpy as np
+import warnings
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Optional, Tuple, Union
+from algorithms.core import kernels
+
+warnings.filterwarnings('ignore')
+
+METHODS = ['croston', 'sba', 'tsb', 'adida']
+
+# Methods whose recursion yields a forecast at every time step
+PATH_METHODS = ['croston', 'sba', 'tsb']
+
+ACCURACY_METRICS = ['MAE', 'RMSE', 'MAPE', 'MASE']
+
+def demand_matrix(df: pd.DataFrame, time_columns: List[str]) -> np.ndarray:
+    """
+    Demand matrix (items x months) from a load_data DataFrame
+    
+    Args:
+        df: DataFrame returned by an algorithm's load_data
+        time_columns: Monthly columns in chronological order
+    
+    Returns:
+        float64 array of shape (n_items, n_months)
+    """
+    return np.nan_to_num(df[time_columns].to_numpy(dtype=np.float64))
+
+class CrostonFamilyEngine:
+    """
+    Vectorized intermittent-demand engine: Croston, SBA, TSB and ADIDA
+    
+    All methods run over the whole demand matrix at once. Croston, SBA and
+    TSB share a single recursion along the time axis in which every step
+    updates all items with array operations, so the cost is one pass of
+    n_months vector updates instead of n_items Python loops.
+    
+    - Croston: z / x, with z the smoothed demand size and x the smoothed
+      inter-demand interval
+    - SBA: Croston with the (1 - alpha / 2) bias correction, identical to
+      SBAForecasting.calculate_sba_parameters
+    - TSB: p * z, with the demand probability p smoothed every period so
+      forecasts decay for items that stop selling (obsolescence)
+    - ADIDA: demand aggregated into buckets of the item's average demand
+      interval, smoothed with SES and spread back over the months
+    
+    Recursions start at each item's first demand, as in SBAForecasting.
+    """
+    
+    def __init__(self,
+                 alpha: float = 0.1,
+                 beta: float = 0.1,
+                 tsb_alpha: Optional[float] = None,
+                 tsb_beta: Optional[float] = None,
+                 adida_alpha: Optional[float] = None,
+                 adida_level: Union[str, int] = 'adi',
+                 max_adida_level: int = 12):
+        """
+        Initialize the engine
+        
+        Args:
+            alpha: Smoothing parameter for demand size (Croston/SBA), scalar or one per item
+            beta: Smoothing parameter for inter-demand interval (Croston/SBA), scalar or one per item
+            tsb_alpha: TSB demand size smoothing (defaults to alpha)
+            tsb_beta: TSB demand probability smoothing (defaults to beta)
+            adida_alpha: SES smoothing of the aggregated series (defaults to alpha)
+            adida_level: Aggregation bucket in months (at least 1; capped at the
+                history length), or 'adi' to use each item's rounded average
+                demand interval
+            max_adida_level: Upper bound on the per-item aggregation bucket
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.tsb_alpha = alpha if tsb_alpha is None else tsb_alpha
+        self.tsb_beta = beta if tsb_beta is None else tsb_beta
+        self.adida_alpha = alpha if adida_alpha is None else adida_alpha
+        if adida_level != 'adi' and int(adida_level) < 1:
+            raise ValueError(f"adida_level must be 'adi' or at least 1, got {adida_level}")
+        self.adida_level = adida_level
+        self.max_adida_level = max_adida_level
+    
+    def smooth(self, demand: np.ndarray, keep_path: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Run the Croston/SBA and TSB recursions over the time axis
+        
+        The recursions are sequential in time, so they run in the compiled
+        kernels of algorithms.core.kernels (pure NumPy when numba is not
+        installed).
+        
+        Args:
+            demand: Demand matrix of shape (n_items, n_months)
+            keep_path: Also return the states after every month, i.e. the
+                state a forecast made at each origin would start from
+        
+        Returns:
+            Dictionary of final per-item states: demand_estimate,
+            interval_estimate, tsb_probability, tsb_demand_estimate,
+            periods_since_demand and started (item has had demand). With
+            keep_path, every state except periods_since_demand is an array
+            of shape (n_items, n_months) instead.
+        """
+        demand = np.asarray(demand, dtype=np.float64)
+        
+        # Croston / SBA: size and interval update only in periods with demand
+        z, x, started, periods_since = kernels.croston_recursion(demand, self.alpha, self.beta)
+        # TSB: probability updated every period, size only with demand
+        p, tsb_z = kernels.tsb_recursion(demand, self.tsb_alpha, self.tsb_beta)
+        
+        path = {
+            'demand_estimate': z,
+            'interval_estimate': x,
+            'tsb_probability': p,
+            'tsb_demand_estimate': tsb_z,
+            'started': started
+        }
+        if not keep_path:
+            path = {name: values[:, -1] for name, values in path.items()}
+        path['periods_since_demand'] = periods_since
+        
+        return path
+    
+    def _state_forecasts(self, states: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Per-month Croston, SBA and TSB forecasts from recursion states (final or path)"""
+        croston = np.where(states['started'], states['demand_estimate'] / states['interval_estimate'], 0.0)
+        bias_correction = 1 - np.asarray(self.alpha, dtype=np.float64) / 2
+        if bias_correction.ndim and croston.ndim == 2:
+            # Per-item alpha against a (n_items, n_months) path
+            bias_correction = bias_correction[:, None]
+        
+        return {
+            'croston': croston,
+            'sba': croston * bias_correction,
+            'tsb': np.where(states['started'], states['tsb_probability'] * states['tsb_demand_estimate'], 0.0)
+        }
+    
+    def adida_levels(self, demand: np.ndarray) -> np.ndarray:
+        """
+        Per-item ADIDA aggregation bucket in months
+        
+        Args:
+            demand: Demand matrix of shape (n_items, n_months)
+        
+        Returns:
+            int array of bucket sizes (1 for items without demand)
+        """
+        n_items, n_months = demand.shape
+        
+        if self.adida_level != 'adi':
+            # A bucket longer than the history would leave no bucket to smooth
+            return np.full(n_items, max(1, min(int(self.adida_level), n_months)), dtype=np.int64)
+        
+        # ADI as in SBAForecasting.classify_demand_pattern
+        occasions = np.count_nonzero(demand > 0, axis=1)
+        adi = np.divide(n_months, occasions, out=np.ones(n_items), where=occasions > 0)
+        return np.clip(np.round(adi).astype(np.int64), 1, min(self.max_adida_level, n_months))
+    
+    def adida(self, demand: np.ndarray) -> np.ndarray:
+        """
+        ADIDA per-month forecast for every item
+        
+        Items sharing an aggregation bucket are processed together: their
+        series are summed into non-overlapping buckets aligned to the most
+        recent month, smoothed with SES, and the level is divided by the
+        bucket size.
+        
+        Args:
+            demand: Demand matrix of shape (n_items, n_months)
+        
+        Returns:
+            Array of per-month forecasts, shape (n_items,)
+        """
+        demand = np.asarray(demand, dtype=np.float64)
+        n_items, n_months = demand.shape
+        levels = self.adida_levels(demand)
+        adida_alpha = np.broadcast_to(np.asarray(self.adida_alpha, dtype=np.float64), (n_items,))
+        forecasts = np.zeros(n_items)
+        
+        for level in np.unique(levels):
+            rows = np.flatnonzero(levels == level)
+            n_buckets = n_months // level
+            # Drop the oldest months so the last bucket ends at the last month
+            buckets = demand[rows, n_months - n_buckets * level:].reshape(len(rows), n_buckets, level).sum(axis=2)
+            
+            alpha = adida_alpha[rows]
+            smoothed = buckets[:, 0].copy()
+            for b in range(1, n_buckets):
+                smoothed = alpha * buckets[:, b] + (1 - alpha) * smoothed
+            
+            forecasts[rows] = smoothed / level
+        
+        return forecasts
+    
+    def forecast(self, demand: np.ndarray, horizon: int = 12,
+                 methods: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Forecast the whole catalogue with each requested method
+        
+        Args:
+            demand: Demand matrix of shape (n_items, n_months)
+            horizon: Number of months to forecast
+            methods: Subset of METHODS (defaults to all)
+        
+        Returns:
+            Dictionary mapping method name to a (n_items, horizon) forecast
+            matrix (all methods give flat forecasts over the horizon)
+        """
+        methods = methods or METHODS
+        unknown = set(methods) - set(METHODS)
+        if unknown:
+            raise ValueError(f"Unknown methods: {sorted(unknown)}")
+        
+        demand = np.asarray(demand, dtype=np.float64)
+        per_month = {}
+        
+        if set(PATH_METHODS) & set(methods):
+            per_month.update(self._state_forecasts(self.smooth(demand)))
+        
+        if 'adida' in methods:
+            per_month['adida'] = self.adida(demand)
+        
+        return {method: np.repeat(per_month[method][:, None], horizon, axis=1) for method in methods}
+    
+    def backtest(self, demand: np.ndarray, horizon: int = 12, min_train: int = 12,
+                 methods: Optional[List[str]] = None) -> Dict:
+        """
+        Rolling-origin backtest over every cutoff in one recursion pass
+        
+        The recursion path holds each item's state after every month, so the
+        forecast made at origin t is read straight from the path and compared
+        with the following horizon months. Errors are computed for all items
+        and cutoffs at once. Cutoffs where an item has had no demand yet are
+        NaN, matching the single-holdout validation in SBAForecasting.
+        
+        Args:
+            demand: Demand matrix of shape (n_items, n_months)
+            horizon: Months evaluated after each cutoff
+            min_train: Months of history at the first cutoff
+            methods: Subset of PATH_METHODS (defaults to ['sba'])
+        
+        Returns:
+            Dictionary with 'origins' (index of the last training month of
+            each cutoff) and, per method, a dictionary of (n_items, n_cutoffs)
+            arrays for MAE, RMSE, MAPE and MASE
+        """
+        methods = methods or ['sba']
+        unsupported = set(methods) - set(PATH_METHODS)
+        if unsupported:
+            raise ValueError(f"Backtest not supported for: {sorted(unsupported)}")
+        
+        demand = np.asarray(demand, dtype=np.float64)
+        n_items, n_months = demand.shape
+        origins = np.arange(max(min_train, 1) - 1, n_months - horizon)
+        if len(origins) == 0:
+            raise ValueError(f"Need more than {min_train + horizon - 1} months for horizon {horizon}")
+        
+        path = self.smooth(demand, keep_path=True)
+        forecasts = self._state_forecasts(path)
+        valid = path['started'][:, origins]
+        
+        # actual[i, c, h] = demand of item i, h + 1 months after origin c
+        actual = sliding_window_view(demand, horizon, axis=1)[:, origins + 1]
+        nonzero = actual != 0
+        nonzero_count = nonzero.sum(axis=2)
+        
+        # MASE scale: in-sample one-step naive MAE up to each origin
+        naive_errors = np.cumsum(np.abs(np.diff(demand, axis=1)), axis=1)
+        scale = naive_errors[:, np.maximum(origins - 1, 0)] / np.maximum(origins, 1)
+        scale[:, origins == 0] = 0
+        
+        results = {'origins': origins}
+        for method in methods:
+            errors = actual - forecasts[method][:, origins][:, :, None]
+            abs_errors = np.abs(errors)
+            
+            mae = abs_errors.mean(axis=2)
+            rmse = np.sqrt((errors ** 2).mean(axis=2))
+            
+            # MAPE over non-zero actuals only, 0 when a window has none
+            ape = np.divide(abs_errors, np.abs(actual), out=np.zeros_like(abs_errors), where=nonzero)
+            mape = np.divide(ape.sum(axis=2), nonzero_count, out=np.zeros(mae.shape),
+                             where=nonzero_count > 0) * 100
+            
+            mase = np.divide(mae, scale, out=np.full(mae.shape, np.nan), where=scale > 0)
+            
+            results[method] = {
+                metric: np.where(valid, values, np.nan)
+                for metric, values in zip(ACCURACY_METRICS, [mae, rmse, mape, mase])
+            }
+        
+        return results
+    
+    def forecast_frame(self, df: pd.DataFrame, time_columns: List[str], horizon: int = 12,
+                       methods: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Annual forecast per item and method for a load_data DataFrame
+        
+        Args:
+            df: DataFrame returned by an algorithm's load_data
+            time_columns: Monthly columns in chronological order
+            horizon: Number of months to forecast
+            methods: Subset of METHODS (defaults to all)
+        
+        Returns:
+            DataFrame with item columns and one annual forecast column per method
+        """
+        forecasts = self.forecast(demand_matrix(df, time_columns), horizon=horizon, methods=methods)
+        
+        summary = df[['item_id', 'item_name', 'category']].reset_index(drop=True)
+        for method, values in forecasts.items():
+            summary[f'{method}_annual_forecast'] = values.sum(axis=1)
+        
+        return summary
+
+DEFAULT_GRID = np.round(np.arange(0.05, 0.55, 0.05), 2)
+
+def _sba_grid_path(demand: np.ndarray, alphas: np.ndarray, betas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    SBA forecasts after every month for every (alpha, beta) pair
+    
+    The grid is stacked along the item axis so a single kernel call covers
+    every (alpha, beta) pair.
+    
+    Args:
+        demand: Demand matrix of shape (n_items, n_months)
+        alphas: Demand size smoothing per grid point, shape (n_grid,)
+        betas: Interval smoothing per grid point, shape (n_grid,)
+    
+    Returns:
+        Tuple of (forecasts of shape (n_grid, n_items, n_months), started
+        mask of shape (n_items, n_months))
+    """
+    n_grid = len(alphas)
+    n_items, n_months = demand.shape
+    
+    # Grid point g of item i is row g * n_items + i
+    z, x, started, _ = kernels.croston_recursion(np.tile(demand, (n_grid, 1)),
+                                                 np.repeat(alphas, n_items), np.repeat(betas, n_items))
+    
+    forecasts = np.where(started, z / x, 0.0).reshape(n_grid, n_items, n_months)
+    forecasts *= (1 - alphas[:, None, None] / 2)
+    
+    return forecasts, started[:n_items]
+
+def grid_search_sba(demand: np.ndarray,
+                    alphas: Optional[np.ndarray] = None,
+                    betas: Optional[np.ndarray] = None,
+                    objective: str = 'in_sample',
+                    metric: str = 'MSE',
+                    holdout: int = 12,
+                    max_memory_mb: float = 256) -> Dict[str, np.ndarray]:
+    """
+    Per-item SBA smoothing parameters from a batched grid search
+    
+    Every (alpha, beta) pair is evaluated for a chunk of items at once on a
+    (grid, items, months) array, and each item takes the pair with the
+    lowest error. Items are processed in chunks sized so the 3-D arrays stay
+    within max_memory_mb.
+    
+    Objectives:
+    - 'in_sample': one-step-ahead error over the months after the first demand
+    - 'holdout': error of the flat forecast over the last holdout months,
+      fitted on the months before (the validation of fit_and_forecast)
+    
+    Args:
+        demand: Demand matrix of shape (n_items, n_months)
+        alphas: Candidate demand size smoothing values (defaults to DEFAULT_GRID)
+        betas: Candidate interval smoothing values (defaults to DEFAULT_GRID)
+        objective: 'in_sample' or 'holdout'
+        metric: 'MSE' or 'MAE'
+        holdout: Months held out for the 'holdout' objective
+        max_memory_mb: Memory budget for one chunk of the 3-D arrays
+    
+    Returns:
+        Dictionary with per-item 'alpha', 'beta' and 'error' arrays (error is
+        NaN, and alpha/beta are NaN, for items that cannot be evaluated)
+    """
+    if objective not in ('in_sample', 'holdout'):
+        raise ValueError(f"Unknown objective: {objective}")
+    if metric not in ('MSE', 'MAE'):
+        raise ValueError(f"Unknown metric: {metric}")
+    
+    demand = np.asarray(demand, dtype=np.float64)
+    n_items, n_months = demand.shape
+    
+    alpha_grid, beta_grid = np.meshgrid(DEFAULT_GRID if alphas is None else np.asarray(alphas, dtype=np.float64),
+                                        DEFAULT_GRID if betas is None else np.asarray(betas, dtype=np.float64),
+                                        indexing='ij')
+    alpha_grid = alpha_grid.ravel()
+    beta_grid = beta_grid.ravel()
+    
+    n_fit = n_months - holdout if objective == 'holdout' else n_months
+    if n_fit < 1:
+        raise ValueError(f"Need more than {holdout} months for the holdout objective")
+    
+    # Kernel states, forecast path and error temporaries, all (grid, chunk, months)
+    bytes_per_item = len(alpha_grid) * n_months * 8 * 6
+    chunk_size = max(1, int(max_memory_mb * 1024 * 1024 // bytes_per_item))
+    
+    best_alpha = np.full(n_items, np.nan)
+    best_beta = np.full(n_items, np.nan)
+    best_error = np.full(n_items, np.nan)
+    
+    for start in range(0, n_items, chunk_size):
+        chunk = demand[start:start + chunk_size]
+        forecasts, started = _sba_grid_path(chunk[:, :n_fit], alpha_grid, beta_grid)
+        
+        if objective == 'in_sample':
+            # Forecast made after month t against the demand of month t + 1
+            errors = chunk[None, :, 1:n_fit] - forecasts[:, :, :-1]
+            mask = started[:, :-1]
+        else:
+            errors = chunk[None, :, n_fit:] - forecasts[:, :, -1:]
+            mask = np.repeat(started[:, -1:], holdout, axis=1)
+        
+        losses = errors ** 2 if metric == 'MSE' else np.abs(errors)
+        counts = mask.sum(axis=1)
+        scores = np.divide((losses * mask).sum(axis=2), counts, out=np.full(losses.shape[:2], np.nan),
+                           where=counts > 0)
+        
+        evaluated = counts > 0
+        best = np.argmin(np.where(np.isnan(scores), np.inf, scores), axis=0)
+        rows = np.arange(start, start + len(chunk))[evaluated]
+        best_alpha[rows] = alpha_grid[best[evaluated]]
+        best_beta[rows] = beta_grid[best[evaluated]]
+        best_error[rows] = scores[best[evaluated], np.flatnonzero(evaluated)]
+    
+    return {'alpha': best_alpha, 'beta': best_beta, 'error': best_error}
+
+def main():
+    """Main function to run the Croston family engine on the sample workbook"""
+    from algorithms.ingestion.excel_reader import read_demand_workbook
+    
+    df, time_columns, _ = read_demand_workbook('data/Sample_FiveYears_Sales_SpareParts.xlsx')
+    
+    engine = CrostonFamilyEngine(alpha=0.1, beta=0.1)
+    summary = engine.forecast_frame(df, time_columns)
+    
+    print("\nCroston family annual forecasts:")
+    print(summary.to_string(index=False))
+    
+    return engine, summary
+
+if __name__ == "__main__":
+    engine, summary = main()
@@ -3,20 +3,12 @@ import numpy as np
 import warnings
 from typing import Tuple, Dict, List, Optional
 import openpyxl
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from statsmodels.tsa.seasonal import seasonal_decompose
-from statsmodels.tsa.stattools import adfuller, kpss
-from statsmodels.stats.diagnostic import acorr_ljungbox
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
-from statsmodels.tsa.arima.model import ARIMAResults
 import itertools
 from scipy import stats
-import pmdarima as pm
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from algorithms.core.instrumentation import NullInstrumentation
+from algorithms.core.triage import triage_items, bulk_forecasts
+from algorithms.ingestion.demand_cube import read_demand_data
 
 warnings.filterwarnings('ignore')
 
@@ -36,7 +28,8 @@ class SARIMAForecasting:
                  max_P: int = 2,
                  max_D: int = 1,
                  max_Q: int = 2,
-                 auto_arima: bool = True):
+                 auto_arima: bool = True,
+                 instrumentation=None):
         """
         Initialize SARIMA forecasting model
         
@@ -45,6 +38,7 @@ class SARIMAForecasting:
             max_p, max_d, max_q: Maximum non-seasonal parameters
             max_P, max_D, max_Q: Maximum seasonal parameters
             auto_arima: Whether to use automatic ARIMA parameter selection
+            instrumentation: Optional Instrumentation collecting phase timings and counters
         """
         self.seasonal_period = seasonal_period
         self.max_p = max_p
@@ -54,6 +48,7 @@ class SARIMAForecasting:
         self.max_D = max_D
         self.max_Q = max_Q
         self.auto_arima = auto_arima
+        self.instrumentation = instrumentation or NullInstrumentation()
         
         self.models = {}
         self.model_params = {}
@@ -62,76 +57,17 @@ class SARIMAForecasting:
         
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
-        Load spare parts data from Excel file
+        Load spare parts data from an Excel file or a demand cube
         
         Args:
-            file_path: Path to Excel file
+            file_path: Path to Excel file or DemandCube directory
             
         Returns:
             DataFrame with processed data
         """
         try:
-            # Read Excel file properly handling the structure
-            xl_file = pd.ExcelFile(file_path)
-            raw_data = pd.read_excel(xl_file, header=None)
-            
-            # Extract years and months
-            years = raw_data.iloc[0, 3:].values
-            months = raw_data.iloc[1, 3:].values
-            
-            # Create proper column names and date mapping
-            time_columns = []
-            date_mapping = {}
-            
-            for i, (year, month) in enumerate(zip(years, months)):
-                if pd.notna(year) and pd.notna(month) and month != 'Total':
-                    col_name = f"{int(year)}-{month}"
-                    time_columns.append(col_name)
-                    # Create actual date for time series
-                    month_num = {
-                        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-                        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-                        'September': 9, 'October': 10, 'November': 11, 'December': 12
-                    }[month]
-                    date_mapping[col_name] = datetime(int(year), month_num, 1)
-            
-            # Extract item information and data
-            items_data = []
-            for idx in range(2, len(raw_data)):
-                row = raw_data.iloc[idx]
-                if pd.notna(row.iloc[0]):  # If item ID exists
-                    item_info = {
-                        'item_id': row.iloc[0],
-                        'item_name': row.iloc[1],
-                        'category': row.iloc[2]
-                    }
-                    
-                    # Extract demand data (skip Total columns)
-                    demand_data = []
-                    col_idx = 3
-                    for year in [2021, 2022, 2023, 2024, 2025]:
-                        for month in ['January', 'February', 'March', 'April', 'May', 'June',
-                                    'July', 'August', 'September', 'October', 'November', 'December']:
-                            col_name = f"{year}-{month}"
-                            if col_idx < len(row) and col_name in time_columns:
-                                demand_data.append(row.iloc[col_idx] if pd.notna(row.iloc[col_idx]) else 0)
-                            col_idx += 1
-                        col_idx += 1  # Skip Total column
-                        if year == 2025:  # 2025 data is incomplete
-                            break
-            
-                    item_info['demand_data'] = demand_data[:len(time_columns)]
-                    items_data.append(item_info)
-            
-            # Create DataFrame with time series
-            df = pd.DataFrame(items_data)
-            
-            # Create time series columns
-            for i, col_name in enumerate(time_columns):
-                df[col_name] = df['demand_data'].apply(lambda x: x[i] if i < len(x) else 0)
-            
-            # Drop temporary column
-            df = df.drop('demand_data', axis=1)
+            # Stream the workbook (or read the persisted cube) into a demand array
+            df, time_columns, date_mapping = read_demand_data(file_path)
             
             # Store time information
             self.time_columns = time_columns
@@ -156,6 +92,8 @@ class SARIMAForecasting:
         Returns:
             Dictionary with stationarity test results
         """
+        from statsmodels.tsa.stattools import adfuller, kpss
+        
         results = {}
         
         # Augmented Dickey-Fuller test
@@ -196,6 +134,8 @@ class SARIMAForecasting:
         Returns:
             Dictionary with seasonal analysis results
         """
+        from statsmodels.tsa.seasonal import seasonal_decompose
+        
         analysis = {}
         
         try:
@@ -264,6 +204,8 @@ class SARIMAForecasting:
         Returns:
             Tuple of (order, seasonal_order) and model information
         """
+        import pmdarima as pm
+        
         try:
             # Use pmdarima for automatic ARIMA parameter selection
             auto_model = pm.auto_arima(
@@ -308,6 +250,8 @@ class SARIMAForecasting:
         Returns:
             Tuple of (order, seasonal_order) and model information
         """
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        
         best_aic = np.inf
         best_params = None
         best_seasonal_params = None
@@ -372,6 +316,8 @@ class SARIMAForecasting:
         Returns:
             Fitted SARIMAX model
         """
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        
         try:
             model = SARIMAX(
                 timeseries,
@@ -431,6 +377,8 @@ class SARIMAForecasting:
         Returns:
             Dictionary with diagnostic statistics
         """
+        from statsmodels.stats.diagnostic import acorr_ljungbox
+        
         try:
             diagnostics = {}
             
@@ -484,8 +432,19 @@ class SARIMAForecasting:
         
         print("Starting SARIMA forecasting...")
         
-        for idx, row in df.iterrows():
+        # Zero-demand and too-short items get their zero forecasts in one pass
+        triaged = triage_items(df, self.time_columns, min_history=24)
+        results['item_forecasts'] = bulk_forecasts(df, self.time_columns, triaged, forecast_periods, {
+            'lower_ci': [0] * forecast_periods,
+            'upper_ci': [0] * forecast_periods,
+            'model_fitted': False,
+            'insufficient_data': True
+        })
+        self.instrumentation.count('skipped', int((triaged['Status'] != 'live').sum()))
+        
+        for idx, row in df[triaged['Status'] == 'live'].iterrows():
             item_id = row['item_id']
+            self.instrumentation.begin_item(item_id)
             print(f"Processing item {idx + 1}/{len(df)}: {item_id}")
             
             # Extract demand series
@@ -498,32 +457,24 @@ class SARIMAForecasting:
                 name=item_id
             )
             
-            # Skip items with no demand or insufficient data
-            if np.sum(timeseries) == 0 or len(timeseries) < 24:  # Need at least 2 years
-                results['item_forecasts'][item_id] = {
-                    'historical_demand': demand_values,
-                    'monthly_forecasts': [0] * forecast_periods,
-                    'lower_ci': [0] * forecast_periods,
-                    'upper_ci': [0] * forecast_periods,
-                    'item_name': row['item_name'],
-                    'category': row['category'],
-                    'model_fitted': False,
-                    'insufficient_data': True
-                }
-                continue
-            
             # Test stationarity
-            stationarity_results = self.test_stationarity(timeseries, item_id)
+            with self.instrumentation.phase('feature'):
+                stationarity_results = self.test_stationarity(timeseries, item_id)
             
             # Analyze seasonality
-            seasonal_analysis = self.analyze_seasonality(timeseries, item_id)
+            with self.instrumentation.phase('feature'):
+                seasonal_analysis = self.analyze_seasonality(timeseries, item_id)
             results['seasonal_analysis'][item_id] = seasonal_analysis
             
             # Select model parameters
-            if self.auto_arima:
-                (order, seasonal_order), model_info = self.auto_arima_selection(timeseries, item_id)
-            else:
-                (order, seasonal_order), model_info = self.grid_search_sarima(timeseries, item_id)
+            with self.instrumentation.phase('selection'):
+                if self.auto_arima:
+                    (order, seasonal_order), model_info = self.auto_arima_selection(timeseries, item_id)
+                else:
+                    (order, seasonal_order), model_info = self.grid_search_sarima(timeseries, item_id)
+            
+            if model_info['method'] == 'fallback':
+                self.instrumentation.count('fallbacks')
             
             results['model_parameters'][item_id] = {
                 'order': order,
@@ -533,14 +484,21 @@ class SARIMAForecasting:
             }
             
             # Fit SARIMA model
-            fitted_model = self.fit_sarima_model(timeseries, order, seasonal_order, item_id)
+            with self.instrumentation.phase('fit'):
+                fitted_model = self.fit_sarima_model(timeseries, order, seasonal_order, item_id)
             
             if fitted_model is not None:
+                self.instrumentation.count('fits')
+                if not (fitted_model.mle_retvals or {}).get('converged', True):
+                    self.instrumentation.count('failed_convergence')
+                
                 # Generate forecasts
-                forecast_results = self.generate_forecasts(fitted_model, forecast_periods)
+                with self.instrumentation.phase('forecast'):
+                    forecast_results = self.generate_forecasts(fitted_model, forecast_periods)
                 
                 # Calculate diagnostics
-                diagnostics = self.calculate_model_diagnostics(fitted_model, timeseries)
+                with self.instrumentation.phase('validation'):
+                    diagnostics = self.calculate_model_diagnostics(fitted_model, timeseries)
                 results['model_diagnostics'][item_id] = diagnostics
                 
                 # Store model
@@ -561,6 +519,7 @@ class SARIMAForecasting:
                 
             else:
                 # Model fitting failed - use simple average
+                self.instrumentation.count('fallbacks')
                 avg_demand = np.mean(timeseries[timeseries > 0]) if np.sum(timeseries > 0) > 0 else 0
                 
                 results['item_forecasts'][item_id] = {
@@ -575,6 +534,11 @@ class SARIMAForecasting:
                     'forecast_successful': False
                 }
         
+        self.instrumentation.end_item()
+        
+        # Report items in input order
+        results['item_forecasts'] = {item_id: results['item_forecasts'][item_id] for item_id in df['item_id']}
+        
         print(f"Completed SARIMA forecasting for {len(results['item_forecasts'])} items")
         return results
     
@@ -624,6 +588,8 @@ class SARIMAForecasting:
             results: Results dictionary from fit_and_forecast
             top_n: Number of top items to analyze
         """
+        import matplotlib.pyplot as plt
+        
         # Get top items by historical demand
         item_totals = {item_id: sum(data['historical_demand']) 
                       for item_id, data in results['item_forecasts'].items()}
@@ -733,6 +699,8 @@ class SARIMAForecasting:
             results: Results dictionary
             item_id: Item to analyze
         """
+        import matplotlib.pyplot as plt
+        
         if item_id not in results['seasonal_analysis']:
             print(f"No seasonal analysis available for {item_id}")
             return
@@ -3,9 +3,11 @@ import numpy as np
 import warnings
 from typing import Tuple, Dict, List
 import openpyxl
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
+from algorithms.core.instrumentation import NullInstrumentation
+from algorithms.core import kernels
+from algorithms.classical.croston_family import CrostonFamilyEngine, ACCURACY_METRICS, grid_search_sba
+from algorithms.classical.sba_state import SBAStateStore
+from algorithms.ingestion.demand_cube import read_demand_data
 
 warnings.filterwarnings('ignore')
 
@@ -17,84 +19,35 @@ class SBAForecasting:
     and intermittent demand patterns. It addresses the bias in Croston's method.
     """
     
-    def __init__(self, alpha: float = 0.1, beta: float = 0.1):
+    def __init__(self, alpha: float = 0.1, beta: float = 0.1, instrumentation=None):
         """
         Initialize SBA forecasting model
         
         Args:
             alpha: Smoothing parameter for demand size (0 < alpha < 1)
             beta: Smoothing parameter for inter-demand interval (0 < beta < 1)
+            instrumentation: Optional Instrumentation collecting phase timings and counters
         """
         self.alpha = alpha
         self.beta = beta
+        self.instrumentation = instrumentation or NullInstrumentation()
         self.fitted_params = {}
         self.forecast_results = {}
+        self.item_parameters = {}
         
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
-        Load spare parts data from Excel file
+        Load spare parts data from an Excel file or a demand cube
         
         Args:
-            file_path: Path to Excel file
+            file_path: Path to Excel file or DemandCube directory
             
         Returns:
             DataFrame with processed data
         """
         try:
-            # Read Excel file
-            df = pd.read_excel(file_path, header=[0, 1])
-            
-            # The actual structure has years in row 0 and months in row 1
-            # Let's read it properly
-            xl_file = pd.ExcelFile(file_path)
-            raw_data = pd.read_excel(xl_file, header=None)
-            
-            # Extract years and months
-            years = raw_data.iloc[0, 3:].values
-            months = raw_data.iloc[1, 3:].values
-            
-            # Create proper column names
-            time_columns = []
-            for i, (year, month) in enumerate(zip(years, months)):
-                if pd.notna(year) and pd.notna(month) and month != 'Total':
-                    time_columns.append(f"{int(year)}-{month}")
-            
-            # Extract item information and data
-            items_data = []
-            for idx in range(2, len(raw_data)):
-                row = raw_data.iloc[idx]
-                if pd.notna(row.iloc[0]):  # If item ID exists
-                    item_info = {
-                        'item_id': row.iloc[0],
-                        'item_name': row.iloc[1],
-                        'category': row.iloc[2]
-                    }
-                    
-                    # Extract demand data (skip Total columns)
-                    demand_data = []
-                    col_idx = 3
-                    for year in [2021, 2022, 2023, 2024, 2025]:
-                        for month in ['January', 'February', 'March', 'April', 'May', 'June',
-                                    'July', 'August', 'September', 'October', 'November', 'December']:
-                            if col_idx < len(row) and f"{year}-{month}" in time_columns:
-                                demand_data.append(row.iloc[col_idx] if pd.notna(row.iloc[col_idx]) else 0)
-                            col_idx += 1
-                        col_idx += 1  # Skip Total column
-                        if year == 2025:  # 2025 data is incomplete
-                            break
-            
-                    item_info['demand_data'] = demand_data[:len(time_columns)]
-                    items_data.append(item_info)
-            
-            # Create DataFrame
-            df = pd.DataFrame(items_data)
-            
-            # Create time series columns
-            for i, col_name in enumerate(time_columns):
-                df[col_name] = df['demand_data'].apply(lambda x: x[i] if i < len(x) else 0)
-            
-            # Drop the temporary demand_data column
-            df = df.drop('demand_data', axis=1)
+            # Stream the workbook (or read the persisted cube) into a demand array
+            df, time_columns, date_mapping = read_demand_data(file_path)
             
             print(f"Loaded data for {len(df)} items with {len(time_columns)} time periods")
             return df
@@ -103,59 +56,37 @@ class SBAForecasting:
             print(f"Error loading data: {e}")
             return pd.DataFrame()
     
-    def calculate_sba_parameters(self, demand_series: np.array) -> Tuple[float, float, float]:
+    def calculate_sba_parameters(self, demand_series: np.array, alpha: float = None,
+                                 beta: float = None) -> Tuple[float, float, float]:
         """
         Calculate SBA parameters for a given demand series
         
         Args:
             demand_series: Array of historical demand values
+            alpha: Demand size smoothing (defaults to self.alpha)
+            beta: Interval smoothing (defaults to self.beta)
             
         Returns:
             Tuple of (demand_estimate, interval_estimate, forecast)
         """
-        # Remove leading zeros
-        non_zero_start = 0
-        for i, val in enumerate(demand_series):
-            if val > 0:
-                non_zero_start = i
-                break
-        
-        demand_series = demand_series[non_zero_start:]
-        
-        if len(demand_series) == 0 or np.sum(demand_series) == 0:
-            return 0, 1, 0
+        alpha = self.alpha if alpha is None else alpha
+        beta = self.beta if beta is None else beta
         
-        # Initialize estimates
-        first_demand_idx = np.where(demand_series > 0)[0]
-        if len(first_demand_idx) == 0:
+        if len(demand_series) == 0:
             return 0, 1, 0
         
-        # Initial estimates
-        z_0 = demand_series[first_demand_idx[0]]  # First non-zero demand
-        x_0 = first_demand_idx[0] + 1  # Inter-demand interval
+        # The recursion starts at the first demand and runs in a compiled kernel
+        z_path, x_path, started, _ = kernels.croston_recursion(demand_series, alpha, beta)
         
-        z_t = z_0  # Demand size estimate
-        x_t = x_0  # Inter-demand interval estimate
+        if not started[0, -1]:
+            return 0, 1, 0
         
-        # Track periods since last demand
-        periods_since_demand = 0
-        
-        for t, demand in enumerate(demand_series):
-            periods_since_demand += 1
-            
-            if demand > 0:
-                # Update demand size estimate
-                z_t = self.alpha * demand + (1 - self.alpha) * z_t
-                
-                # Update inter-demand interval estimate  
-                x_t = self.beta * periods_since_demand + (1 - self.beta) * x_t
-                
-                # Reset counter
-                periods_since_demand = 0
+        z_t = z_path[0, -1]  # Demand size estimate
+        x_t = x_path[0, -1]  # Inter-demand interval estimate
         
         # SBA forecast calculation (corrects Croston's bias)
         if x_t > 0:
-            forecast = (z_t / x_t) * (1 - self.alpha / 2)
+            forecast = (z_t / x_t) * (1 - alpha / 2)
         else:
             forecast = 0
             
@@ -221,21 +152,40 @@ class SBAForecasting:
                        ['January', 'February', 'March', 'April', 'May', 'June',
                         'July', 'August', 'September', 'October', 'November', 'December'])]
         
-        for idx, row in df.iterrows():
+        # Per-item smoothing parameters when optimize_parameters has run
+        parameters = np.array([self.item_parameters.get(item_id, (self.alpha, self.beta))
+                               for item_id in df['item_id']], dtype=np.float64).reshape(-1, 2)
+        
+        # One kernel call runs the SBA recursion for the whole catalogue; the
+        # state after month t is the fit on the first t + 1 months
+        with self.instrumentation.phase('fit'):
+            z_path, x_path, started_path, _ = kernels.croston_recursion(
+                df[time_columns].to_numpy(dtype=np.float64), parameters[:, 0], parameters[:, 1])
+            sba_path = np.where(started_path, z_path / x_path, 0.0) * (1 - parameters[:, :1] / 2)
+        
+        for position, (idx, row) in enumerate(df.iterrows()):
             item_id = row['item_id']
+            self.instrumentation.begin_item(item_id)
             
             # Extract demand series
             demand_series = np.array([row[col] for col in time_columns])
             
             # Classify demand pattern
-            pattern = self.classify_demand_pattern(demand_series)
+            with self.instrumentation.phase('feature'):
+                pattern = self.classify_demand_pattern(demand_series)
             results['demand_classifications'][item_id] = pattern
             
-            # Calculate SBA parameters and forecast
-            z_t, x_t, base_forecast = self.calculate_sba_parameters(demand_series)
+            alpha, beta = parameters[position]
+            
+            # SBA parameters and forecast after the last month
+            z_t = z_path[position, -1]
+            x_t = x_path[position, -1]
+            base_forecast = sba_path[position, -1]
+            self.instrumentation.count('fits')
             
             # Generate 12-month forecasts
-            monthly_forecasts = [base_forecast] * forecast_periods
+            with self.instrumentation.phase('forecast'):
+                monthly_forecasts = [base_forecast] * forecast_periods
             
             # Store results
             results['item_forecasts'][item_id] = {
@@ -243,6 +193,8 @@ class SBAForecasting:
                 'demand_estimate': z_t,
                 'interval_estimate': x_t,
                 'base_forecast': base_forecast,
+                'alpha': alpha,
+                'beta': beta,
                 'monthly_forecasts': monthly_forecasts,
                 'demand_pattern': pattern,
                 'item_name': row['item_name'],
@@ -256,7 +208,7 @@ class SBAForecasting:
                 test_data = demand_series[-12:]
                 
                 if np.sum(train_data) > 0:
-                    z_val, x_val, forecast_val = self.calculate_sba_parameters(train_data)
+                    forecast_val = sba_path[position, len(train_data) - 1]
                     validation_forecast = [forecast_val] * 12
                     
                     # Calculate MAE and RMSE
@@ -264,11 +216,9 @@ class SBAForecasting:
                     rmse = np.sqrt(np.mean((test_data - validation_forecast) ** 2))
                     
                     # Calculate MAPE (handling zeros)
-                    mape_values = []
-                    for actual, pred in zip(test_data, validation_forecast):
-                        if actual != 0:
-                            mape_values.append(abs((actual - pred) / actual))
-                    mape = np.mean(mape_values) * 100 if mape_values else 0
+                    nonzero = test_data != 0
+                    mape = np.mean(np.abs((test_data[nonzero] - forecast_val) / test_data[nonzero])) * 100 \
+                        if nonzero.any() else 0
                     
                     results['accuracy_metrics'][item_id] = {
                         'MAE': mae,
@@ -276,9 +226,130 @@ class SBAForecasting:
                         'MAPE': mape
                     }
         
+        self.instrumentation.end_item()
+        
         print(f"Completed SBA forecasting for {len(results['item_forecasts'])} items")
         return results
     
+    def optimize_parameters(self, df: pd.DataFrame, alphas: List[float] = None, betas: List[float] = None,
+                            objective: str = 'in_sample', metric: str = 'MSE',
+                            max_memory_mb: float = 256) -> pd.DataFrame:
+        """
+        Choose alpha and beta per item with a batched grid search
+        
+        All grid points are evaluated for all items together (see
+        grid_search_sba). The chosen pairs are used by fit_and_forecast;
+        items without demand to evaluate keep the global alpha and beta.
+        
+        Args:
+            df: DataFrame with item data
+            alphas: Candidate alpha values (defaults to 0.05 ... 0.5)
+            betas: Candidate beta values (defaults to 0.05 ... 0.5)
+            objective: 'in_sample' (one-step-ahead) or 'holdout' (last 12 months)
+            metric: 'MSE' or 'MAE'
+            max_memory_mb: Memory budget per chunk of items
+            
+        Returns:
+            DataFrame with the chosen parameters and error per item
+        """
+        time_columns = [col for col in df.columns if '-' in col and any(month in col for month in 
+                       ['January', 'February', 'March', 'April', 'May', 'June',
+                        'July', 'August', 'September', 'October', 'November', 'December'])]
+        demand = df[time_columns].to_numpy(dtype=np.float64)
+        
+        with self.instrumentation.phase('selection'):
+            search = grid_search_sba(demand, alphas=alphas, betas=betas, objective=objective,
+                                     metric=metric, holdout=12, max_memory_mb=max_memory_mb)
+        
+        self.item_parameters = {
+            item_id: (float(alpha), float(beta))
+            for item_id, alpha, beta in zip(df['item_id'], search['alpha'], search['beta'])
+            if not np.isnan(alpha)
+        }
+        
+        print(f"Optimized SBA parameters for {len(self.item_parameters)} of {len(df)} items")
+        return pd.DataFrame({
+            'Item_ID': df['item_id'].values,
+            'Alpha': search['alpha'],
+            'Beta': search['beta'],
+            'Error': search['error']
+        })
+    
+    def create_state_store(self, df: pd.DataFrame) -> SBAStateStore:
+        """
+        Per-item SBA state after the last month, for incremental refreshes
+        
+        Uses the same per-item parameters as fit_and_forecast. When a new
+        month of actuals arrives, SBAStateStore.update advances every item in
+        one vectorized step instead of rerunning the full history.
+        
+        Args:
+            df: DataFrame with item data
+            
+        Returns:
+            SBAStateStore after the last month of df
+        """
+        time_columns = [col for col in df.columns if '-' in col and any(month in col for month in 
+                       ['January', 'February', 'March', 'April', 'May', 'June',
+                        'July', 'August', 'September', 'October', 'November', 'December'])]
+        parameters = np.array([self.item_parameters.get(item_id, (self.alpha, self.beta))
+                               for item_id in df['item_id']], dtype=np.float64).reshape(-1, 2)
+        
+        with self.instrumentation.phase('fit'):
+            return SBAStateStore.from_history(df[time_columns].to_numpy(dtype=np.float64), df['item_id'],
+                                              parameters[:, 0], parameters[:, 1],
+                                              last_month=time_columns[-1] if time_columns else None)
+    
+    def backtest(self, df: pd.DataFrame, horizon: int = 12, min_train: int = 12) -> Dict:
+        """
+        Rolling-origin backtest of SBA over every cutoff for all items at once
+        
+        A single vectorized pass of the SBA recursion gives the forecast at
+        every origin, so accuracy over all cutoffs costs about as much as one
+        fit instead of n_cutoffs x n_items calls to calculate_sba_parameters.
+        The last cutoff reproduces the holdout metrics of fit_and_forecast.
+        
+        Args:
+            df: DataFrame with item data
+            horizon: Months evaluated after each cutoff
+            min_train: Months of history at the first cutoff
+        
+        Returns:
+            Dictionary with per-item and per-cutoff mean MAE, RMSE, MAPE and
+            MASE DataFrames and the raw (n_items, n_cutoffs) metric arrays
+        """
+        time_columns = [col for col in df.columns if '-' in col and any(month in col for month in 
+                       ['January', 'February', 'March', 'April', 'May', 'June',
+                        'July', 'August', 'September', 'October', 'November', 'December'])]
+        demand = df[time_columns].to_numpy(dtype=np.float64)
+        # Per-item smoothing parameters when optimize_parameters has run, as in fit_and_forecast
+        parameters = np.array([self.item_parameters.get(item_id, (self.alpha, self.beta))
+                               for item_id in df['item_id']], dtype=np.float64).reshape(-1, 2)
+        
+        engine = CrostonFamilyEngine(alpha=parameters[:, 0], beta=parameters[:, 1])
+        with self.instrumentation.phase('validation'):
+            backtest = engine.backtest(demand, horizon=horizon, min_train=min_train, methods=['sba'])
+        metrics = backtest['sba']
+        cutoffs = [time_columns[origin] for origin in backtest['origins']]
+        
+        item_metrics = df[['item_id', 'item_name', 'category']].reset_index(drop=True)
+        for metric in ACCURACY_METRICS:
+            item_metrics[metric] = np.nanmean(metrics[metric], axis=1)
+        item_metrics['Cutoffs_Evaluated'] = np.sum(~np.isnan(metrics['MAE']), axis=1)
+        
+        cutoff_metrics = pd.DataFrame({'Cutoff': cutoffs})
+        for metric in ACCURACY_METRICS:
+            cutoff_metrics[metric] = np.nanmean(metrics[metric], axis=0)
+        cutoff_metrics['Items_Evaluated'] = np.sum(~np.isnan(metrics['MAE']), axis=0)
+        
+        print(f"Completed SBA backtest for {len(df)} items over {len(cutoffs)} cutoffs")
+        return {
+            'item_metrics': item_metrics,
+            'cutoff_metrics': cutoff_metrics,
+            'cutoffs': cutoffs,
+            'metrics': metrics
+        }
+    
     def create_forecast_summary(self, results: Dict) -> pd.DataFrame:
         """
         Create summary DataFrame of forecasting results
@@ -315,6 +386,8 @@ class SBAForecasting:
             results: Results dictionary from fit_and_forecast
             top_n: Number of top items to plot
         """
+        import matplotlib.pyplot as plt
+        
         # Get top items by historical demand
         item_totals = {item_id: sum(data['historical_demand']) 
                       for item_id, data in results['item_forecasts'].items()}
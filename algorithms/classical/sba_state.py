@@ -0,0 +1,201 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Union
+from algorithms.core import kernels
+
+class SBAStateStore:
+    """
+    Per-item SBA state that advances one month at a time
+    
+    The SBA recursion only needs the last demand size estimate, interval
+    estimate and periods since the last demand, so a monthly refresh is one
+    vectorized step over these arrays instead of a recompute of the full
+    history. The state after update() matches the state
+    SBAForecasting.fit_and_forecast computes from the extended history.
+    """
+    
+    def __init__(self, item_ids: Sequence, alpha: Union[float, np.ndarray] = 0.1,
+                 beta: Union[float, np.ndarray] = 0.1):
+        """
+        Initialize an empty store (no demand seen yet)
+        
+        Args:
+            item_ids: Item identifiers, in the order of the demand vectors
+            alpha: Demand size smoothing, scalar or one per item
+            beta: Interval smoothing, scalar or one per item
+        """
+        n_items = len(item_ids)
+        self.item_ids = np.asarray(item_ids, dtype=str)
+        self.alpha = np.array(np.broadcast_to(np.asarray(alpha, dtype=np.float64), (n_items,)))
+        self.beta = np.array(np.broadcast_to(np.asarray(beta, dtype=np.float64), (n_items,)))
+        
+        self.demand_estimate = np.zeros(n_items)
+        self.interval_estimate = np.ones(n_items)
+        self.periods_since_demand = np.zeros(n_items, dtype=np.int64)
+        self.started = np.zeros(n_items, dtype=bool)
+        
+        self.n_months = 0
+        self.last_month = None
+    
+    @classmethod
+    def from_history(cls, demand: np.ndarray, item_ids: Sequence, alpha: Union[float, np.ndarray] = 0.1,
+                     beta: Union[float, np.ndarray] = 0.1, last_month: Optional[str] = None) -> 'SBAStateStore':
+        """
+        Build the state from a full demand history (one kernel pass)
+        
+        Args:
+            demand: Demand matrix of shape (n_items, n_months)
+            item_ids: Item identifiers, one per row
+            alpha: Demand size smoothing, scalar or one per item
+            beta: Interval smoothing, scalar or one per item
+            last_month: Label of the last month in the history
+        
+        Returns:
+            SBAStateStore after the last month
+        """
+        store = cls(item_ids, alpha, beta)
+        demand = np.nan_to_num(np.asarray(demand, dtype=np.float64))
+        if demand.shape[1] == 0:
+            return store
+        
+        z_path, x_path, started_path, periods = kernels.croston_recursion(demand, store.alpha, store.beta)
+        store.demand_estimate = z_path[:, -1].copy()
+        store.interval_estimate = x_path[:, -1].copy()
+        store.started = started_path[:, -1].copy()
+        store.periods_since_demand = np.asarray(periods, dtype=np.int64).copy()
+        store.n_months = demand.shape[1]
+        store.last_month = last_month
+        
+        return store
+    
+    def __len__(self) -> int:
+        return len(self.item_ids)
+    
+    def forecasts(self) -> np.ndarray:
+        """SBA forecast of every item from the current state (0 before the first demand)"""
+        ratio = np.divide(self.demand_estimate, self.interval_estimate,
+                          out=np.zeros(len(self)), where=self.started & (self.interval_estimate > 0))
+        return ratio * (1 - self.alpha / 2)
+    
+    def update(self, new_month: np.ndarray, month: Optional[str] = None) -> np.ndarray:
+        """
+        Advance every item by one month of actuals
+        
+        Args:
+            new_month: Demand of the new month, one value per item in item_ids order
+            month: Label of the new month (guards against applying a month twice;
+                without a label the previous one is kept)
+        
+        Returns:
+            Updated SBA forecasts, one per item
+        """
+        d = np.nan_to_num(np.asarray(new_month, dtype=np.float64))
+        if d.shape != (len(self),):
+            raise ValueError(f"Expected {len(self)} values, got shape {d.shape}")
+        if month is not None and month == self.last_month:
+            raise ValueError(f"Month {month} has already been applied")
+        
+        has_demand = d > 0
+        
+        # Initialise at the first demand, as the full recursion does
+        first = has_demand & ~self.started
+        self.demand_estimate[first] = d[first]
+        self.interval_estimate[first] = 1
+        self.periods_since_demand[first] = 0
+        self.started |= first
+        
+        self.periods_since_demand += self.started
+        
+        z, x = self.demand_estimate, self.interval_estimate
+        self.demand_estimate = np.where(has_demand, self.alpha * d + (1 - self.alpha) * z, z)
+        self.interval_estimate = np.where(has_demand, self.beta * self.periods_since_demand + (1 - self.beta) * x, x)
+        self.periods_since_demand[has_demand] = 0
+        
+        self.n_months += 1
+        if month is not None:
+            self.last_month = month
+        
+        return self.forecasts()
+    
+    def add_items(self, item_ids: Sequence, alpha: Union[float, np.ndarray] = 0.1,
+                  beta: Union[float, np.ndarray] = 0.1):
+        """
+        Append new items with an empty state (they start at their first demand)
+        
+        Args:
+            item_ids: Identifiers of the new items
+            alpha: Demand size smoothing, scalar or one per new item
+            beta: Interval smoothing, scalar or one per new item
+        """
+        new = SBAStateStore(item_ids, alpha, beta)
+        for name in ('item_ids', 'alpha', 'beta', 'demand_estimate', 'interval_estimate',
+                     'periods_since_demand', 'started'):
+            setattr(self, name, np.concatenate([getattr(self, name), getattr(new, name)]))
+    
+    def forecast_frame(self, forecast_periods: int = 12) -> pd.DataFrame:
+        """Current state and flat forecast of every item"""
+        forecasts = self.forecasts()
+        return pd.DataFrame({
+            'Item_ID': self.item_ids,
+            'Demand_Estimate': self.demand_estimate,
+            'Interval_Estimate': self.interval_estimate,
+            'Periods_Since_Demand': self.periods_since_demand,
+            'Monthly_Forecast': forecasts,
+            'Annual_Forecast': forecasts * forecast_periods
+        })
+    
+    def save(self, path: str):
+        """Write the state to a compressed .npz file (written then renamed)"""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                item_ids=self.item_ids,
+                alpha=self.alpha,
+                beta=self.beta,
+                demand_estimate=self.demand_estimate,
+                interval_estimate=self.interval_estimate,
+                periods_since_demand=self.periods_since_demand,
+                started=self.started,
+                n_months=self.n_months,
+                last_month='' if self.last_month is None else self.last_month
+            )
+        os.replace(temp_path, path)
+    
+    @classmethod
+    def load(cls, path: str) -> 'SBAStateStore':
+        """Read a state saved with save()"""
+        with np.load(path) as data:
+            store = cls(data['item_ids'], data['alpha'], data['beta'])
+            store.demand_estimate = data['demand_estimate']
+            store.interval_estimate = data['interval_estimate']
+            store.periods_since_demand = data['periods_since_demand']
+            store.started = data['started']
+            store.n_months = int(data['n_months'])
+            store.last_month = str(data['last_month']) or None
+        
+        return store
+    
+    def align(self, item_ids: Sequence, values: Sequence) -> np.ndarray:
+        """
+        Demand vector in store order from (item ID, value) pairs
+        
+        Items missing from the pairs get 0; unknown items must be added with
+        add_items first.
+        
+        Args:
+            item_ids: Item identifiers of the new month's actuals
+            values: Demand of each item
+        
+        Returns:
+            float64 array with one value per store item
+        """
+        lookup = {item_id: position for position, item_id in enumerate(self.item_ids)}
+        positions = np.array([lookup.get(str(item_id), -1) for item_id in item_ids], dtype=np.int64)
+        if (positions < 0).any():
+            raise ValueError(f"{int((positions < 0).sum())} items are not in the state store")
+        
+        vector = np.zeros(len(self))
+        np.add.at(vector, positions, np.nan_to_num(np.asarray(values, dtype=np.float64)))
+        return vector
@@ -0,0 +1,205 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from algorithms.ingestion.excel_reader import ITEM_COLUMNS
+
+# Bump when the record layout changes so old checkpoint files are not reused
+CHECKPOINT_VERSION = 1
+
+# Attributes holding fitted state, outputs or loaded data rather than settings
+NON_SETTINGS = ['models', 'scalers', 'feature_scalers', 'imputers', 'training_history', 'instrumentation',
+                'feature_store', 'time_columns', 'dates', 'date_mapping', 'forecast_results', 'fitted_params',
+                'model_params', 'seasonal_analysis', 'feature_importance', 'feature_names', 'cv_results',
+                'model_components']
+
+def _canonical(value):
+    """JSON-ready form of a setting with dict keys in a fixed order; TypeError for other objects"""
+    if isinstance(value, (bool, int, float, str, type(None))):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return [value.dtype.str, list(value.shape), _canonical(value.tolist())]
+    if isinstance(value, (list, tuple)):
+        return [_canonical(element) for element in value]
+    if isinstance(value, dict):
+        return sorted([repr(_canonical(key)), _canonical(element)] for key, element in value.items())
+    raise TypeError(f"Not a setting: {type(value).__name__}")
+
+def model_config(model, forecast_periods: int) -> Dict:
+    """
+    Settings that change a model's forecasts
+    
+    Scalar attributes are kept as they are. Dict, list and array attributes
+    (e.g. SBA item_parameters, LSTM lstm_units) are reduced to a hash of
+    their contents; fitted state and loaded data (NON_SETTINGS) are left out.
+    
+    Args:
+        model: Algorithm instance
+        forecast_periods: Number of periods to forecast
+    
+    Returns:
+        Dictionary of setting name -> value or content hash
+    """
+    config = {}
+    for key, value in vars(model).items():
+        if key.startswith('_') or key in NON_SETTINGS:
+            continue
+        if isinstance(value, (bool, int, float, str, type(None))):
+            config[key] = value
+        elif isinstance(value, (dict, list, tuple, np.ndarray)):
+            try:
+                payload = json.dumps(_canonical(value))
+            except TypeError:
+                # Holds objects (fitted models, callables) rather than settings
+                continue
+            config[key] = hashlib.sha1(payload.encode()).hexdigest()
+    config['model_class'] = f"{type(model).__module__}.{type(model).__name__}"
+    config['forecast_periods'] = forecast_periods
+    return config
+
+def config_fingerprint(config: Dict) -> str:
+    """Short hash of a model configuration"""
+    payload = json.dumps({'version': CHECKPOINT_VERSION, **config}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+def item_fingerprints(df: pd.DataFrame, time_columns: List[str]) -> List[str]:
+    """
+    Key of every row: item ID plus a hash of its demand history and months
+    
+    A corrected value or a new month changes the key, so the item is
+    forecast again instead of being resumed from an outdated result.
+    """
+    demand = np.ascontiguousarray(np.nan_to_num(df[time_columns].to_numpy(dtype=np.float64)))
+    months = '|'.join(time_columns).encode()
+    keys = []
+    for item_id, row in zip(df['item_id'], demand):
+        digest = hashlib.sha1(row.tobytes())
+        digest.update(months)
+        keys.append(f"{item_id!r}:{digest.hexdigest()[:16]}")
+    return keys
+
+class CheckpointStore:
+    """
+    Append-only store of completed per-item results
+    
+    Each flush appends one pickled batch to <directory>/<name>-<fingerprint>.ckpt
+    and syncs it to disk, so a crash loses at most the batch in progress. A
+    partially written last batch (the process died mid-write) is ignored and
+    cut off when the store is reopened.
+    """
+    
+    def __init__(self, directory: str, name: str, fingerprint: str):
+        """
+        Open (or create) the checkpoint of one algorithm configuration
+        
+        Args:
+            directory: Checkpoint directory
+            name: Algorithm name (part of the file name)
+            fingerprint: config_fingerprint of the run
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name}-{fingerprint}.ckpt")
+        self.sections = []
+        self.items = {}
+        self._load()
+    
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            while True:
+                try:
+                    batch = pickle.load(f)
+                except Exception:
+                    # End of file, or a batch cut short by a crash
+                    break
+                for section in batch['sections']:
+                    if section not in self.sections:
+                        self.sections.append(section)
+                self.items.update(batch['items'])
+                valid_size = f.tell()
+        
+        if valid_size < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.items
+    
+    def __len__(self) -> int:
+        return len(self.items)
+    
+    def append(self, sections: List[str], items: Dict[str, Dict]):
+        """
+        Durably add a batch of completed items
+        
+        Args:
+            sections: Result sections of the run (kept so empty sections survive a resume)
+            items: Item key -> {section: value} for every completed item
+        """
+        with open(self.path, 'ab') as f:
+            pickle.dump({'sections': list(sections), 'items': items}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        for section in sections:
+            if section not in self.sections:
+                self.sections.append(section)
+        self.items.update(items)
+
+def run_with_checkpoint(model, df: pd.DataFrame, checkpoint_dir: str, forecast_periods: int = 12,
+                        batch_size: int = 50, name: Optional[str] = None) -> Dict:
+    """
+    fit_and_forecast in batches of items, resuming from earlier completed items
+    
+    Items whose key (item ID and history) is already in the checkpoint of
+    the same model configuration are not fitted again. The rest are run
+    batch_size items at a time and each batch is flushed before the next
+    one starts. Fitted model objects are not checkpointed, so model.models
+    only holds the items fitted in this run.
+    
+    Args:
+        model: Algorithm instance after load_data (time_columns set)
+        df: DataFrame of the items to forecast
+        checkpoint_dir: Checkpoint directory
+        forecast_periods: Number of periods to forecast
+        batch_size: Items per fit_and_forecast call and flush
+        name: File name prefix (defaults to the model class name)
+    
+    Returns:
+        Dictionary with forecasting results for every row of df, as fit_and_forecast
+    """
+    time_columns = getattr(model, 'time_columns', None) or [col for col in df.columns if col not in ITEM_COLUMNS]
+    config = model_config(model, forecast_periods)
+    store = CheckpointStore(checkpoint_dir, name or type(model).__name__, config_fingerprint(config))
+    
+    keys = item_fingerprints(df, time_columns)
+    pending = [position for position, key in enumerate(keys) if key not in store]
+    print(f"Checkpoint {store.path}: {len(df) - len(pending)} items done, {len(pending)} to run")
+    
+    for start in range(0, len(pending), batch_size):
+        positions = pending[start:start + batch_size]
+        batch_results = model.fit_and_forecast(df.iloc[positions], forecast_periods=forecast_periods)
+        
+        sections = [section for section, values in batch_results.items() if isinstance(values, dict)]
+        items = {}
+        for position in positions:
+            item_id = df['item_id'].iat[position]
+            items[keys[position]] = {section: batch_results[section][item_id] for section in sections
+                                     if item_id in batch_results[section]}
+        store.append(sections, items)
+    
+    results = {section: {} for section in store.sections}
+    for item_id, key in zip(df['item_id'], keys):
+        for section, value in store.items[key].items():
+            results.setdefault(section, {})[item_id] = value
+    
+    return results
@@ -0,0 +1,205 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from datetime import datetime
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Optional, Sequence
+
+from algorithms.core import kernels
+
+# Bump when a feature definition changes so disk caches are not reused
+FEATURE_VERSION = 1
+
+LAGS = [1, 2, 3, 6, 12, 18, 24]
+ROLLING_WINDOWS = [3, 6, 12, 24]
+ROLLING_STATS = ['mean', 'std', 'max', 'min', 'sum']
+SMOOTHING_ALPHAS = [0.1, 0.3, 0.5, 0.7]
+
+# Union of the features shared by the XGBoost, Random Forest and LSTM builders
+SHARED_COLUMNS = (
+    ['month', 'quarter', 'year', 'month_sin', 'month_cos', 'quarter_sin', 'quarter_cos',
+     'time_index', 'time_index_squared'] +
+    [f'lag_{lag}' for lag in LAGS] +
+    [f'rolling_{stat}_{window}' for window in ROLLING_WINDOWS for stat in ROLLING_STATS] +
+    [f'exp_smooth_{int(alpha*10)}' for alpha in SMOOTHING_ALPHAS] +
+    ['demand_frequency', 'avg_demand_when_positive', 'periods_since_last_demand']
+)
+
+class FeatureBlock:
+    """Columnar float32 block of shared features for one item history (one row per period)"""
+    
+    __slots__ = ('values',)
+    
+    index = {column: position for position, column in enumerate(SHARED_COLUMNS)}
+    
+    def __init__(self, values: np.ndarray):
+        self.values = values
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.values[:, self.index[column]]
+    
+    def frame(self, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """DataFrame with the requested columns (all shared columns by default)"""
+        columns = list(columns) if columns is not None else SHARED_COLUMNS
+        return pd.DataFrame(self.values[:, [self.index[column] for column in columns]], columns=columns)
+
+def compute_shared_features(demand_series: np.ndarray, dates: List[datetime]) -> FeatureBlock:
+    """
+    Compute every shared feature for every period of one demand series
+    
+    Definitions follow the original per-period builders: lags and rolling
+    statistics are 0 until enough history exists, rolling std is the
+    population std, and intermittency features use the history up to and
+    including the period.
+    
+    Args:
+        demand_series: Historical demand values
+        dates: Date of each period
+    
+    Returns:
+        FeatureBlock of shape (n_periods, len(SHARED_COLUMNS))
+    """
+    demand = np.asarray(demand_series, dtype=np.float64)
+    n_periods = len(demand)
+    values = np.zeros((n_periods, len(SHARED_COLUMNS)), dtype=np.float32)
+    block = FeatureBlock(values)
+    
+    def put(column, data):
+        values[:, block.index[column]] = data
+    
+    # Calendar and trend
+    month = np.array([date.month for date in dates[:n_periods]], dtype=np.float64)
+    quarter = (month - 1) // 3 + 1
+    time_index = np.arange(n_periods, dtype=np.float64)
+    put('month', month)
+    put('quarter', quarter)
+    put('year', [date.year for date in dates[:n_periods]])
+    put('month_sin', np.sin(2 * np.pi * month / 12))
+    put('month_cos', np.cos(2 * np.pi * month / 12))
+    put('quarter_sin', np.sin(2 * np.pi * quarter / 4))
+    put('quarter_cos', np.cos(2 * np.pi * quarter / 4))
+    put('time_index', time_index)
+    put('time_index_squared', time_index ** 2)
+    
+    # Lags (0 before the lag is available)
+    for lag in LAGS:
+        if lag < n_periods:
+            values[lag:, block.index[f'lag_{lag}']] = demand[:-lag]
+    
+    # Rolling statistics (0 until the window is full)
+    for window in ROLLING_WINDOWS:
+        if window > n_periods:
+            continue
+        windows = sliding_window_view(demand, window)
+        for stat, data in zip(ROLLING_STATS, [windows.mean(axis=1), windows.std(axis=1), windows.max(axis=1),
+                                              windows.min(axis=1), windows.sum(axis=1)]):
+            values[window - 1:, block.index[f'rolling_{stat}_{window}']] = data
+    
+    # Exponential smoothing levels
+    for alpha in SMOOTHING_ALPHAS:
+        put(f'exp_smooth_{int(alpha*10)}', kernels.exponential_smoothing(demand, alpha)[0])
+    
+    # Intermittency, over the history up to each period
+    positive = demand > 0
+    demand_count = np.cumsum(positive)
+    put('demand_frequency', demand_count / (time_index + 1))
+    put('avg_demand_when_positive', np.divide(np.cumsum(np.where(positive, demand, 0.0)), demand_count,
+                                              out=np.zeros(n_periods), where=demand_count > 0))
+    put('periods_since_last_demand', kernels.periods_since_demand(demand)[0])
+    
+    return block
+
+class FeatureStore:
+    """
+    Cache of shared feature blocks keyed by (item, history version)
+    
+    The history version is a hash of the demand values and their dates, so
+    a block is reused by every model that sees the same history in a run and
+    recomputed automatically when the history changes (new month, corrected
+    value). Blocks live in an in-memory LRU and, with cache_dir, as .npy
+    files that other processes and later runs can load.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_memory_items: Optional[int] = 10000):
+        """
+        Initialize the feature store
+        
+        Args:
+            cache_dir: Directory for on-disk blocks (None for memory only)
+            max_memory_items: Blocks kept in memory (None for unlimited)
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.blocks = OrderedDict()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'computed': 0}
+        
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def history_key(item_id, demand_series: np.ndarray, dates: List[datetime]) -> str:
+        """Cache key of an item history: item ID plus a hash of values, dates and feature version"""
+        demand = np.ascontiguousarray(demand_series, dtype=np.float64)
+        digest = hashlib.sha1(demand.tobytes())
+        digest.update(f"{FEATURE_VERSION}|{dates[0].isoformat() if len(dates) else ''}".encode())
+        
+        item = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(item_id))
+        return f"{item}-{digest.hexdigest()[:16]}"
+    
+    def get(self, item_id, demand_series: np.ndarray, dates: List[datetime]) -> FeatureBlock:
+        """
+        Shared features of an item history, computed at most once
+        
+        Args:
+            item_id: Item identifier
+            demand_series: Historical demand values
+            dates: Date of each period
+        
+        Returns:
+            FeatureBlock for the history
+        """
+        key = self.history_key(item_id, demand_series, dates[:len(demand_series)])
+        
+        block = self.blocks.get(key)
+        if block is not None:
+            self.blocks.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return block
+        
+        path = os.path.join(self.cache_dir, f"{key}.npy") if self.cache_dir else None
+        if path and os.path.exists(path):
+            block = FeatureBlock(np.load(path))
+            self.stats['disk_hits'] += 1
+        else:
+            block = compute_shared_features(demand_series, dates)
+            self.stats['computed'] += 1
+            if path:
+                # Write then rename so concurrent workers never read a partial file
+                temp_path = f"{path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    np.save(f, block.values)
+                os.replace(temp_path, path)
+        
+        self.blocks[key] = block
+        if self.max_memory_items is not None and len(self.blocks) > self.max_memory_items:
+            self.blocks.popitem(last=False)
+        
+        return block
+    
+    def clear(self):
+        """Drop the in-memory blocks (disk blocks are kept)"""
+        self.blocks.clear()
+
+_default_store = None
+
+def default_feature_store() -> FeatureStore:
+    """Process-wide in-memory store shared by models created without an explicit store"""
+    global _default_store
+    if _default_store is None:
+        _default_store = FeatureStore()
+    return _default_store
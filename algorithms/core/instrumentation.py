@@ -0,0 +1,249 @@
+import sys
+import time
+import threading
+import cProfile
+import pstats
+import io
+from collections import defaultdict
+from typing import Dict, Optional
+
+class _Phase:
+    """Context manager timing one phase of an Instrumentation"""
+    
+    __slots__ = ('instrumentation', 'name')
+    
+    def __init__(self, instrumentation: 'Instrumentation', name: str):
+        self.instrumentation = instrumentation
+        self.name = name
+    
+    def __enter__(self):
+        self.instrumentation._stack.append([self.name, time.perf_counter(), 0.0])
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation._close_phase()
+        return False
+
+class _NullPhase:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+class Instrumentation:
+    """
+    Per-item, per-phase timers and counters shared by all forecasting algorithms
+    
+    Algorithms report through a small API inside fit_and_forecast:
+    - begin_item(item_id) at the top of the item loop (closes the previous item)
+    - with instrumentation.phase('fit'): around feature building, model
+      selection, fitting, forecasting and validation
+    - count('fits') / count('fallbacks') / count('failed_convergence')
+    - end_item() after the loop
+    
+    Phase times are exclusive: time spent in a nested phase is not counted
+    again in the enclosing one. Item time not covered by a phase is reported
+    as 'unattributed'.
+    
+    Optional sampling modes cover the whole run between start() and stop():
+    - 'cprofile': deterministic profile, exported as the top functions
+    - 'sampling': a background thread samples the running stack every
+      sample_interval seconds and counts collapsed stacks prefixed with the
+      current phase (the folded format py-spy and flamegraph tools read)
+    """
+    
+    PROFILE_MODES = (None, 'cprofile', 'sampling')
+    
+    def __init__(self, algorithm: str, profile: Optional[str] = None, sample_interval: float = 0.005):
+        """
+        Initialize instrumentation for one algorithm run
+        
+        Args:
+            algorithm: Algorithm name
+            profile: Sampling mode (None, 'cprofile' or 'sampling')
+            sample_interval: Seconds between stack samples in 'sampling' mode
+        """
+        if profile not in self.PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {profile}")
+        
+        self.algorithm = algorithm
+        self.profile = profile
+        self.sample_interval = sample_interval
+        
+        self.phase_seconds = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.items = {}
+        
+        self._stack = []
+        self._item = None
+        self._item_started = None
+        self._started = time.perf_counter()
+        self._finished = None
+        
+        self._profiler = None
+        self._sampler = None
+        self._sampling = threading.Event()
+        self._thread_id = None
+        self.stack_samples = defaultdict(int)
+    
+    def start(self):
+        """Start the wall clock and the optional profiler"""
+        self._started = time.perf_counter()
+        self._finished = None
+        
+        if self.profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == 'sampling':
+            self._thread_id = threading.get_ident()
+            self._sampling.set()
+            self._sampler = threading.Thread(target=self._sample_stacks, daemon=True)
+            self._sampler.start()
+    
+    def stop(self):
+        """Close any open item and stop the optional profiler"""
+        self.end_item()
+        
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self._sampler is not None:
+            self._sampling.clear()
+            self._sampler.join()
+            self._sampler = None
+        
+        self._finished = time.perf_counter()
+    
+    def phase(self, name: str) -> _Phase:
+        """Context manager timing a phase of the current item (or of the run)"""
+        return _Phase(self, name)
+    
+    def _close_phase(self):
+        name, started, inner = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        exclusive = elapsed - inner
+        
+        self.phase_seconds[name] += exclusive
+        self.phase_calls[name] += 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        
+        if self._item is not None:
+            item_phases = self.items[self._item]['phases']
+            item_phases[name] = item_phases.get(name, 0.0) + exclusive
+    
+    def begin_item(self, item_id):
+        """Start timing an item, closing the previous one"""
+        self.end_item()
+        self._item = str(item_id)
+        self._item_started = time.perf_counter()
+        self.items[self._item] = {'total_seconds': 0.0, 'phases': {}, 'counters': {}}
+    
+    def end_item(self):
+        """Stop timing the current item, if any"""
+        if self._item is None:
+            return
+        
+        item = self.items[self._item]
+        item['total_seconds'] = time.perf_counter() - self._item_started
+        unattributed = item['total_seconds'] - sum(item['phases'].values())
+        item['phases']['unattributed'] = max(unattributed, 0.0)
+        self.phase_seconds['unattributed'] += max(unattributed, 0.0)
+        self._item = None
+    
+    def count(self, counter: str, increment: int = 1):
+        """Increment a run counter (and the current item's)"""
+        self.counters[counter] += increment
+        if self._item is not None:
+            item_counters = self.items[self._item]['counters']
+            item_counters[counter] = item_counters.get(counter, 0) + increment
+    
+    def _sample_stacks(self):
+        while self._sampling.is_set():
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                
+                phase = self._stack[-1][0] if self._stack else 'none'
+                self.stack_samples[';'.join([f"phase:{phase}"] + stack[::-1])] += 1
+            
+            time.sleep(self.sample_interval)
+    
+    def _profile_summary(self, top_n: int = 30) -> list:
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=stream)
+        
+        rows = []
+        for (filename, line, function), (calls, _, total_time, cumulative_time, _) in stats.stats.items():
+            rows.append({
+                'function': f"{function} ({filename}:{line})",
+                'calls': calls,
+                'total_seconds': total_time,
+                'cumulative_seconds': cumulative_time
+            })
+        
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:top_n]
+    
+    def to_dict(self) -> Dict:
+        """
+        Structured, JSON-serializable export of everything recorded
+        
+        Returns:
+            Dictionary with run totals, per-phase times, counters, per-item
+            breakdowns and the profile (if a sampling mode was enabled)
+        """
+        finished = self._finished if self._finished is not None else time.perf_counter()
+        
+        export = {
+            'algorithm': self.algorithm,
+            'profile_mode': self.profile,
+            'total_seconds': finished - self._started,
+            'items_processed': len(self.items),
+            'phases': {
+                name: {'seconds': seconds, 'calls': self.phase_calls.get(name, len(self.items))}
+                for name, seconds in self.phase_seconds.items()
+            },
+            'counters': dict(self.counters),
+            'items': self.items
+        }
+        
+        if self.profile == 'cprofile' and self._profiler is not None:
+            export['profile'] = self._profile_summary()
+        elif self.profile == 'sampling':
+            export['profile'] = dict(self.stack_samples)
+        
+        return export
+
+class NullInstrumentation:
+    """No-op stand-in used when an algorithm runs without instrumentation"""
+    
+    _null_phase = _NullPhase()
+    
+    def start(self):
+        pass
+    
+    def stop(self):
+        pass
+    
+    def phase(self, name: str) -> _NullPhase:
+        return self._null_phase
+    
+    def begin_item(self, item_id):
+        pass
+    
+    def end_item(self):
+        pass
+    
+    def count(self, counter: str, increment: int = 1):
+        pass
+    
+    def to_dict(self) -> Dict:
+        return {}
@@ -0,0 +1,291 @@
+import numpy as np
+from typing import Optional, Tuple, Union
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+DEFAULT_BACKEND = 'numba' if NUMBA_AVAILABLE else 'numpy'
+
+def _as_matrix(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[None, :]
+    return np.ascontiguousarray(values)
+
+def _per_item(parameter: Union[float, np.ndarray], n_items: int) -> np.ndarray:
+    return np.ascontiguousarray(np.broadcast_to(np.asarray(parameter, dtype=np.float64), (n_items,)))
+
+def _resolve_backend(backend: Optional[str]) -> str:
+    backend = backend or DEFAULT_BACKEND
+    if backend not in ('numba', 'numpy'):
+        raise ValueError(f"Unknown kernel backend: {backend}")
+    if backend == 'numba' and not NUMBA_AVAILABLE:
+        raise ImportError("numba is not installed")
+    return backend
+
+# === Pure NumPy implementations: loop over time, vectorized over items ===
+
+def _exponential_smoothing_numpy(values, alpha):
+    smoothed = np.empty_like(values)
+    if values.shape[1] == 0:
+        return smoothed
+    
+    level = values[:, 0].copy()
+    smoothed[:, 0] = level
+    for t in range(1, values.shape[1]):
+        level = alpha * values[:, t] + (1 - alpha) * level
+        smoothed[:, t] = level
+    
+    return smoothed
+
+def _periods_since_demand_numpy(values):
+    periods = np.empty(values.shape, dtype=np.int64)
+    count = np.zeros(values.shape[0], dtype=np.int64)
+    for t in range(values.shape[1]):
+        count = np.where(values[:, t] > 0, 0, count + 1)
+        periods[:, t] = count
+    
+    return periods
+
+def _croston_numpy(values, alpha, beta):
+    n_items, n_months = values.shape
+    z_path = np.empty((n_items, n_months))
+    x_path = np.empty((n_items, n_months))
+    started_path = np.empty((n_items, n_months), dtype=bool)
+    
+    z = np.zeros(n_items)
+    x = np.ones(n_items)
+    periods_since = np.zeros(n_items, dtype=np.int64)
+    started = np.zeros(n_items, dtype=bool)
+    
+    for t in range(n_months):
+        d = values[:, t]
+        has_demand = d > 0
+        
+        # Initialise at the first demand, as SBAForecasting does
+        first = has_demand & ~started
+        z[first] = d[first]
+        x[first] = 1
+        periods_since[first] = 0
+        started |= first
+        
+        periods_since += started
+        
+        z = np.where(has_demand, alpha * d + (1 - alpha) * z, z)
+        x = np.where(has_demand, beta * periods_since + (1 - beta) * x, x)
+        
+        periods_since[has_demand] = 0
+        
+        z_path[:, t] = z
+        x_path[:, t] = x
+        started_path[:, t] = started
+    
+    return z_path, x_path, started_path, periods_since
+
+def _tsb_numpy(values, alpha, beta):
+    n_items, n_months = values.shape
+    p_path = np.empty((n_items, n_months))
+    z_path = np.empty((n_items, n_months))
+    
+    p = np.zeros(n_items)
+    z = np.zeros(n_items)
+    started = np.zeros(n_items, dtype=bool)
+    
+    for t in range(n_months):
+        d = values[:, t]
+        has_demand = d > 0
+        
+        first = has_demand & ~started
+        p[first] = 1
+        z[first] = d[first]
+        started |= first
+        
+        p = np.where(started, np.where(has_demand, p + beta * (1 - p), (1 - beta) * p), p)
+        z = np.where(has_demand, z + alpha * (d - z), z)
+        
+        p_path[:, t] = p
+        z_path[:, t] = z
+    
+    return p_path, z_path
+
+# === numba implementations: the same recursions, one scalar loop per item ===
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _exponential_smoothing_numba(values, alpha):
+        n_items, n_months = values.shape
+        smoothed = np.empty_like(values)
+        for i in range(n_items):
+            if n_months == 0:
+                break
+            level = values[i, 0]
+            smoothed[i, 0] = level
+            for t in range(1, n_months):
+                level = alpha[i] * values[i, t] + (1 - alpha[i]) * level
+                smoothed[i, t] = level
+        return smoothed
+    
+    @njit(cache=True)
+    def _periods_since_demand_numba(values):
+        n_items, n_months = values.shape
+        periods = np.empty((n_items, n_months), dtype=np.int64)
+        for i in range(n_items):
+            count = 0
+            for t in range(n_months):
+                if values[i, t] > 0:
+                    count = 0
+                else:
+                    count += 1
+                periods[i, t] = count
+        return periods
+    
+    @njit(cache=True)
+    def _croston_numba(values, alpha, beta):
+        n_items, n_months = values.shape
+        z_path = np.empty((n_items, n_months))
+        x_path = np.empty((n_items, n_months))
+        started_path = np.empty((n_items, n_months), dtype=np.bool_)
+        periods = np.zeros(n_items, dtype=np.int64)
+        
+        for i in range(n_items):
+            z = 0.0
+            x = 1.0
+            periods_since = 0
+            started = False
+            for t in range(n_months):
+                d = values[i, t]
+                if d > 0 and not started:
+                    z = d
+                    x = 1.0
+                    periods_since = 0
+                    started = True
+                if started:
+                    periods_since += 1
+                if d > 0:
+                    z = alpha[i] * d + (1 - alpha[i]) * z
+                    x = beta[i] * periods_since + (1 - beta[i]) * x
+                    periods_since = 0
+                z_path[i, t] = z
+                x_path[i, t] = x
+                started_path[i, t] = started
+            periods[i] = periods_since
+        
+        return z_path, x_path, started_path, periods
+    
+    @njit(cache=True)
+    def _tsb_numba(values, alpha, beta):
+        n_items, n_months = values.shape
+        p_path = np.empty((n_items, n_months))
+        z_path = np.empty((n_items, n_months))
+        
+        for i in range(n_items):
+            p = 0.0
+            z = 0.0
+            started = False
+            for t in range(n_months):
+                d = values[i, t]
+                if d > 0 and not started:
+                    p = 1.0
+                    z = d
+                    started = True
+                if d > 0:
+                    p = p + beta[i] * (1 - p)
+                    z = z + alpha[i] * (d - z)
+                elif started:
+                    p = (1 - beta[i]) * p
+                p_path[i, t] = p
+                z_path[i, t] = z
+        
+        return p_path, z_path
+
+# === Public kernels ===
+
+def exponential_smoothing(values, alpha: Union[float, np.ndarray], backend: Optional[str] = None) -> np.ndarray:
+    """
+    Simple exponential smoothing level after every period
+    
+    level[0] = values[0], level[t] = alpha * values[t] + (1 - alpha) * level[t - 1]
+    (the exp_smooth features of the XGBoost and Random Forest models)
+    
+    Args:
+        values: Demand of shape (n_items, n_months) or (n_months,)
+        alpha: Smoothing parameter, scalar or one per item
+        backend: 'numba' or 'numpy' (defaults to numba when installed)
+    
+    Returns:
+        float64 array of shape (n_items, n_months)
+    """
+    values = _as_matrix(values)
+    if _resolve_backend(backend) == 'numba':
+        return _exponential_smoothing_numba(values, _per_item(alpha, len(values)))
+    return _exponential_smoothing_numpy(values, _per_item(alpha, len(values)))
+
+def periods_since_demand(values, backend: Optional[str] = None) -> np.ndarray:
+    """
+    Periods since the last positive demand, counting the current period
+    
+    0 in a period with demand; before any demand, the number of periods so
+    far (the periods_since_last_demand features of the feature builders)
+    
+    Args:
+        values: Demand of shape (n_items, n_months) or (n_months,)
+        backend: 'numba' or 'numpy' (defaults to numba when installed)
+    
+    Returns:
+        int64 array of shape (n_items, n_months)
+    """
+    values = _as_matrix(values)
+    if _resolve_backend(backend) == 'numba':
+        return _periods_since_demand_numba(values)
+    return _periods_since_demand_numpy(values)
+
+def croston_recursion(values, alpha: Union[float, np.ndarray], beta: Union[float, np.ndarray],
+                      backend: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Croston/SBA demand size and interval estimates after every period
+    
+    Same recursion as SBAForecasting.calculate_sba_parameters: each item
+    starts at its first demand, and the estimates update only in periods
+    with demand.
+    
+    Args:
+        values: Demand of shape (n_items, n_months) or (n_months,)
+        alpha: Demand size smoothing, scalar or one per item
+        beta: Interval smoothing, scalar or one per item
+        backend: 'numba' or 'numpy' (defaults to numba when installed)
+    
+    Returns:
+        Tuple of (demand estimates, interval estimates, started mask), each of
+        shape (n_items, n_months), and the final periods since demand per item
+    """
+    values = _as_matrix(values)
+    alpha = _per_item(alpha, len(values))
+    beta = _per_item(beta, len(values))
+    if _resolve_backend(backend) == 'numba':
+        return _croston_numba(values, alpha, beta)
+    return _croston_numpy(values, alpha, beta)
+
+def tsb_recursion(values, alpha: Union[float, np.ndarray], beta: Union[float, np.ndarray],
+                  backend: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    TSB demand probability and size estimates after every period
+    
+    Args:
+        values: Demand of shape (n_items, n_months) or (n_months,)
+        alpha: Demand size smoothing, scalar or one per item
+        beta: Demand probability smoothing, scalar or one per item
+        backend: 'numba' or 'numpy' (defaults to numba when installed)
+    
+    Returns:
+        Tuple of (probability estimates, demand size estimates), each of
+        shape (n_items, n_months)
+    """
+    values = _as_matrix(values)
+    alpha = _per_item(alpha, len(values))
+    beta = _per_item(beta, len(values))
+    if _resolve_backend(backend) == 'numba':
+        return _tsb_numba(values, alpha, beta)
+    return _tsb_numpy(values, alpha, beta)
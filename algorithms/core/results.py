@@ -0,0 +1,273 @@
+import numpy as np
+from collections.abc import Mapping
+from typing import Dict, List, Optional
+
+# item_forecasts keys served from the shared ItemCatalog instead of per item
+CATALOG_KEYS = ['item_name', 'category', 'historical_demand']
+
+class _Missing:
+    """Marks a key an item does not have in a per-item column (pickles to the same object)"""
+    
+    __slots__ = ()
+    
+    def __reduce__(self):
+        return '_MISSING'
+
+_MISSING = _Missing()
+
+class ItemCatalog:
+    """
+    Item metadata and demand history, held once and shared by every ForecastResults
+    
+    Items are appended as algorithms report them; an item already in the
+    catalog keeps its first name, category and history.
+    """
+    
+    __slots__ = ('item_ids', 'item_names', 'categories', 'positions', '_history', '_size')
+    
+    def __init__(self):
+        self.item_ids = []
+        self.item_names = []
+        self.categories = []
+        self.positions = {}
+        self._history = np.zeros((0, 0))
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __getstate__(self):
+        # Drop the spare capacity of the history buffer
+        state = {name: getattr(self, name) for name in self.__slots__}
+        state['_history'] = self.history.copy()
+        return state
+    
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+    
+    @property
+    def history(self) -> np.ndarray:
+        """Demand history matrix of shape (n_items, n_months)"""
+        return self._history[:self._size]
+    
+    def add(self, item_id, item_name, category, historical_demand) -> int:
+        """
+        Position of an item, appending it when it is new
+        
+        Args:
+            item_id: Item identifier
+            item_name: Item name
+            category: Item category
+            historical_demand: Demand history of the item
+        
+        Returns:
+            Row of the item in the catalog
+        """
+        position = self.positions.get(item_id)
+        if position is not None:
+            return position
+        
+        history = np.asarray(historical_demand)
+        if self._size and history.shape[0] != self._history.shape[1]:
+            raise ValueError(f"Item {item_id} has {history.shape[0]} months of history, "
+                             f"the catalog has {self._history.shape[1]}")
+        
+        # Integer histories stay int64 until an item with fractional demand arrives
+        dtype = np.result_type(self._history.dtype, history.dtype) if self._size else history.dtype
+        if dtype != self._history.dtype:
+            self._history = self._history.astype(dtype)
+        if self._size == len(self._history):
+            grown = np.zeros((max(2 * len(self._history), 64), history.shape[0]), dtype=dtype)
+            if self._size:
+                grown[:self._size] = self._history[:self._size]
+            self._history = grown
+        
+        position = self._size
+        self._history[position] = history
+        self._size += 1
+        self.positions[item_id] = position
+        self.item_ids.append(item_id)
+        self.item_names.append(item_name)
+        self.categories.append(category)
+        return position
+
+class ItemForecastView(Mapping):
+    """Read-only dict-style view of one item's forecast entry"""
+    
+    __slots__ = ('_results', '_index')
+    
+    def __init__(self, results: 'ForecastResults', index: int):
+        self._results = results
+        self._index = index
+    
+    def __getitem__(self, key):
+        results = self._results
+        if key in CATALOG_KEYS:
+            row = results.rows[self._index]
+            catalog = results.catalog
+            if key == 'historical_demand':
+                return catalog.history[row]
+            return (catalog.item_names if key == 'item_name' else catalog.categories)[row]
+        if key in results.blocks:
+            return results.blocks[key][self._index]
+        if key in results.fields:
+            value = results.fields[key][self._index]
+            if value is _MISSING:
+                raise KeyError(key)
+            # Values that were Python numbers read back as Python numbers (round() differs)
+            return value.item() if isinstance(value, np.generic) and key in results.python_fields else value
+        raise KeyError(key)
+    
+    def __iter__(self):
+        results = self._results
+        yield from CATALOG_KEYS
+        yield from results.blocks
+        for key, values in results.fields.items():
+            if values[self._index] is not _MISSING:
+                yield key
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def __repr__(self) -> str:
+        return f"ItemForecastView({dict(self)!r})"
+
+class ItemForecasts(Mapping):
+    """item_forecasts of a ForecastResults: item ID -> ItemForecastView"""
+    
+    __slots__ = ('_results',)
+    
+    def __init__(self, results: 'ForecastResults'):
+        self._results = results
+    
+    def __getitem__(self, item_id) -> ItemForecastView:
+        return ItemForecastView(self._results, self._results.index[item_id])
+    
+    def __iter__(self):
+        return iter(self._results.item_ids)
+    
+    def __len__(self) -> int:
+        return len(self._results.item_ids)
+    
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._results.index
+
+class ForecastResults(Mapping):
+    """
+    Columnar form of an algorithm's fit_and_forecast results
+    
+    In item_forecasts, list values of the same length for every item
+    (monthly_forecasts, lower_ci, forecast_uncertainty, ...) become one
+    float array block, scalar values become one array per key, and item
+    name, category and history come from a shared ItemCatalog. Other keys
+    (ragged lists, nested dicts) are kept per item. The remaining result
+    sections are kept as they are.
+    
+    The object reads like the original dict (results['item_forecasts'][item_id]['monthly_forecasts']),
+    so create_forecast_summary and AlgorithmTester.validate_forecasts accept
+    it unchanged. Forecast lists read back as float arrays.
+    """
+    
+    def __init__(self, catalog: ItemCatalog, item_ids: List, rows: np.ndarray, blocks: Dict[str, np.ndarray],
+                 fields: Dict[str, np.ndarray], sections: Dict[str, Dict], python_fields: Optional[set] = None):
+        self.catalog = catalog
+        self.item_ids = item_ids
+        self.index = {item_id: index for index, item_id in enumerate(item_ids)}
+        self.rows = rows
+        self.blocks = blocks
+        self.fields = fields
+        self.sections = sections
+        self.python_fields = python_fields or set()
+    
+    @classmethod
+    def from_results(cls, results: Dict, catalog: Optional[ItemCatalog] = None) -> 'ForecastResults':
+        """
+        Compact a fit_and_forecast results dictionary
+        
+        Args:
+            results: Results dictionary from fit_and_forecast
+            catalog: Catalog shared with other algorithms (a new one by default)
+        
+        Returns:
+            ForecastResults with the same content
+        """
+        catalog = catalog if catalog is not None else ItemCatalog()
+        item_forecasts = results['item_forecasts']
+        item_ids = list(item_forecasts)
+        entries = [item_forecasts[item_id] for item_id in item_ids]
+        
+        rows = np.array([catalog.add(item_id, entry.get('item_name'), entry.get('category'),
+                                     entry.get('historical_demand', []))
+                         for item_id, entry in zip(item_ids, entries)], dtype=np.int64)
+        
+        keys = []
+        for entry in entries:
+            for key in entry:
+                if key not in CATALOG_KEYS and key not in keys:
+                    keys.append(key)
+        
+        blocks = {}
+        fields = {}
+        python_fields = set()
+        for key in keys:
+            values = [entry.get(key, _MISSING) for entry in entries]
+            block = _as_block(values)
+            if block is not None:
+                blocks[key] = block
+            else:
+                fields[key] = _as_field(values)
+                if not any(isinstance(value, np.generic) for value in values):
+                    python_fields.add(key)
+        
+        sections = {section: values for section, values in results.items() if section != 'item_forecasts'}
+        return cls(catalog, item_ids, rows, blocks, fields, sections, python_fields)
+    
+    def __getitem__(self, section):
+        if section == 'item_forecasts':
+            return ItemForecasts(self)
+        return self.sections[section]
+    
+    def __iter__(self):
+        yield 'item_forecasts'
+        yield from self.sections
+    
+    def __len__(self) -> int:
+        return len(self.sections) + 1
+    
+    def to_dict(self) -> Dict:
+        """Plain results dictionary, as fit_and_forecast returns it"""
+        item_forecasts = {}
+        for item_id, view in ItemForecasts(self).items():
+            entry = {key: view[key] for key in view}
+            for key in list(self.blocks) + ['historical_demand']:
+                entry[key] = entry[key].tolist()
+            item_forecasts[item_id] = entry
+        return {'item_forecasts': item_forecasts, **self.sections}
+    
+    def nbytes(self) -> int:
+        """Bytes held in the array blocks and scalar columns"""
+        return sum(block.nbytes for block in self.blocks.values()) + \
+            sum(values.nbytes for values in self.fields.values() if values.dtype != object)
+
+def _as_block(values: List) -> Optional[np.ndarray]:
+    """(n_items, length) float array when every value is a numeric list of one length"""
+    if not values or not all(isinstance(value, (list, tuple, np.ndarray)) for value in values):
+        return None
+    if len({len(value) for value in values}) != 1:
+        return None
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+
+def _as_field(values: List) -> np.ndarray:
+    """bool, int64 or float64 array for numeric columns without gaps, object array otherwise"""
+    if all(isinstance(value, (bool, np.bool_)) for value in values):
+        return np.array(values, dtype=bool)
+    if all(isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_))
+           for value in values):
+        return np.array(values)
+    field = np.empty(len(values), dtype=object)
+    field[:] = values
+    return field
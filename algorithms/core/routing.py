@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from algorithms.ingestion.excel_reader import ITEM_COLUMNS
+
+PATTERNS = ['Smooth', 'Erratic', 'Intermittent', 'Lumpy', 'No Demand']
+
+# Syntetos-Boylan cut-offs used by SBAForecasting.classify_demand_pattern
+ADI_CUTOFF = 1.32
+CV_SQUARED_CUTOFF = 0.49
+
+# Demand pattern -> algorithms worth running. Models that fall back to an
+# average on sparse series (SARIMA, LSTM, Prophet) only see smooth demand.
+DEFAULT_ROUTING_TABLE = {
+    'Smooth': ['SARIMA', 'SBA', 'Random_Forest', 'XGBoost', 'LSTM', 'Prophet'],
+    'Erratic': ['SARIMA', 'SBA', 'Random_Forest', 'XGBoost'],
+    'Intermittent': ['SBA', 'Random_Forest', 'XGBoost'],
+    'Lumpy': ['SBA'],
+    'No Demand': ['SBA']
+}
+
+# Minimum history (months since the first demand) and demand occasions per
+# algorithm, below which the models return their fallback forecast anyway
+DEFAULT_REQUIREMENTS = {
+    'SARIMA': {'min_history': 24, 'min_nonzero': 12},
+    'SBA': {'min_history': 0, 'min_nonzero': 0},
+    'Random_Forest': {'min_history': 16, 'min_nonzero': 4},
+    'XGBoost': {'min_history': 16, 'min_nonzero': 4},
+    'LSTM': {'min_history': 24, 'min_nonzero': 12},
+    'Prophet': {'min_history': 12, 'min_nonzero': 6}
+}
+
+def demand_profile(demand: np.ndarray) -> pd.DataFrame:
+    """
+    ADI, CV², demand pattern, history length and demand count of every item
+    
+    Vectorized version of SBAForecasting.classify_demand_pattern: ADI is the
+    number of periods per demand occasion and CV² uses the sample std of the
+    non-zero demands (0 with fewer than two occasions).
+    
+    Args:
+        demand: Demand matrix of shape (n_items, n_months)
+    
+    Returns:
+        DataFrame with ADI, CV_Squared, Pattern, History_Length and Nonzero_Count
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    n_items, n_months = demand.shape
+    
+    positive = demand > 0
+    nonzero_count = positive.sum(axis=1)
+    has_demand = nonzero_count > 0
+    
+    adi = np.divide(n_months, nonzero_count, out=np.full(n_items, float(n_months)), where=has_demand)
+    
+    mean = np.divide(np.where(positive, demand, 0.0).sum(axis=1), nonzero_count,
+                     out=np.zeros(n_items), where=has_demand)
+    squared_deviation = (np.where(positive, demand - mean[:, None], 0.0) ** 2).sum(axis=1)
+    std = np.sqrt(np.divide(squared_deviation, nonzero_count - 1, out=np.zeros(n_items), where=nonzero_count > 1))
+    cv_squared = np.divide(std, mean, out=np.zeros(n_items), where=(nonzero_count > 1) & (mean > 0)) ** 2
+    
+    smooth_interval = adi < ADI_CUTOFF
+    stable_size = cv_squared < CV_SQUARED_CUTOFF
+    pattern = np.select(
+        [~has_demand, smooth_interval & stable_size, smooth_interval, stable_size],
+        ['No Demand', 'Smooth', 'Erratic', 'Intermittent'],
+        default='Lumpy'
+    )
+    
+    # Months from the first demand to the end of the history
+    history_length = np.where(has_demand, n_months - positive.argmax(axis=1), 0)
+    
+    return pd.DataFrame({
+        'ADI': adi,
+        'CV_Squared': cv_squared,
+        'Pattern': pattern,
+        'History_Length': history_length,
+        'Nonzero_Count': nonzero_count
+    })
+
+class DemandRouter:
+    """
+    Routes every item to the algorithms that can change its forecast
+    
+    An item is sent to an algorithm when the routing table lists the item's
+    demand pattern for it and the item meets the algorithm's history and
+    demand-count requirements. Items that no algorithm accepts go to the
+    fallback algorithm, so every item still gets a forecast.
+    """
+    
+    def __init__(self, routing_table: Optional[Dict[str, List[str]]] = None,
+                 requirements: Optional[Dict[str, Dict[str, int]]] = None,
+                 fallback_algorithm: str = 'SBA'):
+        """
+        Initialize the router
+        
+        Args:
+            routing_table: Demand pattern -> algorithm names (defaults to DEFAULT_ROUTING_TABLE)
+            requirements: Algorithm -> {'min_history', 'min_nonzero'} (merged over DEFAULT_REQUIREMENTS)
+            fallback_algorithm: Algorithm for items no other algorithm accepts
+        """
+        self.routing_table = routing_table if routing_table is not None else DEFAULT_ROUTING_TABLE
+        self.requirements = {algo: dict(rules) for algo, rules in DEFAULT_REQUIREMENTS.items()}
+        for algo, rules in (requirements or {}).items():
+            self.requirements.setdefault(algo, {'min_history': 0, 'min_nonzero': 0}).update(rules)
+        for algorithms in self.routing_table.values():
+            for algo in algorithms:
+                self.requirements.setdefault(algo, {'min_history': 0, 'min_nonzero': 0})
+        self.fallback_algorithm = fallback_algorithm
+        
+        unknown = set(self.routing_table) - set(PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown demand patterns in routing table: {sorted(unknown)}")
+    
+    def profile(self, df: pd.DataFrame, time_columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Demand profile of every item, with the algorithms it is routed to
+        
+        Args:
+            df: DataFrame returned by an algorithm's load_data
+            time_columns: Monthly columns (defaults to every non-item column)
+        
+        Returns:
+            DataFrame with Item_ID, the demand_profile columns and Algorithms
+        """
+        if time_columns is None:
+            time_columns = [col for col in df.columns if col not in ITEM_COLUMNS]
+        demand = np.nan_to_num(df[time_columns].to_numpy(dtype=np.float64))
+        
+        profile = demand_profile(demand)
+        profile.insert(0, 'Item_ID', df['item_id'].to_numpy())
+        
+        pattern_codes = pd.Categorical(profile['Pattern'], categories=PATTERNS).codes
+        routed = np.zeros(len(profile), dtype=bool)
+        assignments = {}
+        for algo, rules in self.requirements.items():
+            accepted = np.array([algo in self.routing_table.get(pattern, []) for pattern in PATTERNS])
+            mask = (accepted[pattern_codes] &
+                    (profile['History_Length'].to_numpy() >= rules['min_history']) &
+                    (profile['Nonzero_Count'].to_numpy() >= rules['min_nonzero']))
+            assignments[algo] = mask
+            routed |= mask
+        
+        fallback = assignments.setdefault(self.fallback_algorithm, np.zeros(len(profile), dtype=bool))
+        fallback |= ~routed
+        
+        profile['Algorithms'] = [
+            [algo for algo, mask in assignments.items() if mask[position]]
+            for position in range(len(profile))
+        ]
+        return profile
+    
+    def route(self, df: pd.DataFrame, time_columns: Optional[List[str]] = None) -> Dict[str, List]:
+        """
+        Item IDs to pass to each algorithm
+        
+        Args:
+            df: DataFrame returned by an algorithm's load_data
+            time_columns: Monthly columns (defaults to every non-item column)
+        
+        Returns:
+            Dictionary of item ID lists keyed by algorithm name
+        """
+        return self.group_items(self.profile(df, time_columns))
+    
+    def group_items(self, profile: pd.DataFrame) -> Dict[str, List]:
+        """Item ID lists keyed by algorithm name from a profile() DataFrame"""
+        routes = {algo: [] for algo in self.requirements}
+        routes.setdefault(self.fallback_algorithm, [])
+        
+        for item_id, algorithms in zip(profile['Item_ID'], profile['Algorithms']):
+            for algo in algorithms:
+                routes[algo].append(item_id)
+        
+        return routes
+    
+    @staticmethod
+    def summary(profile: pd.DataFrame) -> pd.DataFrame:
+        """Item counts per demand pattern and algorithm"""
+        exploded = profile[['Pattern', 'Algorithms']].explode('Algorithms', ignore_index=True)
+        return pd.crosstab(exploded['Pattern'], exploded['Algorithms'])
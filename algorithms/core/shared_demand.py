@@ -0,0 +1,253 @@
+import os
+import calendar
+import importlib
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+BACKENDS = ['shared_memory', 'mmap']
+
+class SharedDemand:
+    """
+    Demand matrix and month index that worker processes attach to by name
+    
+    The parent copies the demand matrix once into a shared_memory block (or
+    an .npy file that workers memory-map). Workers receive only a small
+    handle and read their item rows as zero-copy views, so the cost of
+    starting a task does not grow with the catalogue and the matrix is held
+    once however many workers there are.
+    
+    Items are addressed by row position. Item IDs stay in the parent, which
+    maps results back; names and categories travel with each task.
+    """
+    
+    def __init__(self, demand: np.ndarray, months: np.ndarray, handle: Dict, shm=None, owner: bool = False):
+        self.demand = demand
+        self.months = months
+        self.handle = handle
+        self._shm = shm
+        self._owner = owner
+    
+    @classmethod
+    def create(cls, demand: np.ndarray, dates: List[datetime], backend: str = 'shared_memory',
+               directory: Optional[str] = None) -> 'SharedDemand':
+        """
+        Copy a demand matrix into shared storage (parent process)
+        
+        Args:
+            demand: Demand matrix of shape (n_items, n_months); int64 or float64
+            dates: Date of each month
+            backend: 'shared_memory' or 'mmap'
+            directory: Directory of the .npy files (mmap backend)
+        
+        Returns:
+            SharedDemand owning the storage (call unlink() when done)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        demand = np.ascontiguousarray(demand)
+        months = np.array([date.year * 12 + date.month - 1 for date in dates], dtype=np.int64)
+        
+        if backend == 'mmap':
+            if directory is None:
+                raise ValueError("The mmap backend needs a directory")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"demand-{os.getpid()}-{id(demand):x}.npy")
+            np.save(path, demand)
+            handle = {'backend': 'mmap', 'path': path, 'months': months.tolist()}
+            shared = cls.attach(handle)
+            shared._owner = True
+            return shared
+        
+        from multiprocessing import shared_memory
+        
+        # One block: the month index followed by the demand matrix (both 8-byte types)
+        shm = shared_memory.SharedMemory(create=True, size=max(months.nbytes + demand.nbytes, 1))
+        handle = {'backend': 'shared_memory', 'name': shm.name, 'shape': demand.shape,
+                  'dtype': demand.dtype.str}
+        shared = cls._views(shm, handle)
+        shared.months[:] = months
+        shared.demand[:] = demand
+        shared._owner = True
+        return shared
+    
+    @classmethod
+    def _views(cls, shm, handle: Dict) -> 'SharedDemand':
+        n_items, n_months = handle['shape']
+        months = np.ndarray((n_months,), dtype=np.int64, buffer=shm.buf)
+        demand = np.ndarray((n_items, n_months), dtype=np.dtype(handle['dtype']), buffer=shm.buf,
+                            offset=months.nbytes)
+        return cls(demand, months, handle, shm=shm)
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, time_columns: List[str], date_mapping: Dict[str, datetime],
+                   backend: str = 'shared_memory', directory: Optional[str] = None) -> 'SharedDemand':
+        """Shared copy of the demand columns of a loader DataFrame"""
+        demand = df[time_columns].to_numpy()
+        if demand.dtype != np.int64:
+            demand = demand.astype(np.float64)
+        return cls.create(demand, [date_mapping[col] for col in time_columns], backend, directory)
+    
+    @classmethod
+    def attach(cls, handle: Dict) -> 'SharedDemand':
+        """
+        Open the storage described by a handle (worker process)
+        
+        Args:
+            handle: SharedDemand.handle of the parent
+        
+        Returns:
+            SharedDemand with read-only views
+        """
+        if handle['backend'] == 'mmap':
+            demand = np.load(handle['path'], mmap_mode='r')
+            return cls(demand, np.asarray(handle['months'], dtype=np.int64), handle)
+        
+        from multiprocessing import shared_memory
+        
+        # Spawned workers share the parent's resource tracker, so the block
+        # stays registered once and is freed by the parent's unlink()
+        shm = shared_memory.SharedMemory(name=handle['name'])
+        
+        shared = cls._views(shm, handle)
+        shared.demand.flags.writeable = False
+        shared.months.flags.writeable = False
+        return shared
+    
+    @property
+    def dates(self) -> List[datetime]:
+        return [datetime(int(month) // 12, int(month) % 12 + 1, 1) for month in self.months]
+    
+    @property
+    def time_columns(self) -> List[str]:
+        return [f"{date.year}-{calendar.month_name[date.month]}" for date in self.dates]
+    
+    def item_frame(self, start: int, stop: int, item_names: List, categories: List) -> pd.DataFrame:
+        """
+        Loader-style DataFrame of rows [start, stop)
+        
+        Args:
+            start: First row
+            stop: Row after the last
+            item_names: Name of each row in the range
+            categories: Category of each row in the range
+        
+        Returns:
+            DataFrame whose item_id holds the row position
+        """
+        df = pd.DataFrame(self.demand[start:stop], columns=self.time_columns)
+        df.insert(0, 'item_id', np.arange(start, min(stop, len(self.demand))))
+        df.insert(1, 'item_name', item_names)
+        df.insert(2, 'category', categories)
+        return df
+    
+    def close(self):
+        """Detach this process from the storage"""
+        if self._shm is not None:
+            # Views must go before the buffer can be released
+            self.demand = self.months = None
+            self._shm.close()
+            self._shm = None
+    
+    def unlink(self):
+        """Free the storage (creating process, after the workers are done)"""
+        shm = self._shm
+        self.close()
+        if self._owner:
+            if self.handle['backend'] == 'mmap':
+                self.demand = None
+                os.remove(self.handle['path'])
+            elif shm is not None:
+                shm.unlink()
+            self._owner = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
+
+# Worker-side attachments, one per handle per process
+_attached = {}
+
+def _forecast_rows(handle: Dict, model_path: str, model_kwargs: Dict, start: int, stop: int,
+                   item_names: List, categories: List, forecast_periods: int) -> Dict:
+    """
+    Worker: run a model's fit_and_forecast on rows [start, stop) of the shared matrix
+    
+    Names and categories are sent with the task because models use them as
+    features (Random Forest name length, XGBoost category code).
+    """
+    key = handle.get('name') or handle.get('path')
+    shared = _attached.get(key)
+    if shared is None:
+        shared = _attached[key] = SharedDemand.attach(handle)
+    
+    module_name, class_name = model_path.rsplit('.', 1)
+    model = getattr(importlib.import_module(module_name), class_name)(**model_kwargs)
+    model.time_columns = shared.time_columns
+    model.dates = shared.dates
+    model.date_mapping = dict(zip(model.time_columns, model.dates))
+    
+    results = model.fit_and_forecast(shared.item_frame(start, stop, item_names, categories), forecast_periods)
+    # Fitted model objects stay in the worker
+    return {section: values for section, values in results.items() if isinstance(values, dict)}
+
+def parallel_fit_and_forecast(model_path: str, df: pd.DataFrame, time_columns: List[str],
+                              date_mapping: Dict[str, datetime], model_kwargs: Optional[Dict] = None,
+                              forecast_periods: int = 12, chunk_size: Optional[int] = None,
+                              max_workers: Optional[int] = None, backend: str = 'shared_memory',
+                              directory: Optional[str] = None) -> Dict:
+    """
+    Run a per-item model over chunks of items in a process pool
+    
+    Each task carries the SharedDemand handle, a row range and the names and
+    categories of those rows; workers read the demand rows from the shared
+    matrix. Result sections keyed by item (item_forecasts, model_parameters,
+    ...) are merged in input order and mapped back to the item IDs of df.
+    
+    Args:
+        model_path: Model class, e.g. 'algorithms.classical.sarima.SARIMAForecasting'
+        df: DataFrame returned by the model's load_data
+        time_columns: Monthly columns in chronological order
+        date_mapping: Column -> date
+        model_kwargs: Constructor arguments of the model (must be picklable)
+        forecast_periods: Number of periods to forecast
+        chunk_size: Items per task (defaults to about four tasks per worker)
+        max_workers: Worker processes (defaults to the CPU count)
+        backend: 'shared_memory' or 'mmap'
+        directory: Directory of the .npy file (mmap backend)
+    
+    Returns:
+        Dictionary of result sections keyed by item ID, as fit_and_forecast
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    n_items = len(df)
+    chunk_size = chunk_size or max(1, -(-n_items // (4 * max_workers)))
+    ranges = [(start, min(start + chunk_size, n_items)) for start in range(0, n_items, chunk_size)]
+    
+    item_ids = df['item_id'].tolist()
+    item_names = df['item_name'].tolist()
+    categories = df['category'].tolist()
+    
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    with SharedDemand.from_frame(df, time_columns, date_mapping, backend, directory) as shared, \
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = [executor.submit(_forecast_rows, shared.handle, model_path, model_kwargs or {}, start, stop,
+                                   item_names[start:stop], categories[start:stop], forecast_periods)
+                   for start, stop in ranges]
+        
+        for future in futures:
+            for section, values in future.result().items():
+                merged = results.setdefault(section, {})
+                for position, value in values.items():
+                    merged[item_ids[position]] = value
+    
+    return results
@@ -0,0 +1,231 @@
+import os
+import json
+import queue
+import threading
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Per-item fitted state the models keep on the instance (models, scalers, ...)
+PER_ITEM_STATE = ['models', 'scalers', 'feature_scalers', 'imputers', 'training_history']
+
+def iter_item_results(model, df: pd.DataFrame, forecast_periods: int = 12, batch_size: int = 50,
+                      keep_models: bool = False) -> Iterator[Tuple[object, Dict, List[str]]]:
+    """
+    Run fit_and_forecast batch by batch and yield each item's results
+    
+    Only one batch of results is alive at a time, and unless keep_models is
+    set the model's per-item fitted state is dropped after every batch, so
+    memory does not grow with the number of items.
+    
+    Args:
+        model: Algorithm instance after load_data
+        df: DataFrame of the items to forecast
+        forecast_periods: Number of periods to forecast
+        batch_size: Items per fit_and_forecast call
+        keep_models: Keep fitted models and scalers on the model instance
+    
+    Yields:
+        (item_id, {section: value}, sections) for every row of df, in input
+        order. sections lists every per-item section of the batch, including
+        those the item has no entry in.
+    """
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        batch_results = model.fit_and_forecast(batch, forecast_periods=forecast_periods)
+        sections = [section for section, values in batch_results.items() if isinstance(values, dict)]
+        
+        for item_id in batch['item_id']:
+            yield item_id, {section: batch_results[section][item_id] for section in sections
+                            if item_id in batch_results[section]}, sections
+        
+        del batch_results
+        if not keep_models:
+            for name in PER_ITEM_STATE:
+                state = getattr(model, name, None)
+                if isinstance(state, dict):
+                    state.clear()
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.isoformat()
+    return str(value)
+
+class JSONLSink:
+    """Writes one JSON line per item: {"item_id": ..., <section>: <value>, ...}"""
+    
+    def __init__(self, path: str, sections: Optional[List[str]] = None):
+        """
+        Open the output file
+        
+        Args:
+            path: Output .jsonl path (overwritten)
+            sections: Result sections to write (all by default)
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.sections = sections
+        self.file = open(path, 'w')
+    
+    def write(self, item_id, item_results: Dict, sections: Optional[List[str]] = None):
+        record = {'item_id': item_id}
+        record.update({section: value for section, value in item_results.items()
+                       if self.sections is None or section in self.sections})
+        self.file.write(json.dumps(record, default=_json_default) + '\n')
+    
+    def close(self):
+        self.file.close()
+
+class SummaryCSVSink:
+    """
+    Appends summary rows to a CSV, a few hundred items at a time
+    
+    Rows come from a create_forecast_summary-style function applied to the
+    buffered items, so the file has the same columns as the algorithm's
+    in-memory summary.
+    """
+    
+    def __init__(self, path: str, summarize: Callable[[Dict], pd.DataFrame], buffer_items: int = 500):
+        """
+        Open the output file
+        
+        Args:
+            path: Output .csv path (overwritten)
+            summarize: Function from a results dictionary to a summary DataFrame
+                (e.g. the algorithm's create_forecast_summary)
+            buffer_items: Items collected before rows are written
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.summarize = summarize
+        self.buffer_items = buffer_items
+        self.buffer = {}
+        self.n_buffered = 0
+        self.header = True
+        open(path, 'w').close()
+    
+    def write(self, item_id, item_results: Dict, sections: Optional[List[str]] = None):
+        # Every section exists from the first flush on, even if no buffered item has an entry in it
+        for section in sections or []:
+            self.buffer.setdefault(section, {})
+        for section, value in item_results.items():
+            self.buffer.setdefault(section, {})[item_id] = value
+        self.n_buffered += 1
+        if self.n_buffered >= self.buffer_items:
+            self.flush()
+    
+    def flush(self):
+        if not self.n_buffered:
+            return
+        self.summarize(self.buffer).to_csv(self.path, mode='a', header=self.header, index=False)
+        self.header = False
+        # Sections are kept (emptied) so summaries that look up a section find it
+        self.buffer = {section: {} for section in self.buffer}
+        self.n_buffered = 0
+    
+    def close(self):
+        self.flush()
+
+class BackgroundWriter:
+    """
+    Runs a sink on a writer thread so serialization and disk I/O overlap the model fits
+    
+    The queue is bounded, so a slow sink makes the producer wait instead of
+    letting results pile up in memory. An error in the sink is raised in the
+    producer on the next write() or on close().
+    """
+    
+    _DONE = object()
+    
+    def __init__(self, sink, max_pending: int = 1000):
+        """
+        Start the writer thread
+        
+        Args:
+            sink: Object with write(item_id, item_results, sections) and close()
+            max_pending: Items queued before write() blocks
+        """
+        self.sink = sink
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name='forecast-writer', daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        while True:
+            entry = self.queue.get()
+            if entry is self._DONE:
+                break
+            if self.error is None:
+                try:
+                    self.sink.write(*entry)
+                except Exception as e:
+                    # Keep draining so the producer never blocks on a full queue
+                    self.error = e
+    
+    def write(self, item_id, item_results: Dict, sections: Optional[List[str]] = None):
+        if self.error is not None:
+            raise self.error
+        self.queue.put((item_id, item_results, sections))
+    
+    def close(self):
+        self.queue.put(self._DONE)
+        self.thread.join()
+        try:
+            self.sink.close()
+        finally:
+            if self.error is not None:
+                raise self.error
+
+def stream_forecasts(model, df: pd.DataFrame, sinks: List, forecast_periods: int = 12, batch_size: int = 50,
+                     background: bool = False, keep_models: bool = False) -> int:
+    """
+    Forecast every item and hand the results to sinks as they are produced
+    
+    Args:
+        model: Algorithm instance after load_data
+        df: DataFrame of the items to forecast
+        sinks: Objects with write(item_id, item_results, sections) and close()
+        forecast_periods: Number of periods to forecast
+        batch_size: Items per fit_and_forecast call
+        background: Write on a background thread per sink
+        keep_models: Keep fitted models and scalers on the model instance
+    
+    Returns:
+        Number of items written
+    """
+    writers = [BackgroundWriter(sink) if background else sink for sink in sinks]
+    n_items = 0
+    try:
+        for item_id, item_results, sections in iter_item_results(model, df, forecast_periods, batch_size,
+                                                                 keep_models):
+            for writer in writers:
+                writer.write(item_id, item_results, sections)
+            n_items += 1
+    except BaseException:
+        # The forecasting error is the one reported; the writers are still closed
+        _close_all(writers)
+        raise
+    
+    error = _close_all(writers)
+    if error is not None:
+        raise error
+    return n_items
+
+def _close_all(writers: List) -> Optional[Exception]:
+    """Close every writer, even after one fails, and return the first error"""
+    error = None
+    for writer in writers:
+        try:
+            writer.close()
+        except Exception as e:
+            error = error or e
+    return error
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+STATUSES = ['live', 'zero', 'short', 'dead']
+
+def activity_index(demand: np.ndarray) -> pd.DataFrame:
+    """
+    Activity statistics of every item in one pass over the demand matrix
+    
+    Args:
+        demand: Demand matrix of shape (n_items, n_months)
+    
+    Returns:
+        DataFrame with Total_Demand, Nonzero_Count, First_Demand_Month and
+        Last_Demand_Month (month positions, -1 without demand) and
+        Months_Since_Last_Sale (n_months without demand)
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    n_months = demand.shape[1]
+    
+    positive = demand > 0
+    has_demand = positive.any(axis=1)
+    first_month = np.where(has_demand, positive.argmax(axis=1), -1)
+    last_month = np.where(has_demand, n_months - 1 - positive[:, ::-1].argmax(axis=1), -1)
+    
+    return pd.DataFrame({
+        'Total_Demand': demand.sum(axis=1),
+        'Nonzero_Count': positive.sum(axis=1),
+        'First_Demand_Month': first_month,
+        'Last_Demand_Month': last_month,
+        'Months_Since_Last_Sale': np.where(has_demand, n_months - 1 - last_month, n_months)
+    })
+
+def triage_items(df: pd.DataFrame, time_columns: List[str], min_history: int = 0,
+                 dead_after: Optional[int] = None) -> pd.DataFrame:
+    """
+    Split items into live items and trivial ones that need no model
+    
+    An item is 'zero' when its total demand is 0, 'short' when the history
+    has fewer than min_history months (the per-item length checks of the
+    models), and 'dead' when dead_after is set and it has not sold for that
+    many months. Everything else is 'live'.
+    
+    Args:
+        df: DataFrame returned by an algorithm's load_data
+        time_columns: Monthly columns in chronological order
+        min_history: Months of history a model needs
+        dead_after: Months without a sale after which an item is dead (None to keep every item)
+    
+    Returns:
+        activity_index DataFrame indexed like df, with Item_ID and Status columns
+    """
+    demand = np.nan_to_num(df[time_columns].to_numpy(dtype=np.float64))
+    index = activity_index(demand)
+    index.index = df.index
+    index.insert(0, 'Item_ID', df['item_id'].to_numpy())
+    
+    status = np.full(len(index), 'live', dtype=object)
+    if dead_after is not None:
+        status[index['Months_Since_Last_Sale'].to_numpy() >= dead_after] = 'dead'
+    if len(time_columns) < min_history:
+        status[:] = 'short'
+    status[index['Total_Demand'].to_numpy() == 0] = 'zero'
+    index['Status'] = status
+    
+    return index
+
+def bulk_forecasts(df: pd.DataFrame, time_columns: List[str], triaged: pd.DataFrame, forecast_periods: int,
+                   template: Dict, levels: Optional[np.ndarray] = None) -> Dict:
+    """
+    Constant forecasts of every trivial item, in an algorithm's result format
+    
+    Args:
+        df: DataFrame returned by an algorithm's load_data
+        time_columns: Monthly columns in chronological order
+        triaged: Output of triage_items for df
+        forecast_periods: Number of periods to forecast
+        template: Algorithm-specific keys of a skipped item (list values are copied per item)
+        levels: Forecast level per row of df (zeros by default)
+    
+    Returns:
+        Dictionary of item_forecasts entries keyed by item ID
+    """
+    trivial = (triaged['Status'] != 'live').to_numpy()
+    history = df[time_columns].to_numpy()[trivial].tolist()
+    levels = np.zeros(len(df)) if levels is None else np.asarray(levels, dtype=np.float64)
+    
+    forecasts = {}
+    for item_id, item_name, category, demand, level in zip(df['item_id'].to_numpy()[trivial],
+                                                          df['item_name'].to_numpy()[trivial],
+                                                          df['category'].to_numpy()[trivial],
+                                                          history, levels[trivial]):
+        entry = {
+            'historical_demand': demand,
+            'monthly_forecasts': [level if level else 0] * forecast_periods,
+            'item_name': item_name,
+            'category': category
+        }
+        entry.update({key: list(value) if isinstance(value, list) else value for key, value in template.items()})
+        forecasts[item_id] = entry
+    
+    return forecasts
+
+def mean_positive_demand(df: pd.DataFrame, time_columns: List[str]) -> np.ndarray:
+    """Average non-zero demand of every item (0 without demand), the models' simple fallback level"""
+    demand = np.nan_to_num(df[time_columns].to_numpy(dtype=np.float64))
+    positive = demand > 0
+    count = positive.sum(axis=1)
+    return np.divide(np.where(positive, demand, 0.0).sum(axis=1), count, out=np.zeros(len(demand)), where=count > 0)
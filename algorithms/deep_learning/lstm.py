@@ -1,28 +1,26 @@
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Tuple, Dict, List, Optional
+from typing import Tuple, Dict, List, Optional, TYPE_CHECKING
 import openpyxl
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-# Deep Learning imports
-import tensorflow as tf
-from tensorflow.keras.models import Sequential, Model
-from tensorflow.keras.layers import (
-    LSTM, Dense, Dropout, BatchNormalization, 
-    Bidirectional, Attention, MultiHeadAttention,
-    Input, Concatenate, RepeatVector, TimeDistributed
-)
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau, ModelCheckpoint
-from tensorflow.keras.regularizers import l1_l2
 from sklearn.preprocessing import MinMaxScaler, RobustScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from algorithms.core.instrumentation import NullInstrumentation
+from algorithms.core.triage import triage_items, bulk_forecasts
+from algorithms.core.feature_store import default_feature_store
+from algorithms.ingestion.demand_cube import read_demand_data
 
 warnings.filterwarnings('ignore')
-tf.get_logger().setLevel('ERROR')
+
+# TensorFlow takes seconds to import, so Keras is only loaded when a model is built
+if TYPE_CHECKING:
+    from tensorflow.keras.models import Model
+
+def _load_tensorflow():
+    """Import TensorFlow on first use, with its logger quietened"""
+    import tensorflow as tf
+    tf.get_logger().setLevel('ERROR')
+    return tf
 
 class LSTMForecasting:
     """
@@ -42,7 +40,9 @@ class LSTMForecasting:
                  learning_rate: float = 0.001,
                  architecture: str = 'stacked',  # 'vanilla', 'stacked', 'bidirectional', 'attention'
                  use_attention: bool = True,
-                 ensemble_size: int = 5):
+                 ensemble_size: int = 5,
+                 instrumentation=None,
+                 feature_store=None):
         """
         Initialize LSTM forecasting model
         
@@ -56,6 +56,9 @@ class LSTMForecasting:
             architecture: LSTM architecture type
             use_attention: Whether to use attention mechanism
             ensemble_size: Number of models for ensemble
+            instrumentation: Optional Instrumentation collecting phase timings and counters
+            feature_store: Optional FeatureStore shared with other models (defaults to
+                the process-wide store)
         """
         self.sequence_length = sequence_length
         self.lstm_units = lstm_units
@@ -66,6 +69,8 @@ class LSTMForecasting:
         self.architecture = architecture
         self.use_attention = use_attention
         self.ensemble_size = ensemble_size
+        self.instrumentation = instrumentation or NullInstrumentation()
+        self.feature_store = feature_store or default_feature_store()
         
         self.models = {}
         self.scalers = {}
@@ -75,76 +80,17 @@ class LSTMForecasting:
         
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
-        Load spare parts data from Excel file
+        Load spare parts data from an Excel file or a demand cube
         
         Args:
-            file_path: Path to Excel file
+            file_path: Path to Excel file or DemandCube directory
             
         Returns:
             DataFrame with processed data
         """
         try:
-            # Read Excel file properly handling the structure
-            xl_file = pd.ExcelFile(file_path)
-            raw_data = pd.read_excel(xl_file, header=None)
-            
-            # Extract years and months
-            years = raw_data.iloc[0, 3:].values
-            months = raw_data.iloc[1, 3:].values
-            
-            # Create proper column names and date mapping
-            time_columns = []
-            date_mapping = {}
-            
-            for i, (year, month) in enumerate(zip(years, months)):
-                if pd.notna(year) and pd.notna(month) and month != 'Total':
-                    col_name = f"{int(year)}-{month}"
-                    time_columns.append(col_name)
-                    # Create actual date for time series
-                    month_num = {
-                        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-                        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-                        'September': 9, 'October': 10, 'November': 11, 'December': 12
-                    }[month]
-                    date_mapping[col_name] = datetime(int(year), month_num, 1)
-            
-            # Extract item information and data
-            items_data = []
-            for idx in range(2, len(raw_data)):
-                row = raw_data.iloc[idx]
-                if pd.notna(row.iloc[0]):  # If item ID exists
-                    item_info = {
-                        'item_id': row.iloc[0],
-                        'item_name': row.iloc[1],
-                        'category': row.iloc[2]
-                    }
-                    
-                    # Extract demand data (skip Total columns)
-                    demand_data = []
-                    col_idx = 3
-                    for year in [2021, 2022, 2023, 2024, 2025]:
-                        for month in ['January', 'February', 'March', 'April', 'May', 'June',
-                                    'July', 'August', 'September', 'October', 'November', 'December']:
-                            col_name = f"{year}-{month}"
-                            if col_idx < len(row) and col_name in time_columns:
-                                demand_data.append(row.iloc[col_idx] if pd.notna(row.iloc[col_idx]) else 0)
-                            col_idx += 1
-                        col_idx += 1  # Skip Total column
-                        if year == 2025:  # 2025 data is incomplete
-                            break
-            
-                    item_info['demand_data'] = demand_data[:len(time_columns)]
-                    items_data.append(item_info)
-            
-            # Create DataFrame with time series
-            df = pd.DataFrame(items_data)
-            
-            # Create time series columns
-            for i, col_name in enumerate(time_columns):
-                df[col_name] = df['demand_data'].apply(lambda x: x[i] if i < len(x) else 0)
-            
-            # Drop temporary column
-            df = df.drop('demand_data', axis=1)
+            # Stream the workbook (or read the persisted cube) into a demand array
+            df, time_columns, date_mapping = read_demand_data(file_path)
             
             # Store time information
             self.time_columns = time_columns
@@ -197,61 +143,44 @@ class LSTMForecasting:
         Returns:
             Feature array
         """
-        features_list = []
         dates = [self.date_mapping[col] for col in self.time_columns[:len(demand_series)]]
         
-        for i in range(len(demand_series)):
-            features = []
-            current_date = dates[i]
-            
-            # Time-based features
-            features.extend([
-                current_date.month / 12.0,  # Normalized month
-                (current_date.month - 1) // 3 / 4.0,  # Normalized quarter
-                np.sin(2 * np.pi * current_date.month / 12),  # Month sine
-                np.cos(2 * np.pi * current_date.month / 12),  # Month cosine
-            ])
-            
-            # Trend features
-            features.extend([
-                i / len(demand_series),  # Normalized time index
-                (i / len(demand_series)) ** 2,  # Quadratic trend
-            ])
-            
-            # Lag features (normalized)
-            max_val = np.max(demand_series) if np.max(demand_series) > 0 else 1
-            for lag in [1, 3, 6, 12]:
-                if i >= lag:
-                    features.append(demand_series[i - lag] / max_val)
-                else:
-                    features.append(0)
-            
-            # Rolling statistics (normalized)
-            for window in [3, 6]:
-                if i >= window - 1:
-                    window_data = demand_series[max(0, i - window + 1):i + 1]
-                    features.extend([
-                        np.mean(window_data) / max_val,
-                        np.std(window_data) / max_val,
-                    ])
-                else:
-                    features.extend([0, 0])
-            
-            # Intermittency features
-            if i > 0:
-                recent_data = demand_series[:i + 1]
-                features.extend([
-                    np.sum(recent_data > 0) / len(recent_data),  # Demand frequency
-                    (i - np.where(recent_data > 0)[0][-1] if np.sum(recent_data > 0) > 0 else i) / len(recent_data)  # Periods since last demand
-                ])
-            else:
-                features.extend([1 if demand_series[0] > 0 else 0, 0])
-            
-            features_list.append(features)
+        # Time, lag, rolling and intermittency features shared with the other
+        # models, computed once per item history
+        shared = self.feature_store.get(item_info.get('item_id'), demand_series, dates)
+        max_val = np.max(demand_series) if np.max(demand_series) > 0 else 1
+        time_index = shared['time_index']
+        
+        # Time-based features
+        columns = [
+            shared['month'] / 12.0,  # Normalized month
+            (shared['quarter'] - 1) / 4.0,  # Normalized quarter
+            shared['month_sin'],  # Month sine
+            shared['month_cos'],  # Month cosine
+        ]
+        
+        # Trend features
+        columns += [
+            time_index / len(demand_series),  # Normalized time index
+            (time_index / len(demand_series)) ** 2,  # Quadratic trend
+        ]
+        
+        # Lag features (normalized)
+        columns += [shared[f'lag_{lag}'] / max_val for lag in [1, 3, 6, 12]]
+        
+        # Rolling statistics (normalized)
+        for window in [3, 6]:
+            columns += [shared[f'rolling_mean_{window}'] / max_val, shared[f'rolling_std_{window}'] / max_val]
+        
+        # Intermittency features
+        columns += [
+            shared['demand_frequency'],  # Demand frequency
+            np.minimum(shared['periods_since_last_demand'], time_index) / (time_index + 1)  # Periods since last demand (i before any demand)
+        ]
         
-        return np.array(features_list)
+        return np.column_stack(columns)
     
-    def build_vanilla_lstm(self, input_shape: Tuple[int, int]) -> Model:
+    def build_vanilla_lstm(self, input_shape: Tuple[int, int]) -> 'Model':
         """
         Build vanilla LSTM model
         
@@ -261,6 +190,11 @@ class LSTMForecasting:
         Returns:
             Compiled LSTM model
         """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization
+        from tensorflow.keras.optimizers import Adam
+        from tensorflow.keras.regularizers import l1_l2
+        
         model = Sequential([
             LSTM(self.lstm_units[0], return_sequences=False, input_shape=input_shape),
             Dropout(self.dropout_rate),
@@ -278,7 +212,7 @@ class LSTMForecasting:
         
         return model
     
-    def build_stacked_lstm(self, input_shape: Tuple[int, int]) -> Model:
+    def build_stacked_lstm(self, input_shape: Tuple[int, int]) -> 'Model':
         """
         Build stacked LSTM model
         
@@ -288,6 +222,11 @@ class LSTMForecasting:
         Returns:
             Compiled stacked LSTM model
         """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization
+        from tensorflow.keras.optimizers import Adam
+        from tensorflow.keras.regularizers import l1_l2
+        
         model = Sequential()
         
         # First LSTM layer
@@ -321,7 +260,7 @@ class LSTMForecasting:
         
         return model
     
-    def build_bidirectional_lstm(self, input_shape: Tuple[int, int]) -> Model:
+    def build_bidirectional_lstm(self, input_shape: Tuple[int, int]) -> 'Model':
         """
         Build bidirectional LSTM model
         
@@ -331,6 +270,11 @@ class LSTMForecasting:
         Returns:
             Compiled bidirectional LSTM model
         """
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense, Dropout, BatchNormalization, Bidirectional
+        from tensorflow.keras.optimizers import Adam
+        from tensorflow.keras.regularizers import l1_l2
+        
         model = Sequential([
             Bidirectional(LSTM(self.lstm_units[0], return_sequences=True), input_shape=input_shape),
             Dropout(self.dropout_rate),
@@ -352,7 +296,7 @@ class LSTMForecasting:
         
         return model
     
-    def build_attention_lstm(self, input_shape: Tuple[int, int]) -> Model:
+    def build_attention_lstm(self, input_shape: Tuple[int, int]) -> 'Model':
         """
         Build LSTM model with attention mechanism
         
@@ -362,6 +306,14 @@ class LSTMForecasting:
         Returns:
             Compiled LSTM model with attention
         """
+        from tensorflow.keras.models import Model
+        from tensorflow.keras.layers import (
+            LSTM, Dense, Dropout, BatchNormalization,
+            Input, MultiHeadAttention, GlobalAveragePooling1D
+        )
+        from tensorflow.keras.optimizers import Adam
+        from tensorflow.keras.regularizers import l1_l2
+        
         # Input layer
         inputs = Input(shape=input_shape)
         
@@ -379,7 +331,7 @@ class LSTMForecasting:
         attention = Dropout(self.dropout_rate)(attention)
         
         # Global average pooling to reduce sequence dimension
-        pooled = tf.keras.layers.GlobalAveragePooling1D()(attention)
+        pooled = GlobalAveragePooling1D()(attention)
         
         # Dense layers
         dense1 = Dense(64, activation='relu', kernel_regularizer=l1_l2(0.01, 0.01))(pooled)
@@ -396,7 +348,7 @@ class LSTMForecasting:
         
         return model
     
-    def build_model(self, input_shape: Tuple[int, int]) -> Model:
+    def build_model(self, input_shape: Tuple[int, int]) -> 'Model':
         """
         Build LSTM model based on specified architecture
         
@@ -406,6 +358,8 @@ class LSTMForecasting:
         Returns:
             Compiled LSTM model
         """
+        _load_tensorflow()
+        
         if self.architecture == 'vanilla':
             return self.build_vanilla_lstm(input_shape)
         elif self.architecture == 'stacked':
@@ -427,6 +381,8 @@ class LSTMForecasting:
         Returns:
             List of Keras callbacks
         """
+        from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+        
         callbacks = [
             EarlyStopping(
                 monitor='val_loss',
@@ -446,7 +402,7 @@ class LSTMForecasting:
         return callbacks
     
     def train_ensemble(self, X_train: np.array, y_train: np.array, 
-                      X_val: np.array, y_val: np.array, item_id: str) -> List[Model]:
+                      X_val: np.array, y_val: np.array, item_id: str) -> List['Model']:
         """
         Train ensemble of LSTM models
         
@@ -494,7 +450,7 @@ class LSTMForecasting:
         
         return models
     
-    def predict_ensemble(self, models: List[Model], X: np.array) -> Tuple[np.array, np.array]:
+    def predict_ensemble(self, models: List['Model'], X: np.array) -> Tuple[np.array, np.array]:
         """
         Make ensemble predictions
         
@@ -517,7 +473,7 @@ class LSTMForecasting:
         
         return mean_pred, std_pred
     
-    def generate_forecasts(self, models: List[Model], last_sequence: np.array, 
+    def generate_forecasts(self, models: List['Model'], last_sequence: np.array, 
                           scaler: MinMaxScaler, forecast_periods: int = 12) -> Tuple[List[float], List[float]]:
         """
         Generate multi-step forecasts using ensemble
@@ -585,46 +541,45 @@ class LSTMForecasting:
         
         print(f"Starting LSTM forecasting with {self.architecture} architecture...")
         
-        for idx, row in df.iterrows():
+        # Zero-demand items and histories too short for sequences plus validation
+        # get their zero forecasts in one pass
+        triaged = triage_items(df, self.time_columns, min_history=self.sequence_length + 12)
+        results['item_forecasts'] = bulk_forecasts(df, self.time_columns, triaged, forecast_periods, {
+            'forecast_uncertainty': [0] * forecast_periods,
+            'model_fitted': False,
+            'insufficient_data': True
+        })
+        self.instrumentation.count('skipped', int((triaged['Status'] != 'live').sum()))
+        
+        for idx, row in df[triaged['Status'] == 'live'].iterrows():
             item_id = row['item_id']
+            self.instrumentation.begin_item(item_id)
             print(f"Processing item {idx + 1}/{len(df)}: {item_id}")
             
             # Extract demand series
             demand_series = np.array([row[col] for col in self.time_columns])
             
-            # Skip items with no demand or insufficient data
-            min_length = self.sequence_length + 12  # Need enough data for sequences + validation
-            if np.sum(demand_series) == 0 or len(demand_series) < min_length:
-                results['item_forecasts'][item_id] = {
-                    'historical_demand': demand_series.tolist(),
-                    'monthly_forecasts': [0] * forecast_periods,
-                    'forecast_uncertainty': [0] * forecast_periods,
-                    'item_name': row['item_name'],
-                    'category': row['category'],
-                    'model_fitted': False,
-                    'insufficient_data': True
-                }
-                continue
-            
             try:
                 # Create features
                 item_info = {
+                    'item_id': item_id,
                     'category': row['category'],
                     'item_name': row['item_name']
                 }
                 
-                features = self.create_lstm_features(demand_series, item_info)
-                
-                # Scale demand data
-                demand_scaler = MinMaxScaler(feature_range=(0, 1))
-                demand_scaled = demand_scaler.fit_transform(demand_series.reshape(-1, 1)).flatten()
-                
-                # Scale features
-                feature_scaler = MinMaxScaler(feature_range=(0, 1))
-                features_scaled = feature_scaler.fit_transform(features)
-                
-                # Create sequences
-                X, y = self.create_sequences(demand_scaled, features_scaled)
+                with self.instrumentation.phase('feature'):
+                    features = self.create_lstm_features(demand_series, item_info)
+                    
+                    # Scale demand data
+                    demand_scaler = MinMaxScaler(feature_range=(0, 1))
+                    demand_scaled = demand_scaler.fit_transform(demand_series.reshape(-1, 1)).flatten()
+                    
+                    # Scale features
+                    feature_scaler = MinMaxScaler(feature_range=(0, 1))
+                    features_scaled = feature_scaler.fit_transform(features)
+                    
+                    # Create sequences
+                    X, y = self.create_sequences(demand_scaled, features_scaled)
                 
                 if len(X) < 12:  # Need minimum sequences
                     raise ValueError("Insufficient sequences for training")
@@ -635,14 +590,17 @@ class LSTMForecasting:
                 y_train, y_val = y[:split_idx], y[split_idx:]
                 
                 # Train ensemble
-                models = self.train_ensemble(X_train, y_train, X_val, y_val, item_id)
+                with self.instrumentation.phase('fit'):
+                    models = self.train_ensemble(X_train, y_train, X_val, y_val, item_id)
+                    self.instrumentation.count('fits', len(models))
                 
                 # Store scalers
                 self.scalers[item_id] = demand_scaler
                 self.feature_scalers[item_id] = feature_scaler
                 
                 # Validation predictions
-                val_pred_mean, val_pred_std = self.predict_ensemble(models, X_val)
+                with self.instrumentation.phase('validation'):
+                    val_pred_mean, val_pred_std = self.predict_ensemble(models, X_val)
                 val_pred_denorm = demand_scaler.inverse_transform(val_pred_mean.reshape(-1, 1)).flatten()
                 val_actual_denorm = demand_scaler.inverse_transform(y_val.reshape(-1, 1)).flatten()
                 
@@ -668,9 +626,10 @@ class LSTMForecasting:
                 
                 # Generate forecasts
                 last_sequence = X[-1]  # Use last sequence for forecasting
-                forecasts, uncertainties = self.generate_forecasts(
-                    models, last_sequence, demand_scaler, forecast_periods
-                )
+                with self.instrumentation.phase('forecast'):
+                    forecasts, uncertainties = self.generate_forecasts(
+                        models, last_sequence, demand_scaler, forecast_periods
+                    )
                 
                 results['item_forecasts'][item_id] = {
                     'historical_demand': demand_series.tolist(),
@@ -692,6 +651,7 @@ class LSTMForecasting:
                 
             except Exception as e:
                 print(f"  LSTM modeling failed for {item_id}: {e}")
+                self.instrumentation.count('fallbacks')
                 
                 # Fallback to simple average
                 avg_demand = np.mean(demand_series[demand_series > 0]) if np.sum(demand_series > 0) > 0 else 0
@@ -706,6 +666,11 @@ class LSTMForecasting:
                     'insufficient_data': False
                 }
         
+        self.instrumentation.end_item()
+        
+        # Report items in input order
+        results['item_forecasts'] = {item_id: results['item_forecasts'][item_id] for item_id in df['item_id']}
+        
         print(f"Completed LSTM forecasting for {len(results['item_forecasts'])} items")
         return results
     
@@ -753,6 +718,8 @@ class LSTMForecasting:
             results: Results dictionary from fit_and_forecast
             top_n: Number of top items to analyze
         """
+        import matplotlib.pyplot as plt
+        
         # Get top items by historical demand
         item_totals = {item_id: sum(data['historical_demand']) 
                       for item_id, data in results['item_forecasts'].items()}
@@ -891,6 +858,8 @@ class LSTMForecasting:
             results: Results dictionary
             item_id: Item to analyze
         """
+        import matplotlib.pyplot as plt
+        
         if item_id not in self.training_history:
             print(f"No training history available for {item_id}")
             return
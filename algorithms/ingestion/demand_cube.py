@@ -0,0 +1,281 @@
+import os
+import json
+import calendar
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from algorithms.ingestion.excel_reader import ITEM_COLUMNS, MONTH_NUMBERS, read_demand_workbook
+
+MANIFEST_FILE = 'cube.json'
+ITEMS_FILE = 'items.jsonl'
+BASE_FILE = 'base.npy'
+MONTHS_DIRECTORY = 'months'
+
+def month_key(date: datetime) -> str:
+    """Cube key of a month ('2025-07')"""
+    return f"{date.year:04d}-{date.month:02d}"
+
+def next_month(key: str) -> str:
+    year, month = map(int, key.split('-'))
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+
+def parse_time_column(column: str) -> datetime:
+    """Date of a loader time column ('2025-July')"""
+    year, month = column.split('-', 1)
+    return datetime(int(year), MONTH_NUMBERS[month.strip()], 1)
+
+def _json_value(value):
+    # numpy scalars from the workbook reader are not JSON serializable
+    return value.item() if isinstance(value, np.generic) else value
+
+class DemandCube:
+    """
+    Persisted demand matrix (items x months) that grows one month at a time
+    
+    The cube is a directory:
+    - cube.json: the month keys in order and how many are in the base matrix
+    - items.jsonl: one line per item (ID, name, category), append-only
+    - base.npy: compacted matrix of the first months
+    - months/<YYYY-MM>.npy: one demand vector per later month, as long as
+      the item axis was when the month arrived
+    
+    Appending a month writes one vector and the new item lines, so a refresh
+    costs proportionally to the new data. Items that appear later have zero
+    demand in the earlier months. compact() folds the month files into the
+    base matrix.
+    """
+    
+    def __init__(self, directory: str):
+        """
+        Open (or create) a cube directory
+        
+        Args:
+            directory: Cube directory
+        """
+        self.directory = directory
+        os.makedirs(os.path.join(directory, MONTHS_DIRECTORY), exist_ok=True)
+        
+        manifest_path = os.path.join(directory, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        else:
+            manifest = {'version': 1, 'months': [], 'base_months': 0}
+        self.months = manifest['months']
+        self.base_months = manifest['base_months']
+        
+        self.items = []
+        items_path = os.path.join(directory, ITEMS_FILE)
+        if os.path.exists(items_path):
+            with open(items_path, 'r') as f:
+                self.items = [json.loads(line) for line in f if line.strip()]
+        self.positions = {item[0]: position for position, item in enumerate(self.items)}
+    
+    @staticmethod
+    def is_cube(path: str) -> bool:
+        """Whether path is a cube directory"""
+        return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST_FILE))
+    
+    @property
+    def n_items(self) -> int:
+        return len(self.items)
+    
+    def _month_path(self, key: str) -> str:
+        return os.path.join(self.directory, MONTHS_DIRECTORY, f"{key}.npy")
+    
+    def _write_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'version': 1, 'months': self.months, 'base_months': self.base_months}, f)
+        os.replace(temp_path, path)
+    
+    def _save_array(self, path: str, values: np.ndarray):
+        # Write then rename so a reader never sees a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.save(f, values)
+        os.replace(temp_path, path)
+    
+    def _add_items(self, item_ids: Sequence, item_names: Sequence, categories: Sequence) -> np.ndarray:
+        """Positions of item_ids on the item axis, appending unknown items"""
+        positions = np.empty(len(item_ids), dtype=np.int64)
+        new_lines = []
+        for index, (item_id, item_name, category) in enumerate(zip(item_ids, item_names, categories)):
+            item_id = _json_value(item_id)
+            position = self.positions.get(item_id)
+            if position is None:
+                position = len(self.items)
+                item = [item_id, _json_value(item_name), _json_value(category)]
+                self.items.append(item)
+                self.positions[item_id] = position
+                new_lines.append(json.dumps(item))
+            positions[index] = position
+        
+        if new_lines:
+            with open(os.path.join(self.directory, ITEMS_FILE), 'a') as f:
+                f.write('\n'.join(new_lines) + '\n')
+        
+        return positions
+    
+    def append_month(self, month: datetime, item_ids: Sequence, values: Sequence,
+                     item_names: Optional[Sequence] = None, categories: Optional[Sequence] = None) -> str:
+        """
+        Append (or correct) one month of demand
+        
+        Rows with the same item ID are summed; items missing from the month
+        have zero demand in it.
+        
+        Args:
+            month: Any date in the month
+            item_ids: Items with demand data for the month
+            values: Demand of each item
+            item_names: Item names, used for items new to the cube
+            categories: Item categories, used for items new to the cube
+        
+        Returns:
+            Month key that was written
+        """
+        key = month_key(month)
+        if self.months and key not in self.months and key != next_month(self.months[-1]):
+            raise ValueError(f"Month {key} does not follow the last cube month {self.months[-1]}")
+        if key in self.months[:self.base_months]:
+            raise ValueError(f"Month {key} is in the compacted base; rebuild the cube to correct it")
+        
+        item_names = item_names if item_names is not None else [None] * len(item_ids)
+        categories = categories if categories is not None else [None] * len(item_ids)
+        positions = self._add_items(item_ids, item_names, categories)
+        
+        vector = np.zeros(self.n_items)
+        np.add.at(vector, positions, np.nan_to_num(np.asarray(values, dtype=np.float64)))
+        self._save_array(self._month_path(key), vector)
+        
+        if key not in self.months:
+            self.months.append(key)
+            self._write_manifest()
+        
+        return key
+    
+    def append_frame(self, df: pd.DataFrame, time_columns: List[str],
+                     date_mapping: Optional[Dict[str, datetime]] = None) -> List[str]:
+        """
+        Append every month of a loader DataFrame (a delta workbook or CSV)
+        
+        Months already in the cube are replaced by the new values, so a
+        re-exported last month corrects the cube.
+        
+        Args:
+            df: DataFrame with item_id, item_name, category and month columns
+            time_columns: Monthly columns in chronological order
+            date_mapping: Column -> date (parsed from the column names when omitted)
+        
+        Returns:
+            Month keys that were written
+        """
+        written = []
+        for column in time_columns:
+            date = date_mapping[column] if date_mapping else parse_time_column(column)
+            written.append(self.append_month(date, df['item_id'].to_numpy(), df[column].to_numpy(),
+                                             df['item_name'].to_numpy(), df['category'].to_numpy()))
+        return written
+    
+    def append_workbook(self, file_path: str, sheet_name: str = None) -> List[str]:
+        """Append the months of a workbook in the sales layout"""
+        df, time_columns, date_mapping = read_demand_workbook(file_path, sheet_name)
+        return self.append_frame(df, time_columns, date_mapping)
+    
+    def append_csv(self, file_path: str) -> List[str]:
+        """Append the months of a CSV with item_id, item_name, category and '2025-July' style columns"""
+        df = pd.read_csv(file_path, dtype={'item_id': str})
+        for column in ITEM_COLUMNS:
+            if column not in df.columns:
+                df[column] = None
+        time_columns = sorted((column for column in df.columns if column not in ITEM_COLUMNS),
+                              key=parse_time_column)
+        return self.append_frame(df, time_columns)
+    
+    def demand_matrix(self) -> np.ndarray:
+        """Full demand matrix of shape (n_items, n_months)"""
+        demand = np.zeros((self.n_items, len(self.months)))
+        if self.base_months:
+            base = np.load(os.path.join(self.directory, BASE_FILE))
+            demand[:len(base), :self.base_months] = base
+        
+        for month_index in range(self.base_months, len(self.months)):
+            vector = np.load(self._month_path(self.months[month_index]))
+            demand[:len(vector), month_index] = vector
+        
+        return demand
+    
+    def compact(self):
+        """Fold the month files into the base matrix"""
+        demand = self.demand_matrix()
+        self._save_array(os.path.join(self.directory, BASE_FILE), demand)
+        folded = self.months[self.base_months:]
+        self.base_months = len(self.months)
+        self._write_manifest()
+        
+        for key in folded:
+            os.remove(self._month_path(key))
+    
+    def to_frame(self) -> Tuple[pd.DataFrame, List[str], Dict[str, datetime]]:
+        """
+        The cube in the layout of read_demand_workbook
+        
+        Returns:
+            Tuple of (DataFrame with item_id, item_name, category and one column
+            per month, time column names, date mapping)
+        """
+        dates = [datetime(*map(int, key.split('-')), 1) for key in self.months]
+        time_columns = [f"{date.year}-{calendar.month_name[date.month]}" for date in dates]
+        date_mapping = dict(zip(time_columns, dates))
+        
+        demand = self.demand_matrix()
+        if np.array_equal(demand, np.round(demand)):
+            demand = demand.astype(np.int64)
+        
+        df = pd.DataFrame(demand, columns=time_columns, copy=False)
+        for position, column in enumerate(ITEM_COLUMNS):
+            df.insert(position, column, [item[position] for item in self.items])
+        
+        return df, time_columns, date_mapping
+
+def read_demand_data(path: str) -> Tuple[pd.DataFrame, List[str], Dict[str, datetime]]:
+    """
+    Read demand history from a cube directory or a sales workbook
+    
+    Args:
+        path: DemandCube directory or Excel file
+    
+    Returns:
+        Tuple of (DataFrame, time column names, date mapping) as read_demand_workbook
+    """
+    if DemandCube.is_cube(path):
+        return DemandCube(path).to_frame()
+    return read_demand_workbook(path)
+
+def main():
+    """Create or extend a demand cube from workbooks and CSV files"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Append monthly demand to a demand cube")
+    parser.add_argument('cube', help="Cube directory (created if missing)")
+    parser.add_argument('files', nargs='+', help="Workbooks (.xlsx) or CSV files, in chronological order")
+    parser.add_argument('--compact', action='store_true', help="Fold the month files into the base matrix")
+    args = parser.parse_args()
+    
+    cube = DemandCube(args.cube)
+    for file_path in args.files:
+        months = cube.append_csv(file_path) if file_path.lower().endswith('.csv') else cube.append_workbook(file_path)
+        print(f"{file_path}: {len(months)} months appended ({months[0]} to {months[-1]})" if months else
+              f"{file_path}: no months found")
+    
+    if args.compact:
+        cube.compact()
+    
+    print(f"Cube {args.cube}: {cube.n_items} items x {len(cube.months)} months")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+MONTH_NUMBERS = {
+    'January': 1, 'February': 2, 'March': 3, 'April': 4,
+    'May': 5, 'June': 6, 'July': 7, 'August': 8,
+    'September': 9, 'October': 10, 'November': 11, 'December': 12
+}
+
+ITEM_COLUMNS = ['item_id', 'item_name', 'category']
+
+def parse_header(year_row: tuple, month_row: tuple) -> Tuple[List[int], List[str], Dict[str, datetime]]:
+    """
+    Locate the monthly columns from the two header rows
+    
+    Years may be written in every cell or only in the first cell of a merged
+    range, so the year row is forward-filled. Columns whose month row is not
+    a month name (Total, GRAND TOTAL) are skipped.
+    
+    Args:
+        year_row: Values of the first row
+        month_row: Values of the second row
+    
+    Returns:
+        Tuple of (sheet column positions, time column names, date mapping)
+    """
+    positions = []
+    time_columns = []
+    date_mapping = {}
+    
+    year = None
+    for position in range(len(ITEM_COLUMNS), len(month_row)):
+        year_value = year_row[position] if position < len(year_row) else None
+        if year_value is not None and str(year_value).strip():
+            year = int(float(year_value))
+        
+        month = month_row[position]
+        month = month.strip() if isinstance(month, str) else month
+        if year is None or month not in MONTH_NUMBERS:
+            continue
+        
+        col_name = f"{year}-{month}"
+        positions.append(position)
+        time_columns.append(col_name)
+        date_mapping[col_name] = datetime(year, MONTH_NUMBERS[month], 1)
+    
+    return positions, time_columns, date_mapping
+
+def _openpyxl_rows(file_path: str, sheet_name: str = None) -> Iterator[tuple]:
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        yield from sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _calamine_rows(file_path: str, sheet_name: str = None) -> Iterator[tuple]:
+    from python_calamine import CalamineWorkbook
+    
+    workbook = CalamineWorkbook.from_path(file_path)
+    sheet = workbook.get_sheet_by_name(sheet_name) if sheet_name else workbook.get_sheet_by_index(0)
+    
+    for row in sheet.iter_rows():
+        # calamine returns '' for blank cells and floats for all numbers
+        yield tuple(None if value == '' else
+                    int(value) if isinstance(value, float) and value.is_integer() else value
+                    for value in row)
+
+def default_engine() -> str:
+    """Fastest installed xlsx engine ('calamine' when python-calamine is available)"""
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine'
+    except ImportError:
+        return 'openpyxl'
+
+def workbook_sheet_names(file_path: str, engine: str = None) -> List[str]:
+    """Worksheet names of a workbook, in workbook order"""
+    engine = engine or default_engine()
+    if engine == 'calamine':
+        from python_calamine import CalamineWorkbook
+        
+        return list(CalamineWorkbook.from_path(file_path).sheet_names)
+    
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+def read_demand_workbook(file_path: str, sheet_name: str = None,
+                         engine: str = None) -> Tuple[pd.DataFrame, List[str], Dict[str, datetime]]:
+    """
+    Read the sales workbook in one streaming pass
+    
+    Rows are streamed (openpyxl read-only mode, or the faster calamine
+    engine when python-calamine is installed) and written straight into a
+    preallocated array, so peak memory is about one copy of the demand data
+    instead of the intermediate per-item lists and DataFrames. Blank demand
+    cells are read as 0 and rows without an item ID are skipped, as in the
+    original loaders. (calamine parses the sheet natively before yielding
+    rows; use engine='openpyxl' for the tightest memory bound.)
+    
+    Args:
+        file_path: Path to the Excel file
+        sheet_name: Worksheet to read (defaults to the first sheet)
+        engine: 'openpyxl' or 'calamine' (defaults to the fastest installed)
+    
+    Returns:
+        Tuple of (DataFrame with item_id, item_name, category and one column
+        per month, time column names, date mapping)
+    """
+    engine = engine or default_engine()
+    if engine not in ('openpyxl', 'calamine'):
+        raise ValueError(f"Unknown xlsx engine: {engine}")
+    
+    rows = _calamine_rows(file_path, sheet_name) if engine == 'calamine' else _openpyxl_rows(file_path, sheet_name)
+    try:
+        year_row = next(rows, ())
+        month_row = next(rows, ())
+        positions, time_columns, date_mapping = parse_header(year_row, month_row)
+        n_months = len(time_columns)
+        
+        # Buffers start small and double, so the sheet is never counted first
+        capacity = 1024
+        demand = np.zeros((capacity, n_months), dtype=np.float64)
+        item_columns = {column: [] for column in ITEM_COLUMNS}
+        integral = True
+        
+        n_items = 0
+        for row in rows:
+            if not row or row[0] is None:
+                continue
+            
+            if n_items == capacity:
+                capacity *= 2
+                demand = np.resize(demand, (capacity, n_months))
+                demand[n_items:] = 0
+            
+            for position, column in enumerate(ITEM_COLUMNS):
+                item_columns[column].append(row[position] if position < len(row) else None)
+            
+            values = demand[n_items]
+            for month_idx, position in enumerate(positions):
+                value = row[position] if position < len(row) else None
+                if value is not None and value != '':
+                    values[month_idx] = value
+                    if integral and not isinstance(value, int):
+                        integral = float(value).is_integer()
+            
+            n_items += 1
+    finally:
+        rows.close()
+    
+    demand = demand[:n_items]
+    if integral:
+        # Same dtype pd.read_excel gives for all-integer columns
+        demand = demand.astype(np.int64)
+    
+    df = pd.DataFrame(demand, columns=time_columns, copy=False)
+    for position, column in enumerate(ITEM_COLUMNS):
+        df.insert(position, column, item_columns[column])
+    
+    return df, time_columns, date_mapping
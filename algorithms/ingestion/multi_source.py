@@ -0,0 +1,212 @@
+import os
+import calendar
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from algorithms.ingestion.excel_reader import ITEM_COLUMNS, read_demand_workbook, workbook_sheet_names
+
+def item_key(item_id) -> str:
+    """Alignment key of an item ID (workbooks mix 1001 and '1001 ')"""
+    if isinstance(item_id, float) and item_id.is_integer():
+        item_id = int(item_id)
+    return str(item_id).strip()
+
+def list_sources(paths: Sequence[str], sheets: Union[str, Sequence[str], None] = None,
+                 engine: str = None) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Workbook sheets to load, with a location label for each
+    
+    Args:
+        paths: Workbook paths (one per branch or warehouse)
+        sheets: None for the first sheet of each workbook, 'all' for every
+            sheet, or a list of sheet names to read from each workbook
+        engine: xlsx engine used to list sheet names
+    
+    Returns:
+        List of (path, sheet name or None, location label). The label is the
+        file name, or file/sheet when a workbook contributes several sheets.
+    """
+    sources = []
+    for file_path in paths:
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        if sheets is None:
+            sources.append((file_path, None, stem))
+            continue
+        
+        sheet_names = workbook_sheet_names(file_path, engine) if sheets == 'all' else list(sheets)
+        for sheet_name in sheet_names:
+            label = stem if len(sheet_names) == 1 else f"{stem}/{sheet_name}"
+            sources.append((file_path, sheet_name, label))
+    
+    labels = [label for _, _, label in sources]
+    if len(set(labels)) != len(labels):
+        raise ValueError("Sources must have distinct file/sheet names")
+    return sources
+
+def _read_source(file_path: str, sheet_name: Optional[str], engine: str = None) -> Dict:
+    """Worker: one sheet as plain arrays (cheap to send back to the parent)"""
+    df, time_columns, date_mapping = read_demand_workbook(file_path, sheet_name, engine)
+    return {
+        'item_columns': {column: df[column].tolist() for column in ITEM_COLUMNS},
+        'demand': df[time_columns].to_numpy(dtype=np.float64),
+        'dates': [date_mapping[column] for column in time_columns]
+    }
+
+class LocationDemand:
+    """
+    Demand tensor of shape (n_items, n_locations, n_months) merged from many sources
+    
+    Items are aligned on item_key() across sources (first-seen name and
+    category win) and months on their dates, so sources may cover different
+    items and periods; anything a source does not report is 0. Rows that
+    repeat an item ID within one sheet are summed.
+    """
+    
+    def __init__(self, item_ids: List, item_names: List, categories: List, locations: List[str],
+                 dates: List[datetime], demand: np.ndarray):
+        self.item_ids = item_ids
+        self.item_names = item_names
+        self.categories = categories
+        self.locations = locations
+        self.dates = dates
+        self.demand = demand
+    
+    @classmethod
+    def merge(cls, locations: List[str], sources: List[Dict]) -> 'LocationDemand':
+        """
+        Align the output of _read_source for every location
+        
+        Args:
+            locations: Location label of each source
+            sources: Arrays read from each source
+        
+        Returns:
+            LocationDemand over the union of items and months
+        """
+        dates = sorted({date for source in sources for date in source['dates']})
+        month_positions = {date: position for position, date in enumerate(dates)}
+        
+        positions = {}
+        item_columns = {column: [] for column in ITEM_COLUMNS}
+        source_rows = []
+        for source in sources:
+            rows = np.empty(len(source['item_columns']['item_id']), dtype=np.int64)
+            for row, values in enumerate(zip(*(source['item_columns'][column] for column in ITEM_COLUMNS))):
+                key = item_key(values[0])
+                position = positions.get(key)
+                if position is None:
+                    position = positions[key] = len(positions)
+                    for column, value in zip(ITEM_COLUMNS, values):
+                        item_columns[column].append(value)
+                rows[row] = position
+            source_rows.append(rows)
+        
+        demand = np.zeros((len(positions), len(locations), len(dates)))
+        for location, (source, rows) in enumerate(zip(sources, source_rows)):
+            months = np.array([month_positions[date] for date in source['dates']], dtype=np.int64)
+            target = demand[:, location, :]
+            if len(np.unique(rows)) == len(rows):
+                target[rows[:, None], months[None, :]] = source['demand']
+            else:
+                np.add.at(target, (rows[:, None], months[None, :]), source['demand'])
+        
+        return cls(item_columns['item_id'], item_columns['item_name'], item_columns['category'],
+                   list(locations), dates, demand)
+    
+    @property
+    def time_columns(self) -> List[str]:
+        return [f"{date.year}-{calendar.month_name[date.month]}" for date in self.dates]
+    
+    def location_totals(self) -> pd.DataFrame:
+        """Total demand and item count of every location"""
+        return pd.DataFrame({
+            'Location': self.locations,
+            'Total_Demand': self.demand.sum(axis=(0, 2)),
+            'Items_With_Demand': (self.demand.sum(axis=2) > 0).sum(axis=0)
+        })
+    
+    def to_frame(self, locations: Optional[Sequence[str]] = None) -> Tuple[pd.DataFrame, List[str], Dict[str, datetime]]:
+        """
+        Demand summed over locations, in the layout of read_demand_workbook
+        
+        Args:
+            locations: Locations to include (all by default)
+        
+        Returns:
+            Tuple of (DataFrame, time column names, date mapping) as read_demand_workbook
+        """
+        selected = (slice(None) if locations is None else
+                    [self.locations.index(location) for location in locations])
+        demand = self.demand[:, selected, :].sum(axis=1)
+        if np.array_equal(demand, np.round(demand)):
+            demand = demand.astype(np.int64)
+        
+        time_columns = self.time_columns
+        df = pd.DataFrame(demand, columns=time_columns, copy=False)
+        for position, (column, values) in enumerate(zip(ITEM_COLUMNS, [self.item_ids, self.item_names, self.categories])):
+            df.insert(position, column, values)
+        
+        return df, time_columns, dict(zip(time_columns, self.dates))
+
+def load_sources(paths: Sequence[str], sheets: Union[str, Sequence[str], None] = None,
+                 max_workers: Optional[int] = None, engine: str = None) -> LocationDemand:
+    """
+    Read many branch workbooks (and sheets) concurrently into one tensor
+    
+    Each sheet is parsed in its own worker process, so the wall time is
+    about that of the slowest workbook instead of the sum over branches.
+    
+    Args:
+        paths: Workbook paths (one per branch or warehouse)
+        sheets: None for the first sheet, 'all' for every sheet, or sheet names (see list_sources)
+        max_workers: Worker processes (defaults to one per source, capped at the CPU count; 1 reads in-process)
+        engine: xlsx engine ('openpyxl' or 'calamine', defaults to the fastest installed)
+    
+    Returns:
+        LocationDemand with one location per source
+    """
+    sources = list_sources(paths, sheets, engine)
+    if max_workers is None:
+        max_workers = max(1, min(len(sources), os.cpu_count() or 1))
+    
+    if max_workers == 1 or len(sources) == 1:
+        arrays = [_read_source(file_path, sheet_name, engine) for file_path, sheet_name, _ in sources]
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [executor.submit(_read_source, file_path, sheet_name, engine)
+                       for file_path, sheet_name, _ in sources]
+            arrays = [future.result() for future in futures]
+    
+    location_demand = LocationDemand.merge([label for _, _, label in sources], arrays)
+    print(f"Loaded {len(sources)} sources: {len(location_demand.item_ids)} items x "
+          f"{len(location_demand.locations)} locations x {len(location_demand.dates)} months")
+    return location_demand
+
+def main():
+    """Merge branch workbooks and report (or store) the combined demand"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Load branch workbooks into one item x location x month tensor")
+    parser.add_argument('files', nargs='+', help="Branch workbooks (.xlsx)")
+    parser.add_argument('--all-sheets', action='store_true', help="Read every sheet instead of the first")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    parser.add_argument('--cube', help="Append the demand summed over locations to this DemandCube directory")
+    args = parser.parse_args()
+    
+    location_demand = load_sources(args.files, 'all' if args.all_sheets else None, args.workers)
+    print(location_demand.location_totals().to_string(index=False))
+    
+    if args.cube:
+        from algorithms.ingestion.demand_cube import DemandCube
+        
+        df, time_columns, date_mapping = location_demand.to_frame()
+        months = DemandCube(args.cube).append_frame(df, time_columns, date_mapping)
+        print(f"Appended {len(months)} months to {args.cube}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import calendar
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from algorithms.ingestion.excel_reader import ITEM_COLUMNS
+
+DEFAULT_COLUMNS = {
+    'date': 'date',
+    'item': 'item_id',
+    'quantity': 'quantity',
+    'branch': 'branch',
+    'item_name': 'item_name',
+    'category': 'category'
+}
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+def month_index(dates, date_format: Optional[str] = None) -> np.ndarray:
+    """
+    Months since 1970-01 of every date (-1 for missing or unparseable dates)
+    
+    Invoice dates repeat heavily, so each distinct value is parsed once and
+    the result is broadcast back to the lines.
+    
+    Args:
+        dates: Date column (strings or datetimes)
+        date_format: strptime format of string dates (inferred when None)
+    
+    Returns:
+        int64 array with one month index per date
+    """
+    codes, uniques = pd.factorize(dates, sort=False)
+    parsed = pd.to_datetime(pd.Series(uniques), format=date_format, errors='coerce').to_numpy(dtype='datetime64[ns]')
+    months = parsed.astype('datetime64[M]').astype(np.int64)
+    months[np.isnat(parsed)] = -1
+    
+    # Missing dates have code -1
+    return np.append(months, -1)[codes]
+
+def month_date(index: int) -> datetime:
+    return datetime(1970 + index // 12, index % 12 + 1, 1)
+
+class MonthlyAccumulator:
+    """
+    Item x month demand totals built up chunk by chunk
+    
+    Item codes and month keys are small integers, so each chunk is added
+    with one bincount over item_code * n_months + month_offset. The totals
+    matrix grows (by doubling) as new items and months appear, so memory is
+    bounded by the size of the result, not by the number of rows read.
+    """
+    
+    def __init__(self):
+        self.item_codes = {}
+        self.item_ids = []
+        self.item_names = []
+        self.categories = []
+        self.first_month = None
+        self.last_month = None
+        self.totals = np.zeros((0, 0))
+        self.rows = 0
+    
+    @property
+    def n_items(self) -> int:
+        return len(self.item_ids)
+    
+    @property
+    def n_months(self) -> int:
+        return 0 if self.first_month is None else self.last_month - self.first_month + 1
+    
+    def _encode_items(self, items: pd.Series, item_names: Optional[pd.Series],
+                      categories: Optional[pd.Series]) -> np.ndarray:
+        """Global item code of every row, registering unseen items"""
+        local_codes, uniques = pd.factorize(items, sort=False)
+        
+        # First line of each distinct item (reversed assignment keeps the earliest)
+        first_rows = np.empty(len(uniques), dtype=np.int64)
+        first_rows[local_codes[::-1]] = np.arange(len(local_codes))[::-1]
+        
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for local_code, (item_id, row) in enumerate(zip(uniques, first_rows)):
+            code = self.item_codes.get(item_id)
+            if code is None:
+                code = len(self.item_ids)
+                self.item_codes[item_id] = code
+                self.item_ids.append(item_id)
+                self.item_names.append(item_names.iat[row] if item_names is not None else None)
+                self.categories.append(categories.iat[row] if categories is not None else None)
+            mapping[local_code] = code
+        
+        return mapping[local_codes]
+    
+    def _reserve(self, n_items: int, first_month: int, last_month: int):
+        """Grow the totals matrix to cover n_items and the month range"""
+        if self.first_month is None:
+            self.first_month, self.last_month = first_month, last_month
+        shift = max(self.first_month - first_month, 0)
+        self.first_month = min(self.first_month, first_month)
+        self.last_month = max(self.last_month, last_month)
+        
+        rows, columns = self.totals.shape
+        if n_items <= rows and self.n_months <= columns and not shift:
+            return
+        
+        grown = np.zeros((max(n_items, 2 * rows) if n_items > rows else rows, max(self.n_months, columns + shift)))
+        grown[:rows, shift:shift + columns] = self.totals
+        self.totals = grown
+    
+    def add(self, items: pd.Series, months: np.ndarray, quantities: pd.Series,
+            item_names: Optional[pd.Series] = None, categories: Optional[pd.Series] = None):
+        """
+        Add one chunk of transaction lines
+        
+        Args:
+            items: Item ID of every line
+            months: Month index of every line (month_index), -1 to skip the line
+            quantities: Quantity of every line (missing quantities count as 0)
+            item_names: Item names, kept from the first line of each item
+            categories: Item categories, kept from the first line of each item
+        """
+        valid = (months >= 0) & items.notna().to_numpy()
+        if not valid.all():
+            items, months, quantities = items[valid], months[valid], quantities[valid]
+            item_names = item_names[valid] if item_names is not None else None
+            categories = categories[valid] if categories is not None else None
+        self.rows += len(months)
+        if not len(months):
+            return
+        
+        codes = self._encode_items(items.reset_index(drop=True),
+                                   item_names.reset_index(drop=True) if item_names is not None else None,
+                                   categories.reset_index(drop=True) if categories is not None else None)
+        self._reserve(self.n_items, int(months.min()), int(months.max()))
+        
+        width = self.totals.shape[1]
+        flat = codes * width + (months - self.first_month)
+        weights = np.nan_to_num(pd.to_numeric(quantities, errors='coerce').to_numpy(dtype=np.float64))
+        
+        # Only the block of rows this chunk touches is counted
+        low = int(codes.min()) * width
+        high = (int(codes.max()) + 1) * width
+        block = np.bincount(flat - low, weights=weights, minlength=high - low)
+        self.totals.reshape(-1)[low:high] += block
+    
+    def demand_matrix(self) -> np.ndarray:
+        """Totals of shape (n_items, n_months), months from the first to the last seen"""
+        return self.totals[:self.n_items, :self.n_months]
+    
+    def to_frame(self, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None) -> Tuple[pd.DataFrame, List[str], Dict[str, datetime]]:
+        """
+        Totals in the layout of read_demand_workbook
+        
+        Args:
+            start: First month of the output (defaults to the first month seen)
+            end: Last month of the output (defaults to the last month seen)
+        
+        Returns:
+            Tuple of (DataFrame with item_id, item_name, category and one column
+            per month, time column names, date mapping)
+        """
+        first = self.first_month if self.first_month is not None else 0
+        start_index = start.year * 12 + start.month - 1 - 1970 * 12 if start else first
+        end_index = end.year * 12 + end.month - 1 - 1970 * 12 if end else first + self.n_months - 1
+        
+        demand = np.zeros((self.n_items, max(end_index - start_index + 1, 0)))
+        low, high = max(start_index, first), min(end_index, first + self.n_months - 1)
+        if high >= low:
+            demand[:, low - start_index:high - start_index + 1] = self.demand_matrix()[:, low - first:high - first + 1]
+        if np.array_equal(demand, np.round(demand)):
+            demand = demand.astype(np.int64)
+        
+        dates = [month_date(index) for index in range(start_index, end_index + 1)]
+        time_columns = [f"{date.year}-{calendar.month_name[date.month]}" for date in dates]
+        date_mapping = dict(zip(time_columns, dates))
+        
+        df = pd.DataFrame(demand, columns=time_columns, copy=False)
+        for position, (column, values) in enumerate(zip(ITEM_COLUMNS, [self.item_ids, self.item_names, self.categories])):
+            df.insert(position, column, values)
+        
+        return df, time_columns, date_mapping
+
+def _read_chunks(file_path: str, columns: List[str], text_columns: List[str],
+                 chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if file_path.lower().endswith(('.parquet', '.pq')):
+        import pyarrow.parquet as pq
+        
+        parquet_file = pq.ParquetFile(file_path)
+        available = [column for column in columns if column in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=available):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(file_path, usecols=lambda column: column in columns,
+                               dtype={column: str for column in text_columns},
+                               chunksize=chunk_rows)
+
+def aggregate_transactions(paths, columns: Optional[Dict[str, str]] = None,
+                           branches: Optional[Sequence] = None, date_format: Optional[str] = None,
+                           chunk_rows: int = DEFAULT_CHUNK_ROWS, start: Optional[datetime] = None,
+                           end: Optional[datetime] = None) -> Tuple[pd.DataFrame, List[str], Dict[str, datetime]]:
+    """
+    Aggregate invoice lines (CSV or Parquet) to monthly demand per item
+    
+    Files are read in chunks of chunk_rows lines, so memory depends on the
+    chunk size and the item x month result, not on the number of lines.
+    
+    Args:
+        paths: Transaction file or list of files (.csv, .parquet)
+        columns: Role -> column name overrides for 'date', 'item', 'quantity',
+            'branch', 'item_name' and 'category' (see DEFAULT_COLUMNS)
+        branches: Keep only lines of these branches (all branches when None)
+        date_format: strptime format of the date column (inferred when None)
+        chunk_rows: Lines per chunk
+        start: First month of the output (defaults to the first month with sales)
+        end: Last month of the output (defaults to the last month with sales)
+    
+    Returns:
+        Tuple of (DataFrame, time column names, date mapping) as read_demand_workbook
+    """
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    wanted = [columns[role] for role in DEFAULT_COLUMNS]
+    text_columns = [columns[role] for role in DEFAULT_COLUMNS if role != 'quantity']
+    branch_filter = set(map(str, branches)) if branches is not None else None
+    
+    accumulator = MonthlyAccumulator()
+    for file_path in paths:
+        for chunk in _read_chunks(file_path, wanted, text_columns, chunk_rows):
+            if branch_filter is not None:
+                chunk = chunk[chunk[columns['branch']].astype(str).isin(branch_filter)]
+            
+            months = month_index(chunk[columns['date']], date_format)
+            accumulator.add(chunk[columns['item']], months, chunk[columns['quantity']],
+                            chunk.get(columns['item_name']), chunk.get(columns['category']))
+    
+    print(f"Aggregated {accumulator.rows:,} transaction lines into {accumulator.n_items} items "
+          f"x {accumulator.n_months} months")
+    return accumulator.to_frame(start, end)
+
+def main():
+    """Aggregate transaction files into a demand cube or a monthly CSV"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Aggregate sales transactions to monthly item demand")
+    parser.add_argument('files', nargs='+', help="Transaction files (.csv or .parquet)")
+    parser.add_argument('--cube', help="Append the months to this DemandCube directory")
+    parser.add_argument('--output', help="Write the monthly demand to this CSV")
+    parser.add_argument('--branch', action='append', help="Keep only this branch (repeatable)")
+    parser.add_argument('--date-format', help="strptime format of the date column")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="Lines per chunk")
+    args = parser.parse_args()
+    
+    df, time_columns, date_mapping = aggregate_transactions(args.files, branches=args.branch,
+                                                            date_format=args.date_format,
+                                                            chunk_rows=args.chunk_rows)
+    if args.cube:
+        from algorithms.ingestion.demand_cube import DemandCube
+        
+        months = DemandCube(args.cube).append_frame(df, time_columns, date_mapping)
+        print(f"Appended {len(months)} months to {args.cube}")
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"Monthly demand written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,19 @@ import numpy as np
 import warnings
 from typing import Tuple, Dict, List, Optional
 import openpyxl
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.impute import SimpleImputer  # Added for NaN handling
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from sklearn.inspection import permutation_importance
-import optuna
 from scipy import stats
 from joblib import Parallel, delayed
 import itertools
+from algorithms.core.instrumentation import NullInstrumentation
+from algorithms.core.triage import triage_items, bulk_forecasts
+from algorithms.core.feature_store import default_feature_store
+from algorithms.ingestion.demand_cube import read_demand_data
 
 warnings.filterwarnings('ignore')
 
@@ -37,7 +37,9 @@ class RandomForestForecasting:
                  bootstrap: bool = True,
                  n_jobs: int = -1,
                  optimize_hyperparams: bool = True,
-                 forecast_strategy: str = 'recursive'):
+                 forecast_strategy: str = 'recursive',
+                 instrumentation=None,
+                 feature_store=None):
         """
         Initialize Random Forest forecasting model
         
@@ -51,6 +53,9 @@ class RandomForestForecasting:
             n_jobs: Number of parallel jobs
             optimize_hyperparams: Whether to optimize hyperparameters
             forecast_strategy: 'recursive' or 'direct' forecasting
+            instrumentation: Optional Instrumentation collecting phase timings and counters
+            feature_store: Optional FeatureStore shared with other models (defaults to
+                the process-wide store)
         """
         self.n_estimators = n_estimators
         self.max_depth = max_depth
@@ -61,6 +66,8 @@ class RandomForestForecasting:
         self.n_jobs = n_jobs
         self.optimize_hyperparams = optimize_hyperparams
         self.forecast_strategy = forecast_strategy
+        self.instrumentation = instrumentation or NullInstrumentation()
+        self.feature_store = feature_store or default_feature_store()
         
         self.models = {}
         self.scalers = {}
@@ -71,76 +78,17 @@ class RandomForestForecasting:
         
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
-        Load spare parts data from Excel file
+        Load spare parts data from an Excel file or a demand cube
         
         Args:
-            file_path: Path to Excel file
+            file_path: Path to Excel file or DemandCube directory
             
         Returns:
             DataFrame with processed data
         """
         try:
-            # Read Excel file properly handling the structure
-            xl_file = pd.ExcelFile(file_path)
-            raw_data = pd.read_excel(xl_file, header=None)
-            
-            # Extract years and months
-            years = raw_data.iloc[0, 3:].values
-            months = raw_data.iloc[1, 3:].values
-            
-            # Create proper column names and date mapping
-            time_columns = []
-            date_mapping = {}
-            
-            for i, (year, month) in enumerate(zip(years, months)):
-                if pd.notna(year) and pd.notna(month) and month != 'Total':
-                    col_name = f"{int(year)}-{month}"
-                    time_columns.append(col_name)
-                    # Create actual date for time series
-                    month_num = {
-                        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-                        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-                        'September': 9, 'October': 10, 'November': 11, 'December': 12
-                    }[month]
-                    date_mapping[col_name] = datetime(int(year), month_num, 1)
-            
-            # Extract item information and data
-            items_data = []
-            for idx in range(2, len(raw_data)):
-                row = raw_data.iloc[idx]
-                if pd.notna(row.iloc[0]):  # If item ID exists
-                    item_info = {
-                        'item_id': row.iloc[0],
-                        'item_name': row.iloc[1],
-                        'category': row.iloc[2]
-                    }
-                    
-                    # Extract demand data (skip Total columns)
-                    demand_data = []
-                    col_idx = 3
-                    for year in [2021, 2022, 2023, 2024, 2025]:
-                        for month in ['January', 'February', 'March', 'April', 'May', 'June',
-                                    'July', 'August', 'September', 'October', 'November', 'December']:
-                            col_name = f"{year}-{month}"
-                            if col_idx < len(row) and col_name in time_columns:
-                                demand_data.append(row.iloc[col_idx] if pd.notna(row.iloc[col_idx]) else 0)
-                            col_idx += 1
-                        col_idx += 1  # Skip Total column
-                        if year == 2025:  # 2025 data is incomplete
-                            break
-            
-                    item_info['demand_data'] = demand_data[:len(time_columns)]
-                    items_data.append(item_info)
-            
-            # Create DataFrame with time series
-            df = pd.DataFrame(items_data)
-            
-            # Create time series columns
-            for i, col_name in enumerate(time_columns):
-                df[col_name] = df['demand_data'].apply(lambda x: x[i] if i < len(x) else 0)
-            
-            # Drop temporary column
-            df = df.drop('demand_data', axis=1)
+            # Stream the workbook (or read the persisted cube) into a demand array
+            df, time_columns, date_mapping = read_demand_data(file_path)
             
             # Store time information
             self.time_columns = time_columns
@@ -168,38 +116,40 @@ class RandomForestForecasting:
         features_list = []
         dates = [self.date_mapping[col] for col in self.time_columns[:len(demand_series)]]
         
+        # Time, lag, rolling, smoothing and intermittency features shared with
+        # the other models, computed once per item history
+        shared = self.feature_store.get(item_info.get('item_id'), demand_series, dates)
+        alpha_values = [0.1, 0.3, 0.5, 0.7]
+        
         for i in range(len(demand_series)):
             features = {}
             current_date = dates[i]
             
             # === Time-based features ===
-            features['month'] = current_date.month
-            features['quarter'] = (current_date.month - 1) // 3 + 1
-            features['year'] = current_date.year
+            features['month'] = shared['month'][i]
+            features['quarter'] = shared['quarter'][i]
+            features['year'] = shared['year'][i]
             features['day_of_year'] = current_date.timetuple().tm_yday
             features['week_of_year'] = current_date.isocalendar()[1]
             
             # Cyclical time features
-            features['month_sin'] = np.sin(2 * np.pi * current_date.month / 12)
-            features['month_cos'] = np.cos(2 * np.pi * current_date.month / 12)
-            features['quarter_sin'] = np.sin(2 * np.pi * features['quarter'] / 4)
-            features['quarter_cos'] = np.cos(2 * np.pi * features['quarter'] / 4)
+            features['month_sin'] = shared['month_sin'][i]
+            features['month_cos'] = shared['month_cos'][i]
+            features['quarter_sin'] = shared['quarter_sin'][i]
+            features['quarter_cos'] = shared['quarter_cos'][i]
             features['day_of_year_sin'] = np.sin(2 * np.pi * features['day_of_year'] / 365)
             features['day_of_year_cos'] = np.cos(2 * np.pi * features['day_of_year'] / 365)
             
             # Time index features
-            features['time_index'] = i
-            features['time_index_squared'] = i ** 2
+            features['time_index'] = shared['time_index'][i]
+            features['time_index_squared'] = shared['time_index_squared'][i]
             features['time_index_log'] = np.log(i + 1)
             features['time_index_sqrt'] = np.sqrt(i)
             
             # === Lag features ===
             lag_periods = [1, 2, 3, 6, 12, 18, 24]
             for lag in lag_periods:
-                if i >= lag:
-                    features[f'lag_{lag}'] = demand_series[i - lag]
-                else:
-                    features[f'lag_{lag}'] = 0
+                features[f'lag_{lag}'] = shared[f'lag_{lag}'][i]
             
             # === Rolling window features ===
             window_sizes = [3, 6, 12, 24]
@@ -209,12 +159,12 @@ class RandomForestForecasting:
                     window_data = demand_series[max(0, i - window + 1):i + 1]
                     
                     # Basic statistics with safe calculations
-                    features[f'rolling_mean_{window}'] = np.mean(window_data) if len(window_data) > 0 else 0
-                    features[f'rolling_std_{window}'] = np.std(window_data) if len(window_data) > 1 else 0
+                    features[f'rolling_mean_{window}'] = shared[f'rolling_mean_{window}'][i]
+                    features[f'rolling_std_{window}'] = shared[f'rolling_std_{window}'][i]
                     features[f'rolling_median_{window}'] = np.median(window_data) if len(window_data) > 0 else 0
-                    features[f'rolling_max_{window}'] = np.max(window_data) if len(window_data) > 0 else 0
-                    features[f'rolling_min_{window}'] = np.min(window_data) if len(window_data) > 0 else 0
-                    features[f'rolling_sum_{window}'] = np.sum(window_data) if len(window_data) > 0 else 0
+                    features[f'rolling_max_{window}'] = shared[f'rolling_max_{window}'][i]
+                    features[f'rolling_min_{window}'] = shared[f'rolling_min_{window}'][i]
+                    features[f'rolling_sum_{window}'] = shared[f'rolling_sum_{window}'][i]
                     features[f'rolling_range_{window}'] = (np.max(window_data) - np.min(window_data)) if len(window_data) > 0 else 0
                     
                     # Advanced statistics with error handling
@@ -254,33 +204,21 @@ class RandomForestForecasting:
                         features[feat] = 0
             
             # === Exponential smoothing features ===
-            alpha_values = [0.1, 0.3, 0.5, 0.7]
             for alpha in alpha_values:
-                if i > 0:
-                    exp_smooth = demand_series[0]
-                    for j in range(1, i + 1):
-                        exp_smooth = alpha * demand_series[j] + (1 - alpha) * exp_smooth
-                    features[f'exp_smooth_{int(alpha*10)}'] = exp_smooth
-                else:
-                    features[f'exp_smooth_{int(alpha*10)}'] = demand_series[0] if len(demand_series) > 0 else 0
+                features[f'exp_smooth_{int(alpha*10)}'] = shared[f'exp_smooth_{int(alpha*10)}'][i]
             
             # === Intermittency and demand pattern features ===
             if i > 0:
                 recent_data = demand_series[:i + 1]
                 
                 # Demand frequency and patterns
-                features['demand_frequency'] = np.sum(recent_data > 0) / len(recent_data) if len(recent_data) > 0 else 0
-                positive_data = recent_data[recent_data > 0]
-                features['avg_demand_when_positive'] = np.mean(positive_data) if len(positive_data) > 0 else 0
+                features['demand_frequency'] = shared['demand_frequency'][i]
+                features['avg_demand_when_positive'] = shared['avg_demand_when_positive'][i]
                 features['max_demand_so_far'] = np.max(recent_data)
                 features['min_demand_so_far'] = np.min(recent_data)
                 
                 # Periods since/until demand
-                features['periods_since_last_demand'] = 0
-                for j in range(i, -1, -1):
-                    if demand_series[j] > 0:
-                        break
-                    features['periods_since_last_demand'] += 1
+                features['periods_since_last_demand'] = shared['periods_since_last_demand'][i]
                 
                 # Demand variability with safe calculations
                 if len(recent_data) > 1:
@@ -305,11 +243,11 @@ class RandomForestForecasting:
                     
             else:
                 # Initialize for first period
-                features['demand_frequency'] = 1 if demand_series[0] > 0 else 0
-                features['avg_demand_when_positive'] = demand_series[0] if demand_series[0] > 0 else 0
+                features['demand_frequency'] = shared['demand_frequency'][0]
+                features['avg_demand_when_positive'] = shared['avg_demand_when_positive'][0]
                 features['max_demand_so_far'] = demand_series[0]
                 features['min_demand_so_far'] = demand_series[0]
-                features['periods_since_last_demand'] = 0 if demand_series[0] > 0 else 1
+                features['periods_since_last_demand'] = shared['periods_since_last_demand'][0]
                 features['cv'] = 0
                 features['demand_volatility'] = 0
                 features['demand_concentration'] = 0
@@ -377,6 +315,8 @@ class RandomForestForecasting:
         Returns:
             Best hyperparameters
         """
+        import optuna
+        
         def objective(trial):
             params = {
                 'n_estimators': trial.suggest_int('n_estimators', 50, 300),
@@ -507,39 +447,39 @@ class RandomForestForecasting:
         
         print("Starting Random Forest forecasting...")
         
-        for idx, row in df.iterrows():
+        # Zero-demand and too-short items get their zero forecasts in one pass
+        triaged = triage_items(df, self.time_columns, min_history=18)
+        results['item_forecasts'] = bulk_forecasts(df, self.time_columns, triaged, forecast_periods, {
+            'forecast_uncertainty': [0] * forecast_periods,
+            'model_fitted': False,
+            'insufficient_data': True
+        })
+        self.instrumentation.count('skipped', int((triaged['Status'] != 'live').sum()))
+        
+        for idx, row in df[triaged['Status'] == 'live'].iterrows():
             item_id = row['item_id']
+            self.instrumentation.begin_item(item_id)
             print(f"Processing item {idx + 1}/{len(df)}: {item_id}")
             
             # Extract demand series
             demand_series = np.array([row[col] for col in self.time_columns])
             
-            # Skip items with no demand or insufficient data
-            if np.sum(demand_series) == 0 or len(demand_series) < 18:  # Need at least 18 months
-                results['item_forecasts'][item_id] = {
-                    'historical_demand': demand_series.tolist(),
-                    'monthly_forecasts': [0] * forecast_periods,
-                    'forecast_uncertainty': [0] * forecast_periods,
-                    'item_name': row['item_name'],
-                    'category': row['category'],
-                    'model_fitted': False,
-                    'insufficient_data': True
-                }
-                continue
-            
             # Create features
             item_info = {
+                'item_id': item_id,
                 'category': row['category'],
                 'item_name': row['item_name']
             }
             
-            feature_df = self.create_comprehensive_features(demand_series, item_info)
+            with self.instrumentation.phase('feature'):
+                feature_df = self.create_comprehensive_features(demand_series, item_info)
             
             # Prepare training data (use 80% for training, 20% for validation)
             split_point = int(len(feature_df) * 0.8)
             
             if split_point < 12:  # Need minimum data for training
                 # Use simple average for items with insufficient data
+                self.instrumentation.count('fallbacks')
                 avg_demand = np.mean(demand_series[demand_series > 0]) if np.sum(demand_series > 0) > 0 else 0
                 
                 results['item_forecasts'][item_id] = {
@@ -563,60 +503,64 @@ class RandomForestForecasting:
             y_val = val_features['target']
             
             # Handle NaN values with imputation first
-            imputer = SimpleImputer(strategy='constant', fill_value=0)
-            X_train_imputed = pd.DataFrame(
-                imputer.fit_transform(X_train),
-                columns=X_train.columns,
-                index=X_train.index
-            )
-            X_val_imputed = pd.DataFrame(
-                imputer.transform(X_val),
-                columns=X_val.columns,
-                index=X_val.index
-            )
-            
-            # Scale features using RobustScaler (better for outliers)
-            scaler = RobustScaler()
-            X_train_scaled = pd.DataFrame(
-                scaler.fit_transform(X_train_imputed),
-                columns=X_train_imputed.columns,
-                index=X_train_imputed.index
-            )
-            X_val_scaled = pd.DataFrame(
-                scaler.transform(X_val_imputed),
-                columns=X_val_imputed.columns,
-                index=X_val_imputed.index
-            )
-            
-            # Final safety check for any remaining NaN values
-            X_train_scaled = X_train_scaled.fillna(0)
-            X_val_scaled = X_val_scaled.fillna(0)
+            with self.instrumentation.phase('feature'):
+                imputer = SimpleImputer(strategy='constant', fill_value=0)
+                X_train_imputed = pd.DataFrame(
+                    imputer.fit_transform(X_train),
+                    columns=X_train.columns,
+                    index=X_train.index
+                )
+                X_val_imputed = pd.DataFrame(
+                    imputer.transform(X_val),
+                    columns=X_val.columns,
+                    index=X_val.index
+                )
+                
+                # Scale features using RobustScaler (better for outliers)
+                scaler = RobustScaler()
+                X_train_scaled = pd.DataFrame(
+                    scaler.fit_transform(X_train_imputed),
+                    columns=X_train_imputed.columns,
+                    index=X_train_imputed.index
+                )
+                X_val_scaled = pd.DataFrame(
+                    scaler.transform(X_val_imputed),
+                    columns=X_val_imputed.columns,
+                    index=X_val_imputed.index
+                )
+                
+                # Final safety check for any remaining NaN values
+                X_train_scaled = X_train_scaled.fillna(0)
+                X_val_scaled = X_val_scaled.fillna(0)
             
             # Optimize hyperparameters for first few items, then use best params
-            if self.optimize_hyperparams and idx < 3:
-                print(f"  Optimizing hyperparameters for {item_id}...")
-                best_params = self.optimize_hyperparameters(X_train_scaled, y_train, item_id)
-                self.best_params = best_params
-            elif hasattr(self, 'best_params'):
-                best_params = self.best_params
-            else:
-                best_params = {
-                    'n_estimators': self.n_estimators,
-                    'max_depth': self.max_depth,
-                    'min_samples_split': self.min_samples_split,
-                    'min_samples_leaf': self.min_samples_leaf,
-                    'max_features': self.max_features,
-                    'bootstrap': self.bootstrap
-                }
+            with self.instrumentation.phase('selection'):
+                if self.optimize_hyperparams and idx < 3:
+                    print(f"  Optimizing hyperparameters for {item_id}...")
+                    best_params = self.optimize_hyperparameters(X_train_scaled, y_train, item_id)
+                    self.best_params = best_params
+                elif hasattr(self, 'best_params'):
+                    best_params = self.best_params
+                else:
+                    best_params = {
+                        'n_estimators': self.n_estimators,
+                        'max_depth': self.max_depth,
+                        'min_samples_split': self.min_samples_split,
+                        'min_samples_leaf': self.min_samples_leaf,
+                        'max_features': self.max_features,
+                        'bootstrap': self.bootstrap
+                    }
             
             # Train Random Forest model
-            model = RandomForestRegressor(
-                **best_params,
-                random_state=42,
-                n_jobs=1  # Use single job to avoid nested parallelization
-            )
-            
-            model.fit(X_train_scaled, y_train)
+            with self.instrumentation.phase('fit'):
+                model = RandomForestRegressor(
+                    **best_params,
+                    random_state=42,
+                    n_jobs=1  # Use single job to avoid nested parallelization
+                )
+                
+                model.fit(X_train_scaled, y_train)
+                self.instrumentation.count('fits')
             
             # Store model, scaler, and imputer
             self.models[item_id] = model
@@ -624,8 +568,9 @@ class RandomForestForecasting:
             self.imputers[item_id] = imputer
             
             # Validation predictions
-            val_pred = model.predict(X_val_scaled)
-            val_pred = np.maximum(val_pred, 0)  # Ensure non-negative
+            with self.instrumentation.phase('validation'):
+                val_pred = model.predict(X_val_scaled)
+                val_pred = np.maximum(val_pred, 0)  # Ensure non-negative
             
             # Calculate accuracy metrics
             mae = mean_absolute_error(y_val, val_pred)
@@ -652,9 +597,10 @@ class RandomForestForecasting:
             
             # Generate forecasts using ensemble approach
             X_last = X_train_scaled.iloc[-1:].copy()
-            forecasts, uncertainties = self.create_ensemble_forecast(
-                model, X_last, forecast_periods, demand_series
-            )
+            with self.instrumentation.phase('forecast'):
+                forecasts, uncertainties = self.create_ensemble_forecast(
+                    model, X_last, forecast_periods, demand_series
+                )
             
             results['item_forecasts'][item_id] = {
                 'historical_demand': demand_series.tolist(),
@@ -674,6 +620,11 @@ class RandomForestForecasting:
                 'uncertainty_trend': np.polyfit(range(len(uncertainties)), uncertainties, 1)[0] if len(uncertainties) > 1 else 0
             }
         
+        self.instrumentation.end_item()
+        
+        # Report items in input order
+        results['item_forecasts'] = {item_id: results['item_forecasts'][item_id] for item_id in df['item_id']}
+        
         print(f"Completed Random Forest forecasting for {len(results['item_forecasts'])} items")
         return results
     
@@ -720,6 +671,8 @@ class RandomForestForecasting:
             results: Results dictionary from fit_and_forecast
             top_n: Number of top items to analyze
         """
+        import matplotlib.pyplot as plt
+        
         # Get top items by historical demand
         item_totals = {item_id: sum(data['historical_demand']) 
                       for item_id, data in results['item_forecasts'].items()}
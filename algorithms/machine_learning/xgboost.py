@@ -3,18 +3,29 @@ import numpy as np
 import warnings
 from typing import Tuple, Dict, List, Optional
 import openpyxl
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
+from datetime import timedelta
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import xgboost as xgb
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-import optuna
 from scipy import stats
+from algorithms.core.instrumentation import NullInstrumentation
+from algorithms.core.triage import triage_items, bulk_forecasts, mean_positive_demand
+from algorithms.core import kernels
+from algorithms.core.feature_store import default_feature_store
+from algorithms.ingestion.demand_cube import read_demand_data
 
 warnings.filterwarnings('ignore')
 
+# Features taken from the shared feature store, in model column order
+SHARED_FEATURES = (
+    ['month', 'quarter', 'year', 'month_sin', 'month_cos', 'quarter_sin', 'quarter_cos',
+     'time_index', 'time_index_squared'] +
+    [f'lag_{lag}' for lag in [1, 2, 3, 6, 12]] +
+    [f'rolling_{stat}_{window}' for window in [3, 6, 12] for stat in ['mean', 'std', 'max', 'min', 'sum']] +
+    ['exp_smooth_3', 'demand_frequency', 'avg_demand_when_positive', 'periods_since_last_demand']
+)
+
 class XGBoostForecasting:
     """
     XGBoost-based forecasting for intermittent spare parts demand
@@ -28,7 +39,9 @@ class XGBoostForecasting:
                  n_estimators: int = 100,
                  max_depth: int = 6,
                  learning_rate: float = 0.1,
-                 optimize_hyperparams: bool = True):
+                 optimize_hyperparams: bool = True,
+                 instrumentation=None,
+                 feature_store=None):
         """
         Initialize XGBoost forecasting model
         
@@ -37,11 +50,16 @@ class XGBoostForecasting:
             max_depth: Maximum tree depth
             learning_rate: Learning rate
             optimize_hyperparams: Whether to optimize hyperparameters
+            instrumentation: Optional Instrumentation collecting phase timings and counters
+            feature_store: Optional FeatureStore shared with other models (defaults to
+                the process-wide store)
         """
         self.n_estimators = n_estimators
         self.max_depth = max_depth
         self.learning_rate = learning_rate
         self.optimize_hyperparams = optimize_hyperparams
+        self.instrumentation = instrumentation or NullInstrumentation()
+        self.feature_store = feature_store or default_feature_store()
         
         self.models = {}
         self.scalers = {}
@@ -50,76 +68,17 @@ class XGBoostForecasting:
         
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
-        Load spare parts data from Excel file
+        Load spare parts data from an Excel file or a demand cube
         
         Args:
-            file_path: Path to Excel file
+            file_path: Path to Excel file or DemandCube directory
             
         Returns:
             DataFrame with processed data
         """
         try:
-            # Read Excel file properly handling the structure
-            xl_file = pd.ExcelFile(file_path)
-            raw_data = pd.read_excel(xl_file, header=None)
-            
-            # Extract years and months
-            years = raw_data.iloc[0, 3:].values
-            months = raw_data.iloc[1, 3:].values
-            
-            # Create proper column names
-            time_columns = []
-            date_mapping = {}
-            
-            for i, (year, month) in enumerate(zip(years, months)):
-                if pd.notna(year) and pd.notna(month) and month != 'Total':
-                    col_name = f"{int(year)}-{month}"
-                    time_columns.append(col_name)
-                    # Create actual date for better processing
-                    month_num = {
-                        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-                        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-                        'September': 9, 'October': 10, 'November': 11, 'December': 12
-                    }[month]
-                    date_mapping[col_name] = datetime(int(year), month_num, 1)
-            
-            # Extract item information and data
-            items_data = []
-            for idx in range(2, len(raw_data)):
-                row = raw_data.iloc[idx]
-                if pd.notna(row.iloc[0]):  # If item ID exists
-                    item_info = {
-                        'item_id': row.iloc[0],
-                        'item_name': row.iloc[1],
-                        'category': row.iloc[2]
-                    }
-                    
-                    # Extract demand data (skip Total columns)
-                    demand_data = []
-                    col_idx = 3
-                    for year in [2021, 2022, 2023, 2024, 2025]:
-                        for month in ['January', 'February', 'March', 'April', 'May', 'June',
-                                    'July', 'August', 'September', 'October', 'November', 'December']:
-                            col_name = f"{year}-{month}"
-                            if col_idx < len(row) and col_name in time_columns:
-                                demand_data.append(row.iloc[col_idx] if pd.notna(row.iloc[col_idx]) else 0)
-                            col_idx += 1
-                        col_idx += 1  # Skip Total column
-                        if year == 2025:  # 2025 data is incomplete
-                            break
-            
-                    item_info['demand_data'] = demand_data[:len(time_columns)]
-                    items_data.append(item_info)
-            
-            # Create DataFrame with time series
-            df = pd.DataFrame(items_data)
-            
-            # Add time series columns
-            for i, col_name in enumerate(time_columns):
-                df[col_name] = df['demand_data'].apply(lambda x: x[i] if i < len(x) else 0)
-            
-            # Drop temporary column
-            df = df.drop('demand_data', axis=1)
+            # Stream the workbook (or read the persisted cube) into a demand array
+            df, time_columns, date_mapping = read_demand_data(file_path)
             
             # Store time information
             self.time_columns = time_columns
@@ -143,96 +102,35 @@ class XGBoostForecasting:
         Returns:
             DataFrame with engineered features
         """
-        features_list = []
-        
         # Create time index
         dates = [self.date_mapping[col] for col in self.time_columns[:len(demand_series)]]
         
+        # Time, lag, rolling, smoothing and intermittency features are shared
+        # with the other models and computed once per item history
+        block = self.feature_store.get(item_info.get('item_id'), demand_series, dates)
+        feature_df = block.frame(SHARED_FEATURES).rename(columns={'exp_smooth_3': 'exp_smooth'})
+        
+        # Statistical features
+        statistics = []
         for i in range(len(demand_series)):
-            features = {}
-            current_date = dates[i]
-            
-            # Time-based features
-            features['month'] = current_date.month
-            features['quarter'] = (current_date.month - 1) // 3 + 1
-            features['year'] = current_date.year
-            features['month_sin'] = np.sin(2 * np.pi * current_date.month / 12)
-            features['month_cos'] = np.cos(2 * np.pi * current_date.month / 12)
-            features['quarter_sin'] = np.sin(2 * np.pi * features['quarter'] / 4)
-            features['quarter_cos'] = np.cos(2 * np.pi * features['quarter'] / 4)
-            
-            # Time index (trend)
-            features['time_index'] = i
-            features['time_index_squared'] = i ** 2
-            
-            # Lag features (previous demand values)
-            for lag in [1, 2, 3, 6, 12]:
-                if i >= lag:
-                    features[f'lag_{lag}'] = demand_series[i - lag]
-                else:
-                    features[f'lag_{lag}'] = 0
-            
-            # Rolling statistics features
-            for window in [3, 6, 12]:
-                if i >= window - 1:
-                    window_data = demand_series[max(0, i - window + 1):i + 1]
-                    features[f'rolling_mean_{window}'] = np.mean(window_data)
-                    features[f'rolling_std_{window}'] = np.std(window_data) if len(window_data) > 1 else 0
-                    features[f'rolling_max_{window}'] = np.max(window_data)
-                    features[f'rolling_min_{window}'] = np.min(window_data)
-                    features[f'rolling_sum_{window}'] = np.sum(window_data)
-                else:
-                    features[f'rolling_mean_{window}'] = 0
-                    features[f'rolling_std_{window}'] = 0
-                    features[f'rolling_max_{window}'] = 0
-                    features[f'rolling_min_{window}'] = 0
-                    features[f'rolling_sum_{window}'] = 0
-            
-            # Exponential smoothing features
-            if i > 0:
-                alpha = 0.3
-                exp_smooth = demand_series[0]
-                for j in range(1, i + 1):
-                    exp_smooth = alpha * demand_series[j] + (1 - alpha) * exp_smooth
-                features['exp_smooth'] = exp_smooth
-            else:
-                features['exp_smooth'] = demand_series[0] if len(demand_series) > 0 else 0
-            
-            # Intermittency features
-            if i > 0:
-                recent_data = demand_series[:i + 1]
-                features['demand_frequency'] = np.sum(recent_data > 0) / len(recent_data)
-                features['avg_demand_when_positive'] = np.mean(recent_data[recent_data > 0]) if np.sum(recent_data > 0) > 0 else 0
-                features['periods_since_last_demand'] = 0
-                for j in range(i, -1, -1):
-                    if demand_series[j] > 0:
-                        break
-                    features['periods_since_last_demand'] += 1
-            else:
-                features['demand_frequency'] = 1 if demand_series[0] > 0 else 0
-                features['avg_demand_when_positive'] = demand_series[0] if demand_series[0] > 0 else 0
-                features['periods_since_last_demand'] = 0 if demand_series[0] > 0 else 1
-            
-            # Statistical features
             if i >= 2:
                 recent_data = demand_series[:i + 1]
-                features['cv'] = np.std(recent_data) / np.mean(recent_data) if np.mean(recent_data) > 0 else 0
-                features['skewness'] = stats.skew(recent_data)
-                features['kurtosis'] = stats.kurtosis(recent_data)
+                statistics.append([
+                    np.std(recent_data) / np.mean(recent_data) if np.mean(recent_data) > 0 else 0,
+                    stats.skew(recent_data),
+                    stats.kurtosis(recent_data)
+                ])
             else:
-                features['cv'] = 0
-                features['skewness'] = 0
-                features['kurtosis'] = 0
-            
-            # Item-specific features (encoded)
-            features['category_encoded'] = hash(item_info['category']) % 1000
-            
-            # Target variable
-            features['target'] = demand_series[i]
-            
-            features_list.append(features)
+                statistics.append([0, 0, 0])
+        feature_df[['cv', 'skewness', 'kurtosis']] = np.array(statistics, dtype=np.float64).reshape(-1, 3)
+        
+        # Item-specific features (encoded)
+        feature_df['category_encoded'] = hash(item_info['category']) % 1000
+        
+        # Target variable
+        feature_df['target'] = demand_series
         
-        return pd.DataFrame(features_list)
+        return feature_df
     
     def optimize_hyperparameters(self, X_train: pd.DataFrame, y_train: pd.Series) -> Dict:
         """
@@ -245,6 +143,8 @@ class XGBoostForecasting:
         Returns:
             Best hyperparameters
         """
+        import optuna
+        
         def objective(trial):
             params = {
                 'n_estimators': trial.suggest_int('n_estimators', 50, 300),
@@ -299,49 +199,36 @@ class XGBoostForecasting:
         
         print("Starting XGBoost forecasting...")
         
-        for idx, row in df.iterrows():
+        # Zero-demand items get a zero forecast and histories too short for an 80/20
+        # split with 12 training months the simple average, all in one pass
+        triaged = triage_items(df, self.time_columns, min_history=15)
+        results['item_forecasts'] = bulk_forecasts(df, self.time_columns, triaged, forecast_periods,
+                                                   {'model_trained': False},
+                                                   levels=mean_positive_demand(df, self.time_columns))
+        self.instrumentation.count('skipped', int((triaged['Status'] == 'zero').sum()))
+        self.instrumentation.count('fallbacks', int((triaged['Status'] == 'short').sum()))
+        
+        for idx, row in df[triaged['Status'] == 'live'].iterrows():
             item_id = row['item_id']
+            self.instrumentation.begin_item(item_id)
             print(f"Processing item {idx + 1}/{len(df)}: {item_id}")
             
             # Extract demand series
             demand_series = np.array([row[col] for col in self.time_columns])
             
-            # Skip items with no demand
-            if np.sum(demand_series) == 0:
-                results['item_forecasts'][item_id] = {
-                    'historical_demand': demand_series.tolist(),
-                    'monthly_forecasts': [0] * forecast_periods,
-                    'item_name': row['item_name'],
-                    'category': row['category'],
-                    'model_trained': False
-                }
-                continue
-            
             # Create features
             item_info = {
+                'item_id': item_id,
                 'category': row['category'],
                 'item_name': row['item_name']
             }
             
-            feature_df = self.create_features(demand_series, item_info)
+            with self.instrumentation.phase('feature'):
+                feature_df = self.create_features(demand_series, item_info)
             
             # Prepare training data (use 80% for training, 20% for validation)
             split_point = int(len(feature_df) * 0.8)
             
-            if split_point < 12:  # Need minimum data for training
-                # Use simple average for items with insufficient data
-                avg_demand = np.mean(demand_series[demand_series > 0]) if np.sum(demand_series > 0) > 0 else 0
-                monthly_forecasts = [avg_demand] * forecast_periods
-                
-                results['item_forecasts'][item_id] = {
-                    'historical_demand': demand_series.tolist(),
-                    'monthly_forecasts': monthly_forecasts,
-                    'item_name': row['item_name'],
-                    'category': row['category'],
-                    'model_trained': False
-                }
-                continue
-            
             # Split data
             train_features = feature_df[:split_point]
             val_features = feature_df[split_point:]
@@ -352,42 +239,47 @@ class XGBoostForecasting:
             y_val = val_features['target']
             
             # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = pd.DataFrame(
-                scaler.fit_transform(X_train),
-                columns=X_train.columns,
-                index=X_train.index
-            )
-            X_val_scaled = pd.DataFrame(
-                scaler.transform(X_val),
-                columns=X_val.columns,
-                index=X_val.index
-            )
+            with self.instrumentation.phase('feature'):
+                scaler = StandardScaler()
+                X_train_scaled = pd.DataFrame(
+                    scaler.fit_transform(X_train),
+                    columns=X_train.columns,
+                    index=X_train.index
+                )
+                X_val_scaled = pd.DataFrame(
+                    scaler.transform(X_val),
+                    columns=X_val.columns,
+                    index=X_val.index
+                )
             
             # Optimize hyperparameters for first few items, then use best params
-            if self.optimize_hyperparams and idx < 3:
-                best_params = self.optimize_hyperparameters(X_train_scaled, y_train)
-                self.best_params = best_params
-            elif hasattr(self, 'best_params'):
-                best_params = self.best_params
-            else:
-                best_params = {
-                    'n_estimators': self.n_estimators,
-                    'max_depth': self.max_depth,
-                    'learning_rate': self.learning_rate
-                }
+            with self.instrumentation.phase('selection'):
+                if self.optimize_hyperparams and idx < 3:
+                    best_params = self.optimize_hyperparameters(X_train_scaled, y_train)
+                    self.best_params = best_params
+                elif hasattr(self, 'best_params'):
+                    best_params = self.best_params
+                else:
+                    best_params = {
+                        'n_estimators': self.n_estimators,
+                        'max_depth': self.max_depth,
+                        'learning_rate': self.learning_rate
+                    }
             
             # Train model
-            model = xgb.XGBRegressor(**best_params, random_state=42)
-            model.fit(X_train_scaled, y_train)
+            with self.instrumentation.phase('fit'):
+                model = xgb.XGBRegressor(**best_params, random_state=42)
+                model.fit(X_train_scaled, y_train)
+                self.instrumentation.count('fits')
             
             # Store model and scaler
             self.models[item_id] = model
             self.scalers[item_id] = scaler
             
             # Validation predictions
-            val_pred = model.predict(X_val_scaled)
-            val_pred = np.maximum(val_pred, 0)  # Ensure non-negative predictions
+            with self.instrumentation.phase('validation'):
+                val_pred = model.predict(X_val_scaled)
+                val_pred = np.maximum(val_pred, 0)  # Ensure non-negative predictions
             
             # Calculate accuracy metrics
             mae = mean_absolute_error(y_val, val_pred)
@@ -412,9 +304,10 @@ class XGBoostForecasting:
             results['feature_importance'][item_id] = dict(zip(feature_names, importance))
             
             # Generate forecasts
-            monthly_forecasts = self.generate_multi_step_forecast(
-                model, scaler, feature_df, forecast_periods, item_info
-            )
+            with self.instrumentation.phase('forecast'):
+                monthly_forecasts = self.generate_multi_step_forecast(
+                    model, scaler, feature_df, forecast_periods, item_info
+                )
             
             results['item_forecasts'][item_id] = {
                 'historical_demand': demand_series.tolist(),
@@ -426,6 +319,11 @@ class XGBoostForecasting:
                 'model_trained': True
             }
         
+        self.instrumentation.end_item()
+        
+        # Report items in input order
+        results['item_forecasts'] = {item_id: results['item_forecasts'][item_id] for item_id in df['item_id']}
+        
         print(f"Completed XGBoost forecasting for {len(results['item_forecasts'])} items")
         return results
     
@@ -499,11 +397,7 @@ class XGBoostForecasting:
             
             # Update exponential smoothing
             if len(extended_demand) > 0:
-                alpha = 0.3
-                exp_smooth = extended_demand[0]
-                for val in extended_demand[1:]:
-                    exp_smooth = alpha * val + (1 - alpha) * exp_smooth
-                last_features['exp_smooth'] = exp_smooth
+                last_features['exp_smooth'] = kernels.exponential_smoothing(extended_demand, 0.3)[0, -1]
             
             # Update intermittency features
             if len(extended_demand) > 0:
@@ -512,12 +406,7 @@ class XGBoostForecasting:
                 last_features['avg_demand_when_positive'] = np.mean(positive_demands) if positive_demands else 0
                 
                 # Periods since last demand
-                periods_since = 0
-                for i in range(len(extended_demand) - 1, -1, -1):
-                    if extended_demand[i] > 0:
-                        break
-                    periods_since += 1
-                last_features['periods_since_last_demand'] = periods_since
+                last_features['periods_since_last_demand'] = kernels.periods_since_demand(extended_demand)[0, -1]
             
             # Statistical features
             if len(extended_demand) >= 2:
@@ -578,6 +467,8 @@ class XGBoostForecasting:
             results: Results dictionary from fit_and_forecast
             top_n: Number of top items to analyze
         """
+        import matplotlib.pyplot as plt
+        
         # Get top items by historical demand
         item_totals = {item_id: sum(data['historical_demand']) 
                       for item_id, data in results['item_forecasts'].items()}
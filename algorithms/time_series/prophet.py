@@ -1,21 +1,20 @@
 import pandas as pd
 import numpy as np
 import warnings
-from typing import Tuple, Dict, List, Optional
+from typing import Tuple, Dict, List, Optional, TYPE_CHECKING
 import openpyxl
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import seaborn as sns
-from prophet import Prophet
-from prophet.diagnostics import cross_validation, performance_metrics
-from prophet.plot import plot_plotly, plot_components_plotly
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import json
+from algorithms.core.instrumentation import NullInstrumentation
+from algorithms.core.triage import triage_items, bulk_forecasts
+from algorithms.ingestion.demand_cube import read_demand_data
 
 warnings.filterwarnings('ignore')
 
+# Prophet (and its Stan backend) is imported when the first model is created
+if TYPE_CHECKING:
+    from prophet import Prophet
+
 class ProphetForecasting:
     """
     Prophet-based forecasting for spare parts demand
@@ -33,7 +32,8 @@ class ProphetForecasting:
                  seasonality_mode: str = 'additive',
                  changepoint_prior_scale: float = 0.05,
                  seasonality_prior_scale: float = 10.0,
-                 interval_width: float = 0.8):
+                 interval_width: float = 0.8,
+                 instrumentation=None):
         """
         Initialize Prophet forecasting model
         
@@ -46,6 +46,7 @@ class ProphetForecasting:
             changepoint_prior_scale: Flexibility of trend changes
             seasonality_prior_scale: Flexibility of seasonality
             interval_width: Width of uncertainty intervals
+            instrumentation: Optional Instrumentation collecting phase timings and counters
         """
         self.growth = growth
         self.yearly_seasonality = yearly_seasonality
@@ -55,6 +56,7 @@ class ProphetForecasting:
         self.changepoint_prior_scale = changepoint_prior_scale
         self.seasonality_prior_scale = seasonality_prior_scale
         self.interval_width = interval_width
+        self.instrumentation = instrumentation or NullInstrumentation()
         
         self.models = {}
         self.model_components = {}
@@ -63,76 +65,17 @@ class ProphetForecasting:
         
     def load_data(self, file_path: str) -> pd.DataFrame:
         """
-        Load spare parts data from Excel file
+        Load spare parts data from an Excel file or a demand cube
         
         Args:
-            file_path: Path to Excel file
+            file_path: Path to Excel file or DemandCube directory
             
         Returns:
             DataFrame with processed data
         """
         try:
-            # Read Excel file properly handling the structure
-            xl_file = pd.ExcelFile(file_path)
-            raw_data = pd.read_excel(xl_file, header=None)
-            
-            # Extract years and months
-            years = raw_data.iloc[0, 3:].values
-            months = raw_data.iloc[1, 3:].values
-            
-            # Create proper column names and date mapping
-            time_columns = []
-            date_mapping = {}
-            
-            for i, (year, month) in enumerate(zip(years, months)):
-                if pd.notna(year) and pd.notna(month) and month != 'Total':
-                    col_name = f"{int(year)}-{month}"
-                    time_columns.append(col_name)
-                    # Create actual date for time series
-                    month_num = {
-                        'January': 1, 'February': 2, 'March': 3, 'April': 4,
-                        'May': 5, 'June': 6, 'July': 7, 'August': 8,
-                        'September': 9, 'October': 10, 'November': 11, 'December': 12
-                    }[month]
-                    date_mapping[col_name] = datetime(int(year), month_num, 1)
-            
-            # Extract item information and data
-            items_data = []
-            for idx in range(2, len(raw_data)):
-                row = raw_data.iloc[idx]
-                if pd.notna(row.iloc[0]):  # If item ID exists
-                    item_info = {
-                        'item_id': row.iloc[0],
-                        'item_name': row.iloc[1],
-                        'category': row.iloc[2]
-                    }
-                    
-                    # Extract demand data (skip Total columns)
-                    demand_data = []
-                    col_idx = 3
-                    for year in [2021, 2022, 2023, 2024, 2025]:
-                        for month in ['January', 'February', 'March', 'April', 'May', 'June',
-                                    'July', 'August', 'September', 'October', 'November', 'December']:
-                            col_name = f"{year}-{month}"
-                            if col_idx < len(row) and col_name in time_columns:
-                                demand_data.append(row.iloc[col_idx] if pd.notna(row.iloc[col_idx]) else 0)
-                            col_idx += 1
-                        col_idx += 1  # Skip Total column
-                        if year == 2025:  # 2025 data is incomplete
-                            break
-            
-                    item_info['demand_data'] = demand_data[:len(time_columns)]
-                    items_data.append(item_info)
-            
-            # Create DataFrame with time series
-            df = pd.DataFrame(items_data)
-            
-            # Create time series columns
-            for i, col_name in enumerate(time_columns):
-                df[col_name] = df['demand_data'].apply(lambda x: x[i] if i < len(x) else 0)
-            
-            # Drop temporary column
-            df = df.drop('demand_data', axis=1)
+            # Stream the workbook (or read the persisted cube) into a demand array
+            df, time_columns, date_mapping = read_demand_data(file_path)
             
             # Store time information
             self.time_columns = time_columns
@@ -168,7 +111,7 @@ class ProphetForecasting:
         
         return prophet_df
     
-    def create_prophet_model(self, item_id: str, demand_stats: Dict) -> Prophet:
+    def create_prophet_model(self, item_id: str, demand_stats: Dict) -> 'Prophet':
         """
         Create and configure Prophet model based on item characteristics
         
@@ -179,6 +122,8 @@ class ProphetForecasting:
         Returns:
             Configured Prophet model
         """
+        from prophet import Prophet
+        
         # Adjust parameters based on demand characteristics
         changepoint_scale = self.changepoint_prior_scale
         seasonality_scale = self.seasonality_prior_scale
@@ -251,7 +196,7 @@ class ProphetForecasting:
         
         return stats
     
-    def detect_changepoints(self, model: Prophet, forecast_df: pd.DataFrame) -> Dict:
+    def detect_changepoints(self, model: 'Prophet', forecast_df: pd.DataFrame) -> Dict:
         """
         Analyze trend changepoints detected by Prophet
         
@@ -295,7 +240,7 @@ class ProphetForecasting:
         
         return changepoints_info
     
-    def perform_cross_validation(self, model: Prophet, prophet_df: pd.DataFrame) -> Dict:
+    def perform_cross_validation(self, model: 'Prophet', prophet_df: pd.DataFrame) -> Dict:
         """
         Perform time series cross-validation
         
@@ -306,6 +251,8 @@ class ProphetForecasting:
         Returns:
             Cross-validation results
         """
+        from prophet.diagnostics import cross_validation, performance_metrics
+        
         try:
             # Only perform CV if we have sufficient data
             if len(prophet_df) < 24:  # Need at least 2 years
@@ -342,7 +289,7 @@ class ProphetForecasting:
             print(f"Cross-validation failed: {e}")
             return {'performed': False, 'reason': 'cv_failed'}
     
-    def analyze_seasonality_components(self, model: Prophet, forecast_df: pd.DataFrame) -> Dict:
+    def analyze_seasonality_components(self, model: 'Prophet', forecast_df: pd.DataFrame) -> Dict:
         """
         Analyze seasonal components from Prophet model
         
@@ -422,45 +369,46 @@ class ProphetForecasting:
         
         print("Starting Prophet forecasting...")
         
-        for idx, row in df.iterrows():
+        # Zero-demand and too-short items get their zero forecasts in one pass
+        triaged = triage_items(df, self.time_columns, min_history=12)
+        results['item_forecasts'] = bulk_forecasts(df, self.time_columns, triaged, forecast_periods, {
+            'lower_bound': [0] * forecast_periods,
+            'upper_bound': [0] * forecast_periods,
+            'model_fitted': False,
+            'insufficient_data': True
+        })
+        self.instrumentation.count('skipped', int((triaged['Status'] != 'live').sum()))
+        
+        for idx, row in df[triaged['Status'] == 'live'].iterrows():
             item_id = row['item_id']
+            self.instrumentation.begin_item(item_id)
             print(f"Processing item {idx + 1}/{len(df)}: {item_id}")
             
             # Extract demand series
             demand_values = [row[col] for col in self.time_columns]
             
-            # Skip items with no demand or insufficient data
-            if np.sum(demand_values) == 0 or len(demand_values) < 12:
-                results['item_forecasts'][item_id] = {
-                    'historical_demand': demand_values,
-                    'monthly_forecasts': [0] * forecast_periods,
-                    'lower_bound': [0] * forecast_periods,
-                    'upper_bound': [0] * forecast_periods,
-                    'item_name': row['item_name'],
-                    'category': row['category'],
-                    'model_fitted': False,
-                    'insufficient_data': True
-                }
-                continue
-            
             # Calculate demand statistics
-            demand_stats = self.calculate_demand_statistics(demand_values)
-            
-            # Prepare data for Prophet
-            prophet_df = self.prepare_prophet_data(demand_values, item_id)
+            with self.instrumentation.phase('feature'):
+                demand_stats = self.calculate_demand_statistics(demand_values)
+                
+                # Prepare data for Prophet
+                prophet_df = self.prepare_prophet_data(demand_values, item_id)
             
             # Create and configure Prophet model
             model = self.create_prophet_model(item_id, demand_stats)
             
             try:
                 # Fit the model
-                model.fit(prophet_df)
+                with self.instrumentation.phase('fit'):
+                    model.fit(prophet_df)
+                    self.instrumentation.count('fits')
                 
                 # Create future dataframe for forecasting
-                future = model.make_future_dataframe(periods=forecast_periods, freq='M')
-                
-                # Generate forecast
-                forecast = model.predict(future)
+                with self.instrumentation.phase('forecast'):
+                    future = model.make_future_dataframe(periods=forecast_periods, freq='M')
+                    
+                    # Generate forecast
+                    forecast = model.predict(future)
                 
                 # Extract forecast values (ensure non-negative)
                 forecast_values = forecast.tail(forecast_periods)['yhat'].tolist()
@@ -507,10 +455,12 @@ class ProphetForecasting:
                 # Perform cross-validation (only for items with sufficient data and not too many to save time)
                 if idx < 5 and len(prophet_df) >= 24:  # Only first 5 items for demo
                     print(f"  Performing cross-validation for {item_id}...")
-                    results['cross_validation'][item_id] = self.perform_cross_validation(model, prophet_df)
+                    with self.instrumentation.phase('validation'):
+                        results['cross_validation'][item_id] = self.perform_cross_validation(model, prophet_df)
                 
             except Exception as e:
                 print(f"  Prophet modeling failed for {item_id}: {e}")
+                self.instrumentation.count('fallbacks')
                 
                 # Fallback to simple average
                 avg_demand = np.mean([d for d in demand_values if d > 0]) if any(d > 0 for d in demand_values) else 0
@@ -527,6 +477,11 @@ class ProphetForecasting:
                     'demand_statistics': demand_stats
                 }
         
+        self.instrumentation.end_item()
+        
+        # Report items in input order
+        results['item_forecasts'] = {item_id: results['item_forecasts'][item_id] for item_id in df['item_id']}
+        
         print(f"Completed Prophet forecasting for {len(results['item_forecasts'])} items")
         return results
     
@@ -576,6 +531,8 @@ class ProphetForecasting:
             results: Results dictionary from fit_and_forecast
             top_n: Number of top items to analyze
         """
+        import matplotlib.pyplot as plt
+        
         # Get top items by historical demand
         item_totals = {item_id: sum(data['historical_demand']) 
                       for item_id, data in results['item_forecasts'].items()}
@@ -704,6 +661,8 @@ class ProphetForecasting:
             results: Results dictionary
             item_id: Item to analyze
         """
+        import matplotlib.pyplot as plt
+        
         if item_id not in self.models:
             print(f"No Prophet model available for {item_id}")
             return
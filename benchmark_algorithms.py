@@ -0,0 +1,374 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import sys
+import time
+import platform
+import resource
+import subprocess
+import tempfile
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from test_algorithms import AlgorithmTester, ALGORITHM_TESTS, limited_threads
+from synthetic_data import synthetic_workbook
+
+PHASES = ['load', 'feature', 'fit', 'forecast', 'save']
+
+# Benchmark phase -> instrumentation phases reported by the algorithms
+PHASE_GROUPS = {
+    'load': ['load'],
+    'feature': ['feature'],
+    'fit': ['selection', 'fit', 'validation', 'unattributed'],
+    'forecast': ['forecast'],
+    'save': ['summary']
+}
+
+HISTORY_FILE = 'outputs/benchmarks/benchmark_history.jsonl'
+
+# Algorithm name -> module imported by AlgorithmTester
+ALGORITHM_MODULES = {
+    'SARIMA': 'algorithms.classical.sarima',
+    'SBA': 'algorithms.classical.sba_forecasting',
+    'Random_Forest': 'algorithms.machine_learning.random_forest',
+    'XGBoost': 'algorithms.machine_learning.xgboost',
+    'LSTM': 'algorithms.deep_learning.lstm',
+    'Prophet': 'algorithms.time_series.prophet'
+}
+
+# Heavy dependencies the algorithm modules used to import at module level and now load on first use
+DEFERRED_IMPORTS = {
+    'SARIMA': ['matplotlib.pyplot', 'seaborn', 'statsmodels.tsa.statespace.sarimax', 'pmdarima'],
+    'SBA': ['matplotlib.pyplot', 'seaborn'],
+    'Random_Forest': ['matplotlib.pyplot', 'seaborn', 'optuna'],
+    'XGBoost': ['matplotlib.pyplot', 'seaborn', 'optuna'],
+    'LSTM': ['matplotlib.pyplot', 'seaborn', 'tensorflow'],
+    'Prophet': ['matplotlib.pyplot', 'seaborn', 'prophet', 'plotly.graph_objects']
+}
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+def run_benchmark_case(data_path: str, algo_name: str, sample_size: Optional[int], cores: int) -> Dict:
+    """
+    Benchmark one algorithm on one workbook (runs in a fresh worker process)
+    
+    Args:
+        data_path: Absolute path to the workbook
+        algo_name: Algorithm name from ALGORITHM_TESTS
+        sample_size: Number of items to forecast (None for all)
+        cores: Number of cores the process is pinned to
+    
+    Returns:
+        Benchmark record without the run metadata
+    """
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, sorted(os.sched_getaffinity(0))[:cores])
+    
+    tester = AlgorithmTester(data_path)
+    test_func = getattr(tester, dict(ALGORITHM_TESTS)[algo_name])
+    
+    # Results are written like a normal test run, into a scratch directory
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch_directory:
+        os.chdir(scratch_directory)
+        
+        start_time = time.perf_counter()
+        result = test_func(sample_size if sample_size is not None else sys.maxsize)
+        result['execution_time'] = str(time.perf_counter() - start_time)
+        
+        save_seconds = 0.0
+        if result['status'] == 'success':
+            save_started = time.perf_counter()
+            tester._record_result(algo_name, result)
+            tester.save_results()
+            save_seconds = time.perf_counter() - save_started
+        
+        total_seconds = time.perf_counter() - start_time
+        os.chdir(working_directory)
+    
+    items_processed = len(result['results']['item_forecasts']) if result['status'] == 'success' else 0
+    
+    instrumented = result.get('instrumentation', {}).get('phases', {})
+    phase_seconds = {
+        phase: sum(instrumented.get(name, {}).get('seconds', 0.0) for name in names)
+        for phase, names in PHASE_GROUPS.items()
+    }
+    phase_seconds['save'] += save_seconds
+    model_seconds = phase_seconds['feature'] + phase_seconds['fit'] + phase_seconds['forecast']
+    
+    return {
+        'algorithm': algo_name,
+        'cores': cores,
+        'status': result['status'],
+        'error': result.get('error'),
+        'items_processed': items_processed,
+        'phase_seconds': {phase: round(seconds, 4) for phase, seconds in phase_seconds.items()},
+        'counters': result.get('instrumentation', {}).get('counters', {}),
+        'total_seconds': round(total_seconds, 4),
+        'items_per_second': round(items_processed / model_seconds, 4) if model_seconds > 0 else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+
+def git_commit() -> Optional[str]:
+    """Current git commit of the working tree, if available"""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def time_import(modules: List[str]) -> Dict:
+    """
+    Import modules in a fresh interpreter and time it
+    
+    Args:
+        modules: Module names, imported in order
+    
+    Returns:
+        Dictionary with status, seconds and the heavy modules that ended up loaded
+    """
+    heavy = sorted({name.split('.')[0] for names in DEFERRED_IMPORTS.values() for name in names})
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in modules) +
+        "seconds = time.perf_counter() - start\n"
+        f"print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))\n"
+    )
+    completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        return {'status': 'failed', 'error': error[-1] if error else f"exit code {completed.returncode}"}
+    
+    return dict(json.loads(completed.stdout.strip().splitlines()[-1]), status='success')
+
+def measure_startup(algorithms: List[str], repeats: int = 3) -> pd.DataFrame:
+    """
+    Startup-time benchmark of the algorithm modules
+    
+    Compares importing each module as it is now (heavy dependencies deferred)
+    with importing it together with the dependencies it used to load eagerly.
+    Each measurement runs in a fresh interpreter and the best of the repeats
+    is kept, so OS file caching affects both columns alike.
+    
+    Args:
+        algorithms: Algorithm names from ALGORITHM_TESTS
+        repeats: Fresh interpreters per measurement
+    
+    Returns:
+        DataFrame with lazy and eager import times per algorithm
+    """
+    rows = []
+    for algo_name in algorithms:
+        module = ALGORITHM_MODULES[algo_name]
+        lazy = [time_import([module]) for _ in range(repeats)]
+        eager = [time_import(DEFERRED_IMPORTS[algo_name] + [module]) for _ in range(repeats)]
+        
+        lazy_seconds = min((run['seconds'] for run in lazy if run['status'] == 'success'), default=None)
+        eager_seconds = min((run['seconds'] for run in eager if run['status'] == 'success'), default=None)
+        rows.append({
+            'Algorithm': algo_name,
+            'Import_s': round(lazy_seconds, 3) if lazy_seconds is not None else None,
+            'Eager_Import_s': round(eager_seconds, 3) if eager_seconds is not None else None,
+            'Saved_s': round(eager_seconds - lazy_seconds, 3)
+            if lazy_seconds is not None and eager_seconds is not None else None,
+            'Heavy_Modules_Loaded': ', '.join(lazy[0].get('loaded', [])) or '-',
+            'Error': lazy[0].get('error') or eager[0].get('error')
+        })
+    
+    return pd.DataFrame(rows)
+
+class AlgorithmBenchmark:
+    def __init__(self, history_file: str = HISTORY_FILE, seed: int = 42):
+        self.history_file = history_file
+        self.seed = seed
+        self.records = []
+    
+    def run(self, algorithms: List[str], catalogue_sizes: List[int], core_counts: List[int],
+            sample_size: Optional[int] = None):
+        """
+        Benchmark every algorithm x catalogue size x core count combination
+        
+        Each case runs in its own spawned process so peak RSS and thread
+        pools are measured in isolation.
+        
+        Args:
+            algorithms: Algorithm names from ALGORITHM_TESTS
+            catalogue_sizes: Number of items in the synthetic catalogues
+            core_counts: Core counts for the scaling curves
+            sample_size: Number of items to forecast per case (None for all)
+        """
+        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        metadata = {
+            'run_id': run_id,
+            'timestamp': datetime.now().isoformat(),
+            'git_commit': git_commit(),
+            'host': platform.node(),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count()
+        }
+        context = multiprocessing.get_context('spawn')
+        
+        for n_items in catalogue_sizes:
+            data_path = os.path.abspath(synthetic_workbook(n_items, seed=self.seed))
+            
+            for algo_name in algorithms:
+                for cores in core_counts:
+                    print(f"Benchmarking {algo_name} on {n_items} items with {cores} cores...")
+                    
+                    with limited_threads(cores), \
+                            ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        try:
+                            record = executor.submit(run_benchmark_case, data_path, algo_name,
+                                                     sample_size, cores).result()
+                        except Exception as e:
+                            record = {'algorithm': algo_name, 'cores': cores, 'status': 'failed', 'error': str(e)}
+                    
+                    record.update(metadata)
+                    record.update({'n_items': n_items, 'sample_size': sample_size, 'seed': self.seed})
+                    self.records.append(record)
+    
+    def load_history(self) -> List[Dict]:
+        """Previously recorded benchmark records"""
+        if not os.path.exists(self.history_file):
+            return []
+        
+        with open(self.history_file, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    
+    def save_history(self):
+        """Append this run's records to the history file"""
+        os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+        with open(self.history_file, 'a') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+    
+    def find_regressions(self, threshold: float = 0.1) -> List[Dict]:
+        """
+        Compare this run against the latest comparable record in the history
+        
+        Records are comparable when algorithm, catalogue, sample size, core
+        count and host match. Throughput drops and peak RSS increases larger
+        than the threshold are reported.
+        
+        Args:
+            threshold: Relative change that counts as a regression
+        
+        Returns:
+            List of regression dictionaries
+        """
+        def case_key(record):
+            return (record['algorithm'], record['n_items'], record['sample_size'], record['seed'],
+                    record['cores'], record['host'])
+        
+        baselines = {}
+        for record in self.load_history():
+            if record['status'] == 'success':
+                baselines[case_key(record)] = record
+        
+        regressions = []
+        for record in self.records:
+            baseline = baselines.get(case_key(record))
+            if record['status'] != 'success' or baseline is None:
+                continue
+            
+            checks = [
+                ('items_per_second', baseline['items_per_second'], record['items_per_second'], -1),
+                ('peak_rss_mb', baseline['peak_rss_mb'], record['peak_rss_mb'], 1)
+            ]
+            for metric, before, after, direction in checks:
+                if before and after is not None and direction * (after - before) / before > threshold:
+                    regressions.append({
+                        'algorithm': record['algorithm'],
+                        'n_items': record['n_items'],
+                        'cores': record['cores'],
+                        'metric': metric,
+                        'baseline': before,
+                        'current': after,
+                        'baseline_commit': baseline.get('git_commit')
+                    })
+        
+        return regressions
+    
+    def create_report(self) -> pd.DataFrame:
+        """Throughput, memory, phase breakdown and core scaling of this run"""
+        rows = []
+        for record in self.records:
+            row = {
+                'Algorithm': record['algorithm'],
+                'Items': record['n_items'],
+                'Cores': record['cores'],
+                'Status': record['status'],
+                'Items_Per_Second': record.get('items_per_second'),
+                'Peak_RSS_MB': record.get('peak_rss_mb')
+            }
+            for phase in PHASES:
+                row[f'{phase.title()}_s'] = record.get('phase_seconds', {}).get(phase)
+            rows.append(row)
+        
+        report = pd.DataFrame(rows)
+        if report.empty:
+            return report
+        
+        # Speedup relative to the smallest core count of the same case
+        baseline = report.sort_values('Cores').groupby(['Algorithm', 'Items'])['Items_Per_Second'].transform('first')
+        report['Speedup'] = np.round(report['Items_Per_Second'] / baseline, 2)
+        return report
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark the forecasting algorithms on synthetic catalogues")
+    parser.add_argument('--algorithms', nargs='+', default=[name for name, _ in ALGORITHM_TESTS],
+                        choices=[name for name, _ in ALGORITHM_TESTS])
+    parser.add_argument('--items', nargs='+', type=int, default=[1000], help="Catalogue sizes")
+    parser.add_argument('--cores', nargs='+', type=int, default=[os.cpu_count() or 1], help="Core counts")
+    parser.add_argument('--sample-size', type=int, default=None, help="Items forecast per case (default: all)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--threshold', type=float, default=0.1, help="Relative change flagged as regression")
+    parser.add_argument('--no-history', action='store_true', help="Do not append this run to the history")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    parser.add_argument('--startup', action='store_true',
+                        help="Only measure module import time (lazy vs eager heavy dependencies)")
+    args = parser.parse_args()
+    
+    if args.startup:
+        print("\n" + "="*60)
+        print("STARTUP BENCHMARK")
+        print("="*60)
+        print(measure_startup(args.algorithms).to_string(index=False))
+        return
+    
+    benchmark = AlgorithmBenchmark(history_file=args.history, seed=args.seed)
+    benchmark.run(args.algorithms, args.items, args.cores, sample_size=args.sample_size)
+    
+    print("\n" + "="*60)
+    print("BENCHMARK RESULTS")
+    print("="*60)
+    print(benchmark.create_report().to_string(index=False))
+    
+    regressions = benchmark.find_regressions(threshold=args.threshold)
+    for regression in regressions:
+        print(f"⚠️  Regression: {regression['algorithm']} ({regression['n_items']} items, "
+              f"{regression['cores']} cores) {regression['metric']} "
+              f"{regression['baseline']} -> {regression['current']}")
+    
+    if not args.no_history:
+        benchmark.save_history()
+        print(f"\n📁 Benchmark records appended to {args.history}")
+    
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@ import streamlit as st
 import sys
 import os
 import base64
+import pandas as pd
 from data_loader import ForecastDataLoader
+from forecast_snapshot import ForecastSnapshot
+from item_index import ItemIndex
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -49,22 +52,40 @@ def authenticate(username: str, password: str) -> bool:
     """Authenticate user with hardcoded credentials"""
     return username == VALID_USERNAME and password == VALID_PASSWORD
 
-@st.cache_data
+@st.cache_resource
 def load_forecast_data():
-    """Load and cache the consolidated forecast data"""
+    """Load and cache the memory-mapped forecast snapshot"""
     try:
         loader = ForecastDataLoader()
-        consolidated_data = loader.consolidate_data()
+        snapshot_directory = loader.refresh_snapshot()
         
-        if not consolidated_data or not consolidated_data.get("items"):
+        if snapshot_directory is None:
+            st.error("❌ No forecast data found. Please check outputs/test_results directory.")
+            return None
+        
+        snapshot = ForecastSnapshot.load(snapshot_directory)
+        
+        if snapshot.n_items == 0:
             st.error("❌ No forecast data found. Please check outputs/test_results directory.")
             return None
             
-        return consolidated_data
+        return snapshot
     except Exception as e:
         st.error(f"❌ Error loading forecast data: {e}")
         return None
 
+@st.cache_resource(max_entries=1)
+def build_item_index(snapshot_directory: str, created_timestamp: str):
+    """Build and cache the item search index (current snapshot version only)"""
+    return ItemIndex(load_forecast_data())
+
+@st.cache_data(max_entries=256)
+def search_items(snapshot_directory: str, created_timestamp: str, prefix: str,
+                 category: str, selected_model: str):
+    """Cache search results per snapshot version and query (recent queries only)"""
+    item_index = build_item_index(snapshot_directory, created_timestamp)
+    return item_index.search(prefix, category, selected_model)
+
 def show_authentication_page():
     """Display the beautiful authentication/login page"""
     
@@ -381,8 +402,8 @@ def show_dashboard_page():
     
     if forecast_data:
         # Show data summary
-        items_count = len(forecast_data["items"])
-        algorithms_count = len(forecast_data["metadata"]["algorithms_loaded"])
+        items_count = forecast_data.n_items
+        algorithms_count = len(forecast_data.algorithms)
         
         # Update the configuration boxes with real data
         col1, col2, col3 = st.columns(3)
@@ -473,7 +494,7 @@ def show_dashboard_page():
         st.rerun()
 
 def show_forecast_details_page():
-    """Display the detailed forecast view (placeholder for now)"""
+    """Display the detailed forecast view with paginated item browsing"""
     # Header with back button
     col1, col2 = st.columns([1, 4])
     with col1:
@@ -486,19 +507,88 @@ def show_forecast_details_page():
     
     st.markdown("---")
     
-    # Placeholder content for now
-    st.markdown("""
-    <div style="padding: 2rem; border: 2px dashed #ccc; border-radius: 10px; text-align: center;">
-        <h3>🚧 Forecast Details Coming Soon</h3>
-        <p>This section will display:</p>
-        <ul style="text-align: left; max-width: 400px; margin: 0 auto;">
-            <li>Historical vs Predicted Charts</li>
-            <li>Algorithm Comparison</li>
-            <li>Model Analysis & Reasoning</li>
-            <li>12-Month Forecast Details</li>
-        </ul>
-    </div>
-    """, unsafe_allow_html=True)
+    snapshot = st.session_state.forecast_data or load_forecast_data()
+    
+    if snapshot is None:
+        st.error("❌ No forecast data loaded. Please return to the dashboard.")
+        return
+    
+    snapshot_version = (snapshot.directory, snapshot.manifest["created_timestamp"])
+    
+    # Search and filters
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        prefix = st.text_input("🔍 Search item ID or name", placeholder="Starts with...", key="details_search")
+    with col2:
+        category = st.selectbox("Category", ["All"] + snapshot.categories, key="details_category")
+    with col3:
+        selected_model = st.selectbox("Selected model", ["All"] + snapshot.algorithms, key="details_model")
+    with col4:
+        page_size = st.selectbox("Per page", [10, 25, 50, 100], index=1, key="details_page_size")
+    
+    positions = search_items(
+        *snapshot_version,
+        prefix,
+        None if category == "All" else category,
+        None if selected_model == "All" else selected_model
+    )
+    
+    if len(positions) == 0:
+        st.info("No items match the current search and filters.")
+        return
+    
+    # Pagination
+    page_count = (len(positions) + page_size - 1) // page_size
+    if st.session_state.get("details_page", 1) > page_count:
+        st.session_state.details_page = 1
+    
+    col1, col2 = st.columns([1, 4])
+    with col1:
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="details_page")
+    with col2:
+        st.markdown(f"<br>{len(positions)} items &middot; page {page_number} of {page_count}", unsafe_allow_html=True)
+    
+    page_positions = ItemIndex.page(positions, page_number, page_size)
+    
+    # Materialize only the visible page
+    page_items = [snapshot.item(idx) for idx in page_positions]
+    
+    st.dataframe(pd.DataFrame([{
+        "Item ID": item["item_id"],
+        "Item Name": item["item_name"],
+        "Category": item["category"],
+        "Historical Total": item["historical_total"],
+        "Selected Model": item["selected_model"],
+        "Selected Annual Forecast": round(item["annual_totals"].get(item["selected_model"], 0.0), 2)
+    } for item in page_items]), use_container_width=True, hide_index=True)
+    
+    # Selected-model forecasts for the page
+    st.markdown("### 📊 Selected Model Forecasts (this page)")
+    st.line_chart(pd.DataFrame(
+        {str(item["item_id"]): item["monthly_forecasts"][item["selected_model"]] for item in page_items},
+        index=pd.Index(range(1, 13), name="Month")
+    ))
+    
+    # Algorithm comparison for one item of the page
+    st.markdown("### 🔬 Algorithm Comparison")
+    focus = st.selectbox(
+        "Item",
+        range(len(page_items)),
+        format_func=lambda i: f"{page_items[i]['item_id']} - {page_items[i]['item_name'][:60]}",
+        key="details_focus"
+    )
+    item = page_items[focus]
+    
+    reasoning = ForecastDataLoader().selection_reasoning(
+        snapshot.selection, page_positions[focus], snapshot.algorithms, item["historical_total"]
+    )
+    st.markdown(f"**Selected model:** {item['selected_model']}  \n**Reasoning:** {reasoning}")
+    
+    st.line_chart(pd.DataFrame(item["monthly_forecasts"], index=pd.Index(range(1, 13), name="Month")))
+    st.dataframe(pd.DataFrame({
+        "Algorithm": list(item["annual_totals"].keys()),
+        "Annual Forecast": [round(total, 2) for total in item["annual_totals"].values()]
+    }), use_container_width=True, hide_index=True)
     
     # Logout button
     st.markdown("<br><br>", unsafe_allow_html=True)
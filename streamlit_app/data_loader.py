@@ -5,30 +5,63 @@ import glob
 from datetime import datetime
 from typing import Dict, List, Any
 import numpy as np
+import warnings
+from forecast_snapshot import ForecastSnapshot
+
+# Reason codes emitted by the batched selector (see select_best_algorithms_batch)
+REASON_NO_HISTORY = 0
+REASON_ALL_ZERO = 1
+REASON_BALANCED = 2
+REASON_CLOSEST_TO_HISTORY = 3
 
 class ForecastDataLoader:
     """
     Loads and consolidates forecasting results from all 6 algorithms
     """
     
-    def __init__(self, results_directory: str = "outputs/test_results"):
+    def __init__(self, results_directory: str = "outputs/test_results",
+                 cache_directory: str = "outputs/consolidated_cache",
+                 snapshot_directory: str = "outputs/forecast_snapshot"):
         self.results_directory = results_directory
+        self.cache_directory = cache_directory
+        self.snapshot_directory = snapshot_directory
         self.algorithms = ["LSTM", "Prophet", "Random_Forest", "SARIMA", "SBA", "XGBoost"]
         self.consolidated_data = None
+        self.forecast_cube = None
+        self.selection = None
+        
+    def latest_algorithm_file(self, algorithm: str) -> str:
+        """Return the most recent detailed forecast file for an algorithm (None if missing)"""
+        pattern = os.path.join(self.results_directory, f"{algorithm}_detailed_forecasts_*.csv")
+        files = glob.glob(pattern)
+        
+        if not files:
+            return None
+        
+        return max(files, key=os.path.getctime)
+    
+    def file_fingerprint(self, filepath: str) -> Dict[str, Any]:
+        """Cheap fingerprint of a source file (name, size and modification time)"""
+        if filepath is None:
+            return None
+        
+        stat = os.stat(filepath)
+        return {
+            "file": os.path.basename(filepath),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns
+        }
         
     def load_algorithm_data(self, algorithm: str) -> pd.DataFrame:
         """Load data for a specific algorithm"""
         try:
             # Find the most recent file for this algorithm
-            pattern = os.path.join(self.results_directory, f"{algorithm}_detailed_forecasts_*.csv")
-            files = glob.glob(pattern)
+            latest_file = self.latest_algorithm_file(algorithm)
             
-            if not files:
+            if latest_file is None:
                 print(f"⚠️  No files found for {algorithm}")
                 return pd.DataFrame()
             
-            # Get the most recent file
-            latest_file = max(files, key=os.path.getctime)
             print(f"📊 Loading {algorithm}: {os.path.basename(latest_file)}")
             
             df = pd.read_csv(latest_file)
@@ -54,29 +87,348 @@ class ForecastDataLoader:
             print("❌ No data loaded from any algorithm")
             return {}
         
-        # Get unique items from the first available algorithm
-        first_algo = list(all_data.keys())[0]
-        unique_items = all_data[first_algo]['Item_ID'].unique()
+        # Build the (items x algorithms x months) cube and select for all items at once
+        cube = self.build_forecast_cube(all_data)
+        selection = self.select_best_algorithms_batch(
+            cube["forecasts"], cube["available"], cube["historical_totals"]
+        )
+        
+        return self._materialize(cube, selection)
+    
+    def consolidate_data_incremental(self) -> Dict[str, Any]:
+        """
+        Consolidate using the persisted cube, reprocessing only changed sources
+        
+        Each algorithm's latest CSV is fingerprinted. Unchanged algorithms are
+        served from the cache; a refreshed algorithm only has its slice of the
+        cube reloaded and selection re-run for the items whose forecasts moved.
+        Falls back to a full rebuild when the item list or algorithm set changes.
+        
+        Returns:
+            Consolidated data in the same format as consolidate_data
+        """
+        print("🔄 Consolidating forecast data (incremental)...")
+        
+        if not self.update_cube():
+            return {}
+        
+        return self._materialize(self.forecast_cube, self.selection)
+    
+    def source_fingerprints(self) -> Dict[str, Any]:
+        """Fingerprints of the latest detailed forecast file of every algorithm"""
+        return {algorithm: self.file_fingerprint(self.latest_algorithm_file(algorithm))
+                for algorithm in self.algorithms}
+    
+    def update_cube(self) -> bool:
+        """
+        Bring the cached cube and selection up to date without materializing items
+        
+        Returns:
+            True if a cube is available (self.forecast_cube / self.selection)
+        """
+        fingerprints = self.source_fingerprints()
+        loaded = [algorithm for algorithm in self.algorithms if fingerprints[algorithm] is not None]
+        
+        if not loaded:
+            print("❌ No data loaded from any algorithm")
+            return False
+        
+        cached = self.load_cache()
+        
+        if cached is not None:
+            # The cache fingerprints every file it was built from, including empty ones left out of the cube
+            cached_sources = [algorithm for algorithm in self.algorithms if algorithm in cached["fingerprints"]]
+            first = cached["algorithms"][0]
+        
+        if (cached is None or cached_sources != loaded
+                or cached["fingerprints"][first] != fingerprints[first]):
+            # Item list or algorithm set may have changed - rebuild everything
+            return self._rebuild_cube(loaded, fingerprints)
+        
+        cube, selection = cached["cube"], cached["selection"]
+        changed = [algorithm for algorithm in loaded if cached["fingerprints"][algorithm] != fingerprints[algorithm]]
+        
+        if changed:
+            changed_data = {algorithm: self.load_algorithm_data(algorithm) for algorithm in changed}
+            if any(algorithm not in cube["algorithms"] or df.empty for algorithm, df in changed_data.items()):
+                # An algorithm joins or leaves the cube (e.g. a CSV caught mid-write)
+                return self._rebuild_cube(loaded, fingerprints)
+            
+            item_index = pd.Index(cube["item_ids"])
+            affected = np.zeros(len(item_index), dtype=bool)
+            
+            for algorithm, df in changed_data.items():
+                algo_idx = cube["algorithms"].index(algorithm)
+                forecasts, available = self._algorithm_slice(item_index, df)
+                
+                affected |= (forecasts != cube["forecasts"][:, algo_idx]).any(axis=1)
+                affected |= available != cube["available"][:, algo_idx]
+                
+                cube["forecasts"][:, algo_idx] = forecasts
+                cube["available"][:, algo_idx] = available
+            
+            rows = np.flatnonzero(affected)
+            print(f"♻️  Refreshed {', '.join(changed)}: re-selecting {len(rows)} of {len(item_index)} items")
+            
+            if len(rows):
+                cube["annual_totals"][rows] = self._annual_totals(cube["forecasts"][rows])
+                partial = self.select_best_algorithms_batch(
+                    cube["forecasts"][rows], cube["available"][rows], cube["historical_totals"][rows]
+                )
+                for key, values in partial.items():
+                    selection[key][rows] = values
+        
+        self.forecast_cube = cube
+        self.selection = selection
+        if changed:
+            self.save_cache(fingerprints)
+        return True
+    
+    def _rebuild_cube(self, loaded: List[str], fingerprints: Dict[str, Any]) -> bool:
+        """Build the cube and selection from every loaded algorithm, skipping empty files"""
+        all_data = {algorithm: self.load_algorithm_data(algorithm) for algorithm in loaded}
+        all_data = {algorithm: df for algorithm, df in all_data.items() if not df.empty}
+        
+        if not all_data:
+            print("❌ No data loaded from any algorithm")
+            return False
+        
+        self.forecast_cube = self.build_forecast_cube(all_data)
+        self.selection = self.select_best_algorithms_batch(
+            self.forecast_cube["forecasts"], self.forecast_cube["available"],
+            self.forecast_cube["historical_totals"]
+        )
+        self.save_cache(fingerprints)
+        return True
+    
+    def refresh_snapshot(self) -> str:
+        """
+        Make sure the dashboard snapshot reflects the latest algorithm outputs
         
+        When the snapshot was built from the current source files nothing is
+        loaded at all; otherwise the cube is updated incrementally and a new
+        snapshot written.
+        
+        Returns:
+            Snapshot directory, or None if no forecast data is available
+        """
+        fingerprints = self.source_fingerprints()
+        manifest = ForecastSnapshot.read_manifest(self.snapshot_directory)
+        
+        if manifest is not None and manifest["fingerprints"] == fingerprints:
+            return self.snapshot_directory
+        
+        if not self.update_cube():
+            return None
+        
+        return self.save_snapshot(fingerprints)
+    
+    def save_snapshot(self, fingerprints: Dict[str, Any] = None) -> str:
+        """Write the current cube and selection as a compact binary snapshot"""
+        if self.forecast_cube is None:
+            raise ValueError("No forecast cube available. Run consolidate_data() first.")
+        
+        if fingerprints is None:
+            fingerprints = self.source_fingerprints()
+        
+        ForecastSnapshot.write(self.snapshot_directory, self.forecast_cube, self.selection, fingerprints)
+        print(f"💾 Forecast snapshot saved to: {self.snapshot_directory}")
+        return self.snapshot_directory
+    
+    def _materialize(self, cube: Dict[str, Any], selection: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """Build the consolidated dictionary from a cube and its selection"""
         consolidated = {
             "metadata": {
-                "total_items": len(unique_items),
-                "algorithms_loaded": list(all_data.keys()),
+                "total_items": len(cube["item_ids"]),
+                "algorithms_loaded": cube["algorithms"],
                 "load_timestamp": datetime.now().isoformat()
             },
             "items": []
         }
         
-        # Process each item
-        for item_id in unique_items:
-            item_data = self._process_item(item_id, all_data)
+        # Materialize the per-item structure
+        for idx in range(len(cube["item_ids"])):
+            item_data = self._cube_item(cube, selection, idx)
             if item_data:
                 consolidated["items"].append(item_data)
         
+        self.forecast_cube = cube
+        self.selection = selection
         self.consolidated_data = consolidated
         print(f"✅ Consolidated data for {len(consolidated['items'])} items")
         return consolidated
     
+    def save_cache(self, fingerprints: Dict[str, Any]) -> str:
+        """Persist the current cube, selection and source fingerprints"""
+        if self.forecast_cube is None:
+            raise ValueError("No forecast cube available. Run consolidate_data() first.")
+        
+        os.makedirs(self.cache_directory, exist_ok=True)
+        cube, selection = self.forecast_cube, self.selection
+        
+        np.savez(
+            os.path.join(self.cache_directory, "forecast_cube.npz"),
+            forecasts=cube["forecasts"],
+            available=cube["available"],
+            annual_totals=cube["annual_totals"],
+            historical_totals=cube["historical_totals"],
+            **{f"selection_{key}": values for key, values in selection.items()}
+        )
+        
+        manifest = {
+            "algorithms": cube["algorithms"],
+            # Every source compared on the next update, not only the algorithms in the cube
+            "fingerprints": {algorithm: fingerprint for algorithm, fingerprint in fingerprints.items()
+                             if fingerprint is not None},
+            "item_ids": cube["item_ids"],
+            "item_names": cube["item_names"],
+            "categories": cube["categories"],
+            "saved_timestamp": datetime.now().isoformat()
+        }
+        
+        # Manifest is written last so a partial save is never picked up
+        manifest_path = os.path.join(self.cache_directory, "manifest.json")
+        with open(manifest_path + ".tmp", 'w') as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+        
+        return self.cache_directory
+    
+    def load_cache(self) -> Dict[str, Any]:
+        """Load the persisted cube written by save_cache (None if missing or unreadable)"""
+        manifest_path = os.path.join(self.cache_directory, "manifest.json")
+        arrays_path = os.path.join(self.cache_directory, "forecast_cube.npz")
+        
+        if not (os.path.exists(manifest_path) and os.path.exists(arrays_path)):
+            return None
+        
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            
+            with np.load(arrays_path) as arrays:
+                cube = {
+                    "algorithms": manifest["algorithms"],
+                    "item_ids": manifest["item_ids"],
+                    "item_names": manifest["item_names"],
+                    "categories": manifest["categories"],
+                    "historical_totals": arrays["historical_totals"],
+                    "forecasts": arrays["forecasts"],
+                    "available": arrays["available"],
+                    "annual_totals": arrays["annual_totals"]
+                }
+                selection = {key[len("selection_"):]: arrays[key] for key in arrays.files
+                             if key.startswith("selection_")}
+            
+            return {
+                "algorithms": manifest["algorithms"],
+                "fingerprints": manifest["fingerprints"],
+                "cube": cube,
+                "selection": selection
+            }
+            
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable consolidation cache: {e}")
+            return None
+    
+    def build_forecast_cube(self, all_data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """
+        Pivot the per-algorithm detailed forecasts into dense arrays
+        
+        Items are taken from the first loaded algorithm (as in _process_item) and
+        the algorithm axis follows the load order, so ties resolve the same way.
+        
+        Args:
+            all_data: Detailed forecast DataFrames keyed by algorithm
+            
+        Returns:
+            Dictionary with item metadata, a (items x algorithms x 12) forecast
+            cube, an (items x algorithms) availability mask and annual totals
+        """
+        algorithms = list(all_data.keys())
+        first_df = all_data[algorithms[0]]
+        
+        # First row per item carries the metadata
+        first_rows = first_df.drop_duplicates('Item_ID')
+        item_index = pd.Index(first_rows['Item_ID'])
+        
+        n_items = len(item_index)
+        forecasts = np.zeros((n_items, len(algorithms), 12))
+        available = np.zeros((n_items, len(algorithms)), dtype=bool)
+        
+        for algo_idx, algorithm in enumerate(algorithms):
+            forecasts[:, algo_idx], available[:, algo_idx] = self._algorithm_slice(
+                item_index, all_data[algorithm]
+            )
+        
+        return {
+            "algorithms": algorithms,
+            "item_ids": item_index.tolist(),
+            "item_names": first_rows['Item_Name'].tolist(),
+            "categories": first_rows['Category'].tolist(),
+            "historical_totals": first_rows['Historical_Total'].to_numpy().astype(np.int64),
+            "forecasts": forecasts,
+            "available": available,
+            "annual_totals": self._annual_totals(forecasts)
+        }
+    
+    def _algorithm_slice(self, item_index: pd.Index, df: pd.DataFrame) -> tuple:
+        """Monthly forecasts (items x 12) and availability (items,) of one algorithm"""
+        forecasts = np.zeros((len(item_index), 12))
+        available = np.zeros(len(item_index), dtype=bool)
+        
+        rows = item_index.get_indexer(df['Item_ID'])
+        available[rows[rows >= 0]] = True
+        
+        # Only the first row per (item, month) counts, months outside 1-12 are ignored
+        monthly = df[(rows >= 0) & df['Month'].between(1, 12)]
+        monthly = monthly.drop_duplicates(['Item_ID', 'Month'])
+        month_rows = item_index.get_indexer(monthly['Item_ID'])
+        month_cols = monthly['Month'].to_numpy(dtype=int) - 1
+        forecasts[month_rows, month_cols] = monthly['Forecast_Value'].to_numpy(dtype=float)
+        
+        return forecasts, available
+    
+    def _annual_totals(self, forecasts: np.ndarray) -> np.ndarray:
+        """Sum months sequentially so totals match the per-item sum() exactly"""
+        annual_totals = np.zeros(forecasts.shape[:2])
+        for month in range(forecasts.shape[2]):
+            annual_totals += forecasts[:, :, month]
+        return annual_totals
+    
+    def _cube_item(self, cube: Dict[str, Any], selection: Dict[str, np.ndarray], idx: int) -> Dict[str, Any]:
+        """
+        Materialize the consolidated record for a single item of the cube
+        
+        Only the reason code is stored; the reasoning text is built with
+        selection_reasoning where an item is displayed.
+        """
+        try:
+            algorithms = cube["algorithms"]
+            available = np.flatnonzero(cube["available"][idx])
+            
+            if len(available) == 0:
+                return None
+            
+            monthly_forecasts = {algorithms[a]: cube["forecasts"][idx, a].tolist() for a in available}
+            annual_totals = {algorithms[a]: float(cube["annual_totals"][idx, a]) for a in available}
+            
+            return {
+                "item_id": cube["item_ids"][idx],
+                "item_name": cube["item_names"][idx],
+                "category": cube["categories"][idx],
+                "historical_total": int(cube["historical_totals"][idx]),
+                "monthly_forecasts": monthly_forecasts,
+                "annual_totals": annual_totals,
+                "selected_model": algorithms[selection["selected_index"][idx]],
+                "reason_code": int(selection["reason_code"][idx]),
+                "algorithms_available": list(monthly_forecasts.keys())
+            }
+            
+        except Exception as e:
+            print(f"❌ Error processing item {cube['item_ids'][idx]}: {e}")
+            return None
+    
     def _process_item(self, item_id: str, all_data: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
         """Process forecasting data for a single item"""
         try:
@@ -206,6 +558,128 @@ class ForecastDataLoader:
         
         return best_algo, reasoning
     
+    def select_best_algorithms_batch(self, forecasts: np.ndarray, available: np.ndarray,
+                                     historical_totals: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized version of _select_best_algorithm for all items at once
+        
+        Applies the same rules with masked reductions over the algorithm axis:
+        zero-history rule, non-positive filtering, 2-sigma outlier screen around
+        the median ratio, closest-to-median-variance pick and the closest-to-1.0
+        fallback. Reasoning strings are not built here, see selection_reasoning.
+        
+        Args:
+            forecasts: Monthly forecasts, shape (items, algorithms, months)
+            available: Mask of algorithms that produced a forecast, shape (items, algorithms)
+            historical_totals: Historical demand per item, shape (items,)
+            
+        Returns:
+            Dictionary with selected algorithm indices, reason codes and the
+            per-algorithm arrays needed to describe the selection later
+        """
+        forecasts = np.asarray(forecasts, dtype=float)
+        available = np.asarray(available, dtype=bool)
+        historical = np.asarray(historical_totals, dtype=float)
+        
+        annual = self._annual_totals(forecasts)
+        
+        # First available algorithm is the default pick
+        first_available = np.argmax(available, axis=1)
+        
+        valid = available & (annual > 0)
+        n_valid = valid.sum(axis=1)
+        has_history = historical != 0
+        
+        # Forecast ratios (forecast/historical), NaN where masked out
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = np.where(valid & has_history[:, None], annual / historical[:, None], np.nan)
+        
+        with warnings.catch_warnings():
+            # Rows without any valid algorithm are handled by the reason codes below
+            warnings.simplefilter('ignore', RuntimeWarning)
+            median_ratio = np.nanmedian(ratios, axis=1)
+            std_ratio = np.nanstd(ratios, axis=1)
+            
+            deviation = ratios - median_ratio[:, None]
+            outliers = valid & (np.abs(deviation) > 2 * std_ratio[:, None]) & (n_valid > 2)[:, None]
+            reasonable = valid & ~outliers
+            
+            # Prefer the algorithm closest to the median monthly variance
+            monthly_variance = np.std(forecasts, axis=2)
+            variances = np.where(reasonable, monthly_variance, np.nan)
+            median_variance = np.nanmedian(variances, axis=1)
+        
+        variance_distance = np.where(reasonable, np.abs(variances - median_variance[:, None]), np.inf)
+        balanced_pick = np.argmin(variance_distance, axis=1)
+        
+        ratio_distance = np.where(valid, np.abs(np.nan_to_num(ratios) - 1.0), np.inf)
+        closest_pick = np.argmin(ratio_distance, axis=1)
+        
+        any_reasonable = reasonable.any(axis=1)
+        
+        reason_codes = np.full(len(historical), REASON_CLOSEST_TO_HISTORY, dtype=np.int8)
+        reason_codes[any_reasonable] = REASON_BALANCED
+        reason_codes[n_valid == 0] = REASON_ALL_ZERO
+        reason_codes[~has_history] = REASON_NO_HISTORY
+        
+        selected = np.where(any_reasonable, balanced_pick, closest_pick)
+        selected = np.where(reason_codes <= REASON_ALL_ZERO, first_available, selected)
+        
+        return {
+            "selected_index": selected,
+            "reason_code": reason_codes,
+            "annual_totals": annual,
+            "outliers": outliers,
+            "overestimates": outliers & (deviation > 0)
+        }
+    
+    def selection_reasoning(self, selection: Dict[str, np.ndarray], idx: int,
+                            algorithms: List[str], historical_total: int) -> str:
+        """
+        Build the human-readable reasoning for one item of a batched selection
+        
+        Only called for items that are actually displayed, so the string work
+        stays proportional to what the user sees.
+        
+        Args:
+            selection: Output of select_best_algorithms_batch
+            idx: Item position in the batch
+            algorithms: Algorithm names in cube order
+            historical_total: Historical demand of the item
+            
+        Returns:
+            Reasoning string matching _select_best_algorithm
+        """
+        reason = selection["reason_code"][idx]
+        
+        if reason == REASON_NO_HISTORY:
+            return "No historical demand - any algorithm suitable"
+        
+        if reason == REASON_ALL_ZERO:
+            return "All algorithms predict zero demand - choosing first available"
+        
+        if reason == REASON_CLOSEST_TO_HISTORY:
+            return "Closest to historical demand pattern among available algorithms"
+        
+        annual = selection["annual_totals"][idx]
+        selected_annual = annual[selection["selected_index"][idx]]
+        
+        outlier_info = []
+        for algo_idx in np.flatnonzero(selection["outliers"][idx]):
+            if selection["overestimates"][idx, algo_idx]:
+                outlier_info.append(f"{algorithms[algo_idx]} overestimates ({annual[algo_idx]:.0f} vs historical {historical_total})")
+            else:
+                outlier_info.append(f"{algorithms[algo_idx]} underestimates significantly")
+        
+        reasoning_parts = [
+            f"Selected for balanced forecasting approach ({selected_annual:.0f} annual vs {historical_total} historical)"
+        ]
+        
+        if outlier_info:
+            reasoning_parts.append("Avoided: " + "; ".join(outlier_info[:2]))
+        
+        return ". ".join(reasoning_parts)
+    
     def save_consolidated_data(self, filename: str = None) -> str:
         """Save consolidated data to JSON file"""
         if not self.consolidated_data:
@@ -286,6 +760,7 @@ def main():
     
     # Save consolidated data
     saved_file = loader.save_consolidated_data()
+    loader.save_snapshot()
     
     # Print summary statistics
     stats = loader.get_summary_stats()
@@ -302,7 +777,11 @@ def main():
         print(f"\n🔍 Sample Item: {sample_item['item_id']}")
         print(f"  Name: {sample_item['item_name'][:50]}...")
         print(f"  Selected Model: {sample_item['selected_model']}")
-        print(f"  Reasoning: {sample_item['selected_reasoning']}")
+        reasoning = loader.selection_reasoning(
+            loader.selection, loader.forecast_cube["item_ids"].index(sample_item["item_id"]),
+            loader.forecast_cube["algorithms"], sample_item["historical_total"]
+        )
+        print(f"  Reasoning: {reasoning}")
         print(f"  Annual Totals: {sample_item['annual_totals']}")
     
     print(f"\n✅ Data consolidation complete! File saved: {saved_file}")
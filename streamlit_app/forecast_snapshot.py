@@ -0,0 +1,229 @@
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Any
+import numpy as np
+
+class ForecastSnapshot:
+    """
+    Compact binary snapshot of the consolidated forecasts for the dashboard
+    
+    A snapshot is a directory of .npy files plus a small manifest:
+    - forecasts.npy: float32 cube of shape (items, algorithms, 12)
+    - selected_index.npy / category_codes.npy: integer-coded columns whose
+      lookup tables (algorithms, categories) live in the manifest
+    - strings.bin + string_offsets.npy: UTF-8 string table holding item IDs
+      and names, decoded one entry at a time
+    
+    Arrays are opened memory-mapped, so loading costs no parsing and the
+    pages are only read for the items that are actually displayed.
+    """
+    
+    FORMAT_VERSION = 1
+    MANIFEST_FILE = "manifest.json"
+    
+    def __init__(self, directory: str, manifest: Dict[str, Any], arrays: Dict[str, np.ndarray],
+                 strings: np.ndarray, string_offsets: np.ndarray):
+        self.directory = directory
+        self.manifest = manifest
+        self.arrays = arrays
+        self._strings = strings
+        self._string_offsets = string_offsets
+        
+        self.algorithms = manifest["algorithms"]
+        self.categories = manifest["categories"]
+        self.n_items = manifest["total_items"]
+    
+    @classmethod
+    def write(cls, directory: str, cube: Dict[str, Any], selection: Dict[str, np.ndarray],
+              fingerprints: Dict[str, Any] = None) -> str:
+        """
+        Write a snapshot from a forecast cube and its batched selection
+        
+        Args:
+            directory: Target snapshot directory (replaced atomically)
+            cube: Cube dictionary from ForecastDataLoader.build_forecast_cube
+            selection: Output of ForecastDataLoader.select_best_algorithms_batch
+            fingerprints: Source file fingerprints the snapshot was built from
+        
+        Returns:
+            Path of the written snapshot directory
+        """
+        n_items = len(cube["item_ids"])
+        tmp_directory = f"{directory}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        
+        # Integer-code the categories
+        categories, category_codes = np.unique(np.asarray(cube["categories"], dtype=str), return_inverse=True)
+        
+        # String table: item IDs first, then item names
+        numeric_ids = all(isinstance(item_id, (int, np.integer)) for item_id in cube["item_ids"])
+        encoded = [str(value).encode("utf-8") for value in list(cube["item_ids"]) + list(cube["item_names"])]
+        string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        string_offsets[1:] = np.cumsum([len(value) for value in encoded])
+        
+        with open(os.path.join(tmp_directory, "strings.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        
+        arrays = {
+            "forecasts": np.asarray(cube["forecasts"], dtype=np.float32),
+            "available": np.asarray(cube["available"], dtype=bool),
+            "historical_totals": np.asarray(cube["historical_totals"], dtype=np.int64),
+            "category_codes": category_codes.astype(np.int32),
+            "string_offsets": string_offsets,
+            # Selection columns, kept so reasoning can be materialized per item
+            "selected_index": np.asarray(selection["selected_index"], dtype=np.int8),
+            "reason_code": np.asarray(selection["reason_code"], dtype=np.int8),
+            "annual_totals": np.asarray(selection["annual_totals"], dtype=np.float64),
+            "outliers": np.asarray(selection["outliers"], dtype=bool),
+            "overestimates": np.asarray(selection["overestimates"], dtype=bool)
+        }
+        
+        for name, values in arrays.items():
+            np.save(os.path.join(tmp_directory, f"{name}.npy"), values)
+        
+        manifest = {
+            "format_version": cls.FORMAT_VERSION,
+            "total_items": n_items,
+            "algorithms": list(cube["algorithms"]),
+            "categories": categories.tolist(),
+            "numeric_item_ids": numeric_ids,
+            "fingerprints": fingerprints or {},
+            "created_timestamp": datetime.now().isoformat()
+        }
+        
+        with open(os.path.join(tmp_directory, cls.MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+        
+        # Swap the new snapshot in; open memory maps keep reading the old files
+        old_directory = f"{directory}.old-{os.getpid()}"
+        if os.path.exists(directory):
+            os.rename(directory, old_directory)
+        os.rename(tmp_directory, directory)
+        shutil.rmtree(old_directory, ignore_errors=True)
+        
+        return directory
+    
+    @classmethod
+    def read_manifest(cls, directory: str) -> Dict[str, Any]:
+        """Read a snapshot manifest without opening the arrays (None if missing)"""
+        manifest_path = os.path.join(directory, cls.MANIFEST_FILE)
+        
+        if not os.path.exists(manifest_path):
+            return None
+        
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        
+        if manifest.get("format_version") != cls.FORMAT_VERSION:
+            return None
+        
+        return manifest
+    
+    @classmethod
+    def load(cls, directory: str) -> "ForecastSnapshot":
+        """
+        Open a snapshot with every array memory-mapped read-only
+        
+        Args:
+            directory: Snapshot directory written by ForecastSnapshot.write
+        
+        Returns:
+            ForecastSnapshot instance
+        """
+        manifest = cls.read_manifest(directory)
+        if manifest is None:
+            raise ValueError(f"No compatible forecast snapshot found in {directory}")
+        
+        arrays = {}
+        for filename in os.listdir(directory):
+            if filename.endswith(".npy"):
+                arrays[filename[:-4]] = np.load(os.path.join(directory, filename), mmap_mode="r")
+        
+        strings_path = os.path.join(directory, "strings.bin")
+        if os.path.getsize(strings_path) > 0:
+            strings = np.memmap(strings_path, dtype=np.uint8, mode="r")
+        else:
+            strings = np.zeros(0, dtype=np.uint8)
+        
+        return cls(directory, manifest, arrays, strings, arrays.pop("string_offsets"))
+    
+    def _string(self, index: int) -> str:
+        start, end = self._string_offsets[index], self._string_offsets[index + 1]
+        return self._strings[start:end].tobytes().decode("utf-8")
+    
+    def item_id(self, idx: int):
+        """Item ID of the item at position idx"""
+        value = self._string(idx)
+        return int(value) if self.manifest["numeric_item_ids"] else value
+    
+    def item_name(self, idx: int) -> str:
+        """Item name of the item at position idx"""
+        return self._string(self.n_items + idx)
+    
+    def category(self, idx: int) -> str:
+        """Category of the item at position idx"""
+        return self.categories[self.arrays["category_codes"][idx]]
+    
+    @property
+    def selection(self) -> Dict[str, np.ndarray]:
+        """Selection columns in the format of ForecastDataLoader.select_best_algorithms_batch"""
+        return {key: self.arrays[key] for key in
+                ["selected_index", "reason_code", "annual_totals", "outliers", "overestimates"]}
+    
+    def selected_model(self, idx: int) -> str:
+        """Name of the algorithm selected for the item at position idx"""
+        return self.algorithms[self.arrays["selected_index"][idx]]
+    
+    def item(self, idx: int) -> Dict[str, Any]:
+        """
+        Materialize one item in the consolidated-data layout (without reasoning)
+        
+        Args:
+            idx: Item position in the snapshot
+        
+        Returns:
+            Dictionary with metadata, monthly forecasts and annual totals
+        """
+        available = np.flatnonzero(self.arrays["available"][idx])
+        forecasts = np.asarray(self.arrays["forecasts"][idx], dtype=np.float64)
+        
+        monthly_forecasts = {self.algorithms[a]: forecasts[a].tolist() for a in available}
+        annual_totals = {self.algorithms[a]: float(self.arrays["annual_totals"][idx, a]) for a in available}
+        
+        return {
+            "item_id": self.item_id(idx),
+            "item_name": self.item_name(idx),
+            "category": self.category(idx),
+            "historical_total": int(self.arrays["historical_totals"][idx]),
+            "monthly_forecasts": monthly_forecasts,
+            "annual_totals": annual_totals,
+            "selected_model": self.selected_model(idx),
+            "algorithms_available": list(monthly_forecasts.keys())
+        }
+    
+    def get_summary_stats(self) -> Dict[str, Any]:
+        """Summary statistics computed directly on the columnar arrays"""
+        historical_totals = np.asarray(self.arrays["historical_totals"])
+        selection_counts = np.bincount(self.arrays["selected_index"], minlength=len(self.algorithms))
+        category_counts = np.bincount(self.arrays["category_codes"], minlength=len(self.categories))
+        
+        return {
+            "total_items": self.n_items,
+            "algorithms_available": self.algorithms,
+            "algorithm_selection_distribution": {
+                algorithm: int(count) for algorithm, count in zip(self.algorithms, selection_counts) if count
+            },
+            "category_distribution": {
+                category: int(count) for category, count in zip(self.categories, category_counts) if count
+            },
+            "historical_demand_stats": {
+                "min": int(historical_totals.min()) if self.n_items else 0,
+                "max": int(historical_totals.max()) if self.n_items else 0,
+                "mean": float(historical_totals.mean()) if self.n_items else 0.0,
+                "median": float(np.median(historical_totals)) if self.n_items else 0.0,
+                "zero_demand_items": int(np.sum(historical_totals == 0))
+            }
+        }
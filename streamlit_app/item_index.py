@@ -0,0 +1,76 @@
+from typing import Optional
+import numpy as np
+from forecast_snapshot import ForecastSnapshot
+
+class ItemIndex:
+    """
+    Server-side search index over the items of a forecast snapshot
+    
+    Built once per snapshot. Prefix search uses binary search over sorted,
+    lower-cased item IDs and names; category and selected-model filters are
+    vectorized masks over the snapshot's integer-coded columns. Queries
+    return item positions only, nothing is materialized until a page is shown.
+    """
+    
+    def __init__(self, snapshot: ForecastSnapshot):
+        self.snapshot = snapshot
+        n_items = snapshot.n_items
+        
+        # One sorted key array per searchable field
+        self._id_keys, self._id_order = self._sorted_keys(
+            [str(snapshot.item_id(idx)).lower() for idx in range(n_items)]
+        )
+        self._name_keys, self._name_order = self._sorted_keys(
+            [snapshot.item_name(idx).lower() for idx in range(n_items)]
+        )
+    
+    @staticmethod
+    def _sorted_keys(keys: list) -> tuple:
+        keys = np.asarray(keys, dtype=str)
+        order = np.argsort(keys, kind="stable")
+        return keys[order], order
+    
+    @staticmethod
+    def _prefix_range(sorted_keys: np.ndarray, order: np.ndarray, prefix: str) -> np.ndarray:
+        start = np.searchsorted(sorted_keys, prefix, side="left")
+        end = np.searchsorted(sorted_keys, prefix + "\U0010ffff", side="left")
+        return order[start:end]
+    
+    def search(self, prefix: str = "", category: Optional[str] = None,
+               selected_model: Optional[str] = None) -> np.ndarray:
+        """
+        Find items matching a prefix and optional filters
+        
+        Args:
+            prefix: Case-insensitive prefix of the item ID or item name
+            category: Only keep items of this category
+            selected_model: Only keep items whose selected algorithm is this one
+        
+        Returns:
+            Sorted array of matching item positions in the snapshot
+        """
+        mask = np.ones(self.snapshot.n_items, dtype=bool)
+        
+        prefix = prefix.strip().lower()
+        if prefix:
+            mask[:] = False
+            mask[self._prefix_range(self._id_keys, self._id_order, prefix)] = True
+            mask[self._prefix_range(self._name_keys, self._name_order, prefix)] = True
+        
+        if category is not None:
+            if category not in self.snapshot.categories:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.snapshot.arrays["category_codes"] == self.snapshot.categories.index(category)
+        
+        if selected_model is not None:
+            if selected_model not in self.snapshot.algorithms:
+                return np.zeros(0, dtype=np.int64)
+            mask &= self.snapshot.arrays["selected_index"] == self.snapshot.algorithms.index(selected_model)
+        
+        return np.flatnonzero(mask)
+    
+    @staticmethod
+    def page(positions: np.ndarray, page_number: int, page_size: int) -> np.ndarray:
+        """Slice one page (1-based) out of a search result"""
+        start = (page_number - 1) * page_size
+        return positions[start:start + page_size]
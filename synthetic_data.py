@@ -0,0 +1,346 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, Optional, Tuple
+
+MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+CATEGORIES = ['Parts', 'Filters', 'Lubricants', 'Electrical', 'Accessories']
+
+# Syntetos-Boylan classes with the ADI and CV² ranges items are drawn from
+DEMAND_PATTERNS = {
+    'Smooth': {'adi': (1.0, 1.32), 'cv2': (0.05, 0.49)},
+    'Erratic': {'adi': (1.0, 1.32), 'cv2': (0.49, 2.0)},
+    'Intermittent': {'adi': (1.32, 6.0), 'cv2': (0.05, 0.49)},
+    'Lumpy': {'adi': (1.32, 6.0), 'cv2': (0.49, 2.0)}
+}
+
+DEFAULT_PATTERN_MIX = {'Smooth': 0.2, 'Erratic': 0.15, 'Intermittent': 0.4, 'Lumpy': 0.25}
+
+class SyntheticCatalogue:
+    """
+    Synthetic spare parts catalogue in the layout every load_data expects
+    
+    Items are generated in fixed-size blocks, each with its own random
+    stream, so the output is identical however it is written and memory
+    stays bounded by one block. Writers stream the blocks to an .xlsx
+    workbook (openpyxl write-only mode) or to a binary equivalent (a
+    memory-mapped .npy demand matrix plus item metadata).
+    """
+    
+    BLOCK_SIZE = 4096
+    
+    def __init__(self,
+                 n_items: int,
+                 pattern_mix: Optional[Dict[str, float]] = None,
+                 seasonal_fraction: float = 0.4,
+                 zero_demand_fraction: float = 0.05,
+                 late_launch_fraction: float = 0.25,
+                 mean_demand: float = 12.0,
+                 start_year: int = 2021,
+                 end_year: int = 2025,
+                 last_year_months: int = 7,
+                 seed: int = 42):
+        """
+        Initialize the catalogue definition
+        
+        Args:
+            n_items: Number of items
+            pattern_mix: Share of items per demand pattern (keys of DEMAND_PATTERNS)
+            seasonal_fraction: Share of items with yearly seasonality
+            zero_demand_fraction: Share of items without any demand
+            late_launch_fraction: Share of items whose history starts after the first month
+            mean_demand: Median of the per-item mean demand size
+            start_year: First year of history
+            end_year: Last (incomplete) year of history
+            last_year_months: Number of months available in the last year
+            seed: Random seed
+        """
+        pattern_mix = pattern_mix or DEFAULT_PATTERN_MIX
+        unknown = set(pattern_mix) - set(DEMAND_PATTERNS)
+        if unknown:
+            raise ValueError(f"Unknown demand patterns: {sorted(unknown)}")
+        
+        self.n_items = n_items
+        self.pattern_names = list(pattern_mix.keys())
+        self.pattern_weights = np.array(list(pattern_mix.values()), dtype=np.float64)
+        self.pattern_weights /= self.pattern_weights.sum()
+        self.seasonal_fraction = seasonal_fraction
+        self.zero_demand_fraction = zero_demand_fraction
+        self.late_launch_fraction = late_launch_fraction
+        self.mean_demand = mean_demand
+        self.start_year = start_year
+        self.end_year = end_year
+        self.last_year_months = last_year_months
+        self.seed = seed
+        
+        self.n_months = (end_year - start_year) * 12 + last_year_months
+    
+    @property
+    def time_columns(self) -> list:
+        """Column names of the monthly history ("2021-January", ...)"""
+        columns = []
+        for year in range(self.start_year, self.end_year + 1):
+            n_year_months = self.last_year_months if year == self.end_year else 12
+            columns += [f"{year}-{month}" for month in MONTH_NAMES[:n_year_months]]
+        return columns
+    
+    def config(self) -> Dict:
+        """Parameters the catalogue was generated with"""
+        return {
+            'n_items': self.n_items,
+            'pattern_mix': dict(zip(self.pattern_names, self.pattern_weights.tolist())),
+            'seasonal_fraction': self.seasonal_fraction,
+            'zero_demand_fraction': self.zero_demand_fraction,
+            'late_launch_fraction': self.late_launch_fraction,
+            'mean_demand': self.mean_demand,
+            'start_year': self.start_year,
+            'end_year': self.end_year,
+            'last_year_months': self.last_year_months,
+            'seed': self.seed
+        }
+    
+    def generate_block(self, block_index: int) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Generate one block of items
+        
+        Args:
+            block_index: Block number (items block_index * BLOCK_SIZE onwards)
+        
+        Returns:
+            Tuple of (item info DataFrame, demand array of shape (items, n_months))
+        """
+        start = block_index * self.BLOCK_SIZE
+        stop = min(start + self.BLOCK_SIZE, self.n_items)
+        n_items = stop - start
+        rng = np.random.default_rng([self.seed, block_index])
+        
+        # Demand pattern and its ADI / CV² targets
+        pattern_codes = rng.choice(len(self.pattern_names), size=n_items, p=self.pattern_weights)
+        adi_bounds = np.array([DEMAND_PATTERNS[name]['adi'] for name in self.pattern_names])[pattern_codes]
+        cv2_bounds = np.array([DEMAND_PATTERNS[name]['cv2'] for name in self.pattern_names])[pattern_codes]
+        adi = rng.uniform(adi_bounds[:, 0], adi_bounds[:, 1])
+        cv2 = rng.uniform(cv2_bounds[:, 0], cv2_bounds[:, 1])
+        
+        # Yearly seasonality
+        seasonal_amplitude = np.where(rng.random(n_items) < self.seasonal_fraction,
+                                      rng.uniform(0.2, 0.8, size=n_items), 0.0)
+        seasonal_phase = rng.integers(0, 12, size=n_items)
+        months = np.arange(self.n_months)
+        seasonality = 1 + seasonal_amplitude[:, None] * np.sin(
+            2 * np.pi * (months[None, :] - seasonal_phase[:, None]) / 12
+        )
+        
+        # Demand occurrences (probability 1/ADI) and gamma sizes with the target CV²
+        mean_size = self.mean_demand * rng.lognormal(mean=0.0, sigma=0.8, size=n_items)
+        shape = 1 / cv2
+        occurs = rng.random((n_items, self.n_months)) < (1 / adi)[:, None]
+        sizes = rng.gamma(shape[:, None], (mean_size / shape)[:, None] * seasonality)
+        demand = np.where(occurs, np.maximum(np.round(sizes), 1), 0).astype(np.float64)
+        
+        demand[rng.random(n_items) < self.zero_demand_fraction] = 0
+        
+        # Months before launch are blank in the workbook
+        launch_month = np.where(rng.random(n_items) < self.late_launch_fraction,
+                                rng.integers(1, max(self.n_months // 2, 2), size=n_items), 0)
+        demand[months[None, :] < launch_month[:, None]] = np.nan
+        
+        item_numbers = np.arange(start + 1, stop + 1)
+        item_info = pd.DataFrame({
+            'item_id': [f"{number:08d}" for number in item_numbers],
+            'item_name': [f"SYNTHETIC PART {number}" for number in item_numbers],
+            'category': rng.choice(CATEGORIES, size=n_items),
+            'demand_pattern': np.array(self.pattern_names)[pattern_codes]
+        })
+        
+        return item_info, demand
+    
+    def iter_blocks(self) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+        """Yield (item info, demand) blocks covering the whole catalogue"""
+        n_blocks = (self.n_items + self.BLOCK_SIZE - 1) // self.BLOCK_SIZE
+        for block_index in range(n_blocks):
+            yield self.generate_block(block_index)
+    
+    def generate(self) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Whole catalogue in memory (small catalogues only)"""
+        blocks = list(self.iter_blocks())
+        if not blocks:
+            return pd.DataFrame(columns=['item_id', 'item_name', 'category', 'demand_pattern']), \
+                np.zeros((0, self.n_months))
+        return pd.concat([info for info, _ in blocks], ignore_index=True), np.vstack([demand for _, demand in blocks])
+    
+    def _header_rows(self) -> Tuple[list, list]:
+        year_row = [None, None, None]
+        month_row = ['ITEM ID', 'ITEM NAME', 'CATEGORY']
+        
+        for year in range(self.start_year, self.end_year + 1):
+            n_year_months = self.last_year_months if year == self.end_year else 12
+            year_row += [year] * (n_year_months + 1)
+            month_row += MONTH_NAMES[:n_year_months] + ['Total']
+        
+        year_row.append(None)
+        month_row.append('GRAND TOTAL')
+        return year_row, month_row
+    
+    def write_workbook(self, file_path: str) -> str:
+        """
+        Stream the catalogue to an .xlsx workbook in the sales workbook layout
+        
+        Row 0 holds the years, row 1 the month names with a Total column after
+        each year and a final GRAND TOTAL column; item rows start at row 2.
+        Rows are written in write-only mode, one block at a time.
+        
+        Args:
+            file_path: Target .xlsx path
+        
+        Returns:
+            Path of the written workbook
+        """
+        from openpyxl import Workbook
+        
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Sheet1')
+        for header_row in self._header_rows():
+            sheet.append(header_row)
+        
+        year_lengths = [self.last_year_months if year == self.end_year else 12
+                        for year in range(self.start_year, self.end_year + 1)]
+        year_ends = np.cumsum(year_lengths)
+        
+        for item_info, demand in self.iter_blocks():
+            year_totals = np.add.reduceat(np.nan_to_num(demand), year_ends - year_lengths, axis=1)
+            grand_totals = year_totals.sum(axis=1)
+            # Blank cells before launch, like the real workbook
+            values = np.where(np.isnan(demand), None, demand.astype(object))
+            
+            for row_idx, (item_id, item_name, category) in enumerate(
+                    zip(item_info['item_id'], item_info['item_name'], item_info['category'])):
+                row = [item_id, item_name, category]
+                start = 0
+                for year_idx, end in enumerate(year_ends):
+                    row += [None if value is None else int(value) for value in values[row_idx, start:end]]
+                    row.append(int(year_totals[row_idx, year_idx]))
+                    start = end
+                row.append(int(grand_totals[row_idx]))
+                sheet.append(row)
+        
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        workbook.save(file_path)
+        return file_path
+    
+    def write_binary(self, directory: str) -> str:
+        """
+        Stream the catalogue to its binary equivalent
+        
+        The directory holds demand.npy (float32, items x months, NaN before
+        launch), items.csv (item metadata and demand pattern) and
+        manifest.json (time columns and generator settings). demand.npy is
+        written through a memory map and can be opened with mmap_mode='r'.
+        
+        Args:
+            directory: Target directory
+        
+        Returns:
+            Path of the written directory
+        """
+        os.makedirs(directory, exist_ok=True)
+        demand_file = np.lib.format.open_memmap(
+            os.path.join(directory, 'demand.npy'), mode='w+', dtype=np.float32,
+            shape=(self.n_items, self.n_months)
+        )
+        items_path = os.path.join(directory, 'items.csv')
+        
+        row = 0
+        for block_index, (item_info, demand) in enumerate(self.iter_blocks()):
+            demand_file[row:row + len(demand)] = demand
+            row += len(demand)
+            item_info.to_csv(items_path, mode='w' if block_index == 0 else 'a',
+                             header=block_index == 0, index=False)
+        
+        demand_file.flush()
+        del demand_file
+        
+        manifest = {
+            'n_items': self.n_items,
+            'n_months': self.n_months,
+            'time_columns': self.time_columns,
+            'config': self.config()
+        }
+        with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        return directory
+
+def generate_demand(n_items: int, seed: int = 42, **kwargs) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Generate a synthetic catalogue in memory
+    
+    Args:
+        n_items: Number of items
+        seed: Random seed
+        **kwargs: Further SyntheticCatalogue settings
+    
+    Returns:
+        Tuple of (item info DataFrame, demand array of shape (n_items, n_months))
+    """
+    return SyntheticCatalogue(n_items, seed=seed, **kwargs).generate()
+
+def synthetic_workbook(n_items: int, seed: int = 42, directory: str = 'outputs/benchmarks/data') -> str:
+    """
+    Path of a synthetic workbook with n_items items, generated on first use
+    
+    Args:
+        n_items: Number of items
+        seed: Random seed
+        directory: Directory the generated workbooks are kept in
+    
+    Returns:
+        Path of the workbook
+    """
+    file_path = os.path.join(directory, f"synthetic_{n_items}_items_seed{seed}.xlsx")
+    
+    if not os.path.exists(file_path):
+        print(f"Generating synthetic catalogue with {n_items} items...")
+        SyntheticCatalogue(n_items, seed=seed).write_workbook(file_path)
+    
+    return file_path
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Generate synthetic spare parts catalogues")
+    parser.add_argument('--items', type=int, required=True, help="Number of items")
+    parser.add_argument('--output', required=True, help="Output .xlsx path, or directory with --format npy")
+    parser.add_argument('--format', choices=['xlsx', 'npy'], default='xlsx')
+    parser.add_argument('--mix', nargs='+', default=None, metavar='PATTERN=SHARE',
+                        help="Demand pattern mix, e.g. Smooth=0.2 Intermittent=0.5 Lumpy=0.3")
+    parser.add_argument('--seasonal-fraction', type=float, default=0.4)
+    parser.add_argument('--zero-fraction', type=float, default=0.05)
+    parser.add_argument('--late-launch-fraction', type=float, default=0.25)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    pattern_mix = None
+    if args.mix:
+        pattern_mix = {name: float(share) for name, share in (entry.split('=') for entry in args.mix)}
+    
+    catalogue = SyntheticCatalogue(
+        args.items,
+        pattern_mix=pattern_mix,
+        seasonal_fraction=args.seasonal_fraction,
+        zero_demand_fraction=args.zero_fraction,
+        late_launch_fraction=args.late_launch_fraction,
+        seed=args.seed
+    )
+    
+    if args.format == 'xlsx':
+        path = catalogue.write_workbook(args.output)
+    else:
+        path = catalogue.write_binary(args.output)
+    
+    print(f"Wrote {args.items} items to {path}")
+
+if __name__ == "__main__":
+    main()
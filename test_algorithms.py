@@ -7,20 +7,133 @@ import sys
 import os
 import warnings
 import traceback
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 warnings.filterwarnings('ignore')
 
 # Add algorithms to path
 sys.path.append('algorithms')
 
+from algorithms.core.instrumentation import Instrumentation
+from algorithms.core.feature_store import FeatureStore
+from algorithms.core.routing import DemandRouter
+from algorithms.core.triage import triage_items, bulk_forecasts
+from algorithms.core.checkpoint import run_with_checkpoint
+from algorithms.core.results import ForecastResults, ItemCatalog
+from algorithms.ingestion.demand_cube import read_demand_data
+
+# Algorithm name -> AlgorithmTester method, in reporting order
+ALGORITHM_TESTS = [
+    ('SARIMA', 'test_sarima'),
+    ('SBA', 'test_sba'),
+    ('Random_Forest', 'test_random_forest'),
+    ('XGBoost', 'test_xgboost'),
+    ('LSTM', 'test_lstm'),
+    ('Prophet', 'test_prophet')
+]
+
+# Environment variables read by the native thread pools (OpenMP/MKL/BLAS, XGBoost, TensorFlow)
+THREAD_LIMIT_ENV_VARS = [
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+    'TF_NUM_INTRAOP_THREADS',
+    'TF_NUM_INTEROP_THREADS'
+]
+
+@contextmanager
+def limited_threads(n_threads):
+    """
+    Cap the native thread pools of processes started inside this block
+    
+    The limits are read when numerical libraries load, so they only apply to
+    freshly spawned processes; the parent environment is restored on exit.
+    """
+    saved_env = {var: os.environ.get(var) for var in THREAD_LIMIT_ENV_VARS}
+    try:
+        for var in THREAD_LIMIT_ENV_VARS:
+            os.environ[var] = str(n_threads)
+        yield
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+def select_items(df, sample_size, item_ids=None):
+    """First sample_size items of a loaded DataFrame, restricted to item_ids when given"""
+    test_df = df.head(sample_size)
+    if item_ids is not None:
+        test_df = test_df[test_df['item_id'].isin(set(item_ids))]
+    return test_df
+
+def skipped_result(algo_name):
+    """Result of an algorithm that the router sent no items to"""
+    return {
+        'status': 'skipped',
+        'error': 'No items routed to this algorithm',
+        'algorithm': algo_name,
+        'execution_time': 'N/A',
+        'timestamp': datetime.now().isoformat()
+    }
+
+def run_algorithm_test(data_path, algo_name, sample_size, profile=None, feature_cache=None, item_ids=None,
+                       checkpoint_dir=None):
+    """
+    Run a single algorithm test and time it (module level so worker processes can call it)
+    
+    Args:
+        data_path: Path to the Excel data file
+        algo_name: Algorithm name from ALGORITHM_TESTS
+        sample_size: Number of items to test
+        profile: Instrumentation sampling mode (None, 'cprofile' or 'sampling')
+        feature_cache: Directory of the on-disk feature store (None for memory only)
+        item_ids: Items routed to the algorithm (None for every sampled item)
+        checkpoint_dir: Directory of per-item checkpoints (None to keep results in memory only)
+        
+    Returns:
+        Result dictionary with execution_time and timestamp
+    """
+    tester = AlgorithmTester(data_path, profile=profile, feature_cache=feature_cache, checkpoint_dir=checkpoint_dir)
+    test_func = getattr(tester, dict(ALGORITHM_TESTS)[algo_name])
+    
+    start_time = datetime.now()
+    result = test_func(sample_size, item_ids=item_ids)
+    end_time = datetime.now()
+    
+    result['execution_time'] = str(end_time - start_time)
+    result['timestamp'] = datetime.now().isoformat()
+    return result
+
 class AlgorithmTester:
-    def __init__(self, data_path: str = 'data/Sample_FiveYears_Sales_SpareParts.xlsx'):
+    def __init__(self, data_path: str = 'data/Sample_FiveYears_Sales_SpareParts.xlsx', profile=None,
+                 feature_cache=None, router=None, dead_after=None, checkpoint_dir=None, compact_results=False):
         self.data_path = data_path
+        self.profile = profile  # None, 'cprofile' or 'sampling'
+        # Optional DemandRouter; when set, each algorithm only sees the items routed to it
+        self.router = router
+        self.routing = None
+        # Months without a sale after which an item gets a zero forecast instead of a model run
+        self.dead_after = dead_after
+        # Features shared by Random Forest, XGBoost and LSTM; on disk when a cache
+        # directory is given so worker processes reuse each other's blocks
+        self.feature_cache = feature_cache
+        self.feature_store = FeatureStore(cache_dir=feature_cache) if feature_cache else None
+        # Completed items are flushed here in batches so an interrupted run can resume
+        self.checkpoint_dir = checkpoint_dir
+        # Item names, categories and histories shared by the compacted results of every algorithm
+        self.catalog = ItemCatalog() if compact_results else None
         self.results = {}
         self.test_summary = []
         
-    def test_sarima(self, sample_size=5):
+    def test_sarima(self, sample_size=5, item_ids=None):
         """Test SARIMA algorithm"""
         print("Testing SARIMA...")
+        instrumentation = Instrumentation('SARIMA', profile=self.profile)
         try:
             from algorithms.classical.sarima import SARIMAForecasting
             
@@ -28,145 +141,178 @@ class AlgorithmTester:
                 seasonal_period=12,
                 max_p=2, max_d=1, max_q=2,
                 max_P=1, max_D=1, max_Q=1,
-                auto_arima=True
+                auto_arima=True,
+                instrumentation=instrumentation
             )
+            instrumentation.start()
             
             # Load data using the algorithm's own loader
-            df = sarima.load_data(self.data_path)
+            with instrumentation.phase('load'):
+                df = sarima.load_data(self.data_path)
             if df.empty:
                 raise Exception("Failed to load data")
             
             # Use sample for testing
-            test_df = df.head(sample_size)
+            test_df = select_items(df, sample_size, item_ids)
             
-            results = sarima.fit_and_forecast(test_df, forecast_periods=12)
-            summary = sarima.create_forecast_summary(results)
+            results = self.forecast(sarima, test_df)
+            with instrumentation.phase('summary'):
+                summary = sarima.create_forecast_summary(results)
+            instrumentation.stop()
             
             return {
                 'status': 'success',
                 'results': results,
                 'summary': summary,
-                'algorithm': 'SARIMA'
+                'algorithm': 'SARIMA',
+                'instrumentation': instrumentation.to_dict()
             }
             
         except Exception as e:
             print(f"SARIMA failed: {str(e)}")
             traceback.print_exc()
+            instrumentation.stop()
             return {
                 'status': 'failed',
                 'error': str(e),
                 'algorithm': 'SARIMA'
             }
     
-    def test_sba(self, sample_size=5):
+    def test_sba(self, sample_size=5, item_ids=None):
         """Test SBA algorithm"""
         print("Testing SBA...")
+        instrumentation = Instrumentation('SBA', profile=self.profile)
         try:
             from algorithms.classical.sba_forecasting import SBAForecasting
             
-            sba = SBAForecasting(alpha=0.1, beta=0.1)
+            sba = SBAForecasting(alpha=0.1, beta=0.1, instrumentation=instrumentation)
+            instrumentation.start()
             
             # Load data using the algorithm's own loader
-            df = sba.load_data(self.data_path)
+            with instrumentation.phase('load'):
+                df = sba.load_data(self.data_path)
             if df.empty:
                 raise Exception("Failed to load data")
             
-            test_df = df.head(sample_size)
-            results = sba.fit_and_forecast(test_df, forecast_periods=12)
-            summary = sba.create_forecast_summary(results)
+            test_df = select_items(df, sample_size, item_ids)
+            results = self.forecast(sba, test_df)
+            with instrumentation.phase('summary'):
+                summary = sba.create_forecast_summary(results)
+            instrumentation.stop()
             
             return {
                 'status': 'success',
                 'results': results,
                 'summary': summary,
-                'algorithm': 'SBA'
+                'algorithm': 'SBA',
+                'instrumentation': instrumentation.to_dict()
             }
             
         except Exception as e:
             print(f"SBA failed: {str(e)}")
             traceback.print_exc()
+            instrumentation.stop()
             return {
                 'status': 'failed',
                 'error': str(e),
                 'algorithm': 'SBA'
             }
     
-    def test_random_forest(self, sample_size=5):
+    def test_random_forest(self, sample_size=5, item_ids=None):
         """Test Random Forest algorithm"""
         print("Testing Random Forest...")
+        instrumentation = Instrumentation('Random_Forest', profile=self.profile)
         try:
             from algorithms.machine_learning.random_forest import RandomForestForecasting
             
             rf = RandomForestForecasting(
                 n_estimators=50,
                 optimize_hyperparams=False,
-                forecast_strategy='recursive'
+                forecast_strategy='recursive',
+                instrumentation=instrumentation,
+                feature_store=self.feature_store
             )
+            instrumentation.start()
             
             # Load data using the algorithm's own loader
-            df = rf.load_data(self.data_path)
+            with instrumentation.phase('load'):
+                df = rf.load_data(self.data_path)
             if df.empty:
                 raise Exception("Failed to load data")
             
-            test_df = df.head(sample_size)
-            results = rf.fit_and_forecast(test_df, forecast_periods=12)
-            summary = rf.create_forecast_summary(results)
+            test_df = select_items(df, sample_size, item_ids)
+            results = self.forecast(rf, test_df)
+            with instrumentation.phase('summary'):
+                summary = rf.create_forecast_summary(results)
+            instrumentation.stop()
             
             return {
                 'status': 'success',
                 'results': results,
                 'summary': summary,
-                'algorithm': 'Random_Forest'
+                'algorithm': 'Random_Forest',
+                'instrumentation': instrumentation.to_dict()
             }
             
         except Exception as e:
             print(f"Random Forest failed: {str(e)}")
             traceback.print_exc()
+            instrumentation.stop()
             return {
                 'status': 'failed',
                 'error': str(e),
                 'algorithm': 'Random_Forest'
             }
     
-    def test_xgboost(self, sample_size=5):
+    def test_xgboost(self, sample_size=5, item_ids=None):
         """Test XGBoost algorithm"""
         print("Testing XGBoost...")
+        instrumentation = Instrumentation('XGBoost', profile=self.profile)
         try:
             from algorithms.machine_learning.xgboost import XGBoostForecasting
             
             xgb_model = XGBoostForecasting(
                 n_estimators=100,
-                optimize_hyperparams=False
+                optimize_hyperparams=False,
+                instrumentation=instrumentation,
+                feature_store=self.feature_store
             )
+            instrumentation.start()
             
             # Load data using the algorithm's own loader
-            df = xgb_model.load_data(self.data_path)
+            with instrumentation.phase('load'):
+                df = xgb_model.load_data(self.data_path)
             if df.empty:
                 raise Exception("Failed to load data")
             
-            test_df = df.head(sample_size)
-            results = xgb_model.fit_and_forecast(test_df, forecast_periods=12)
-            summary = xgb_model.create_forecast_summary(results)
+            test_df = select_items(df, sample_size, item_ids)
+            results = self.forecast(xgb_model, test_df)
+            with instrumentation.phase('summary'):
+                summary = xgb_model.create_forecast_summary(results)
+            instrumentation.stop()
             
             return {
                 'status': 'success',
                 'results': results,
                 'summary': summary,
-                'algorithm': 'XGBoost'
+                'algorithm': 'XGBoost',
+                'instrumentation': instrumentation.to_dict()
             }
             
         except Exception as e:
             print(f"XGBoost failed: {str(e)}")
             traceback.print_exc()
+            instrumentation.stop()
             return {
                 'status': 'failed',
                 'error': str(e),
                 'algorithm': 'XGBoost'
             }
     
-    def test_lstm(self, sample_size=5):
+    def test_lstm(self, sample_size=5, item_ids=None):
         """Test LSTM algorithm"""
         print("Testing LSTM...")
+        instrumentation = Instrumentation('LSTM', profile=self.profile)
         try:
             from algorithms.deep_learning.lstm import LSTMForecasting
             
@@ -175,71 +321,93 @@ class AlgorithmTester:
                 lstm_units=[64, 32],
                 epochs=20,
                 ensemble_size=2,
-                architecture='stacked'
+                architecture='stacked',
+                instrumentation=instrumentation,
+                feature_store=self.feature_store
             )
+            instrumentation.start()
             
             # Load data using the algorithm's own loader
-            df = lstm.load_data(self.data_path)
+            with instrumentation.phase('load'):
+                df = lstm.load_data(self.data_path)
             if df.empty:
                 raise Exception("Failed to load data")
             
-            test_df = df.head(sample_size)
-            results = lstm.fit_and_forecast(test_df, forecast_periods=12)
-            summary = lstm.create_forecast_summary(results)
+            test_df = select_items(df, sample_size, item_ids)
+            results = self.forecast(lstm, test_df)
+            with instrumentation.phase('summary'):
+                summary = lstm.create_forecast_summary(results)
+            instrumentation.stop()
             
             return {
                 'status': 'success',
                 'results': results,
                 'summary': summary,
-                'algorithm': 'LSTM'
+                'algorithm': 'LSTM',
+                'instrumentation': instrumentation.to_dict()
             }
             
         except Exception as e:
             print(f"LSTM failed: {str(e)}")
             traceback.print_exc()
+            instrumentation.stop()
             return {
                 'status': 'failed',
                 'error': str(e),
                 'algorithm': 'LSTM'
             }
     
-    def test_prophet(self, sample_size=5):
+    def test_prophet(self, sample_size=5, item_ids=None):
         """Test Prophet algorithm"""
         print("Testing Prophet...")
+        instrumentation = Instrumentation('Prophet', profile=self.profile)
         try:
             from algorithms.time_series.prophet import ProphetForecasting
             
             prophet = ProphetForecasting(
                 growth='linear',
                 yearly_seasonality='auto',
-                seasonality_mode='additive'
+                seasonality_mode='additive',
+                instrumentation=instrumentation
             )
+            instrumentation.start()
             
             # Load data using the algorithm's own loader
-            df = prophet.load_data(self.data_path)
+            with instrumentation.phase('load'):
+                df = prophet.load_data(self.data_path)
             if df.empty:
                 raise Exception("Failed to load data")
             
-            test_df = df.head(sample_size)
-            results = prophet.fit_and_forecast(test_df, forecast_periods=12)
-            summary = prophet.create_forecast_summary(results)
+            test_df = select_items(df, sample_size, item_ids)
+            results = self.forecast(prophet, test_df)
+            with instrumentation.phase('summary'):
+                summary = prophet.create_forecast_summary(results)
+            instrumentation.stop()
             
             return {
                 'status': 'success',
                 'results': results,
                 'summary': summary,
-                'algorithm': 'Prophet'
+                'algorithm': 'Prophet',
+                'instrumentation': instrumentation.to_dict()
             }
             
         except Exception as e:
             print(f"Prophet failed: {str(e)}")
             traceback.print_exc()
+            instrumentation.stop()
             return {
                 'status': 'failed',
                 'error': str(e),
                 'algorithm': 'Prophet'
             }
     
+    def forecast(self, model, test_df, forecast_periods=12):
+        """Run an algorithm's fit_and_forecast, through the checkpoint store when one is configured"""
+        if self.checkpoint_dir is None:
+            return model.fit_and_forecast(test_df, forecast_periods=forecast_periods)
+        return run_with_checkpoint(model, test_df, self.checkpoint_dir, forecast_periods=forecast_periods)
+    
     def validate_forecasts(self, results, algorithm_name):
         """Validate that forecasts contain exactly 12 months"""
         validation_results = {
@@ -273,53 +441,176 @@ class AlgorithmTester:
         
         return validation_results
     
-    def test_all_algorithms(self, sample_size=5):
-        """Test all algorithms on a sample of data"""
+    def test_all_algorithms(self, sample_size=5, parallel=False, max_workers=None):
+        """
+        Test all algorithms on a sample of data
+        
+        Args:
+            sample_size: Number of items to test
+            parallel: Run the algorithms concurrently in separate processes
+            max_workers: Number of worker processes (defaults to one per algorithm, capped at the CPU count)
+        """
         print("="*60)
         print("ALGORITHM TESTING STARTED")
         print("="*60)
         
         print(f"Testing on {sample_size} items")
         
-        # Test algorithms
-        algorithms_to_test = [
-            ('SARIMA', self.test_sarima),
-            ('SBA', self.test_sba),
-            ('Random_Forest', self.test_random_forest),
-            ('XGBoost', self.test_xgboost),
-            ('LSTM', self.test_lstm),
-            ('Prophet', self.test_prophet)
-        ]
+        routes = self.route_items(sample_size) if self.router else None
+        dead_forecasts = {}
+        if self.dead_after is not None:
+            routes, dead_forecasts = self.drop_dead_items(sample_size, routes)
         
-        for algo_name, test_func in algorithms_to_test:
-            print(f"\n{'-'*40}")
-            print(f"Testing {algo_name}")
-            print(f"{'-'*40}")
-            
-            start_time = datetime.now()
-            result = test_func(sample_size)
-            end_time = datetime.now()
-            
-            result['execution_time'] = str(end_time - start_time)
-            result['timestamp'] = datetime.now().isoformat()
-            
-            # Validate forecasts
-            validation = self.validate_forecasts(result, algo_name)
-            result['validation'] = validation
-            
-            self.results[algo_name] = result
+        if parallel:
+            results = self._run_parallel(sample_size, max_workers, routes)
+        else:
+            results = {}
+            for algo_name, _ in ALGORITHM_TESTS:
+                print(f"\n{'-'*40}")
+                print(f"Testing {algo_name}")
+                print(f"{'-'*40}")
+                
+                if routes is not None and not routes.get(algo_name):
+                    results[algo_name] = skipped_result(algo_name)
+                    continue
+                
+                results[algo_name] = run_algorithm_test(self.data_path, algo_name, sample_size, self.profile,
+                                                        self.feature_cache,
+                                                        routes.get(algo_name) if routes is not None else None,
+                                                        self.checkpoint_dir)
+        
+        for algo_name, _ in ALGORITHM_TESTS:
+            if dead_forecasts and results[algo_name]['status'] == 'success':
+                results[algo_name]['results']['item_forecasts'].update(dead_forecasts)
+            self._record_result(algo_name, results[algo_name])
+    
+    def route_items(self, sample_size=5):
+        """
+        Route the sampled items to the algorithms with self.router
+        
+        Args:
+            sample_size: Number of items to test
+            
+        Returns:
+            Dictionary of item ID lists keyed by algorithm name
+        """
+        df, time_columns, _ = read_demand_data(self.data_path)
+        self.routing = self.router.profile(df.head(sample_size), time_columns)
+        routes = self.router.group_items(self.routing)
+        
+        print("Routing items by demand pattern:")
+        print(DemandRouter.summary(self.routing).to_string())
+        for algo_name, _ in ALGORITHM_TESTS:
+            print(f"   {algo_name}: {len(routes.get(algo_name, []))}/{len(self.routing)} items")
+        
+        return routes
+    
+    def drop_dead_items(self, sample_size=5, routes=None):
+        """
+        Remove items without a sale in the last self.dead_after months from every algorithm
+        
+        Args:
+            sample_size: Number of items to test
+            routes: Item IDs per algorithm from route_items (None for every item)
+            
+        Returns:
+            Tuple of (item IDs per algorithm, zero forecasts of the dead items)
+        """
+        df, time_columns, _ = read_demand_data(self.data_path)
+        df = df.head(sample_size)
+        triaged = triage_items(df, time_columns, dead_after=self.dead_after)
+        dead = triaged['Status'] == 'dead'
+        
+        forecasts = bulk_forecasts(df[dead], time_columns, triaged[dead], 12, {'model_fitted': False, 'dead_item': True})
+        print(f"Triage: {int(dead.sum())}/{len(df)} items without a sale in {self.dead_after} months get zero forecasts")
+        
+        dead_ids = set(triaged.loc[dead, 'Item_ID'])
+        if routes is None:
+            routes = {algo_name: list(df['item_id']) for algo_name, _ in ALGORITHM_TESTS}
+        routes = {algo_name: [item_id for item_id in item_ids if item_id not in dead_ids]
+                  for algo_name, item_ids in routes.items()}
+        
+        return routes, forecasts
+    
+    def _run_parallel(self, sample_size=5, max_workers=None, routes=None):
+        """
+        Run the algorithm tests concurrently, one process per algorithm
+        
+        Native thread pools are capped per process so the workers together
+        use about one thread per core instead of oversubscribing.
+        
+        Args:
+            sample_size: Number of items to test
+            max_workers: Number of worker processes
+            routes: Item IDs per algorithm from route_items (None to test every item)
+            
+        Returns:
+            Dictionary of result dictionaries keyed by algorithm name
+        """
+        algo_names = [algo_name for algo_name, _ in ALGORITHM_TESTS if routes is None or routes.get(algo_name)]
+        results = {algo_name: skipped_result(algo_name) for algo_name, _ in ALGORITHM_TESTS
+                   if algo_name not in algo_names}
+        
+        cpu_count = os.cpu_count() or 1
+        if max_workers is None:
+            max_workers = max(1, min(len(algo_names), cpu_count))
+        threads_per_worker = max(1, cpu_count // max_workers)
+        
+        print(f"Running {len(algo_names)} algorithms in {max_workers} processes "
+              f"({threads_per_worker} threads each)")
+        
+        # Workers are spawned fresh and inherit the limits before any numerical library loads
+        context = multiprocessing.get_context('spawn')
+        
+        with limited_threads(threads_per_worker), \
+                ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = {
+                algo_name: executor.submit(run_algorithm_test, self.data_path, algo_name, sample_size, self.profile,
+                                           self.feature_cache, routes[algo_name] if routes is not None else None,
+                                           self.checkpoint_dir)
+                for algo_name in algo_names
+            }
             
-            # Print summary
-            if result['status'] == 'success':
-                print(f"✅ {algo_name} completed successfully!")
-                print(f"   Execution time: {result['execution_time']}")
-                print(f"   Items processed: {validation['total_items']}")
-                print(f"   Items with 12 forecasts: {validation['items_with_12_forecasts']}")
-                if validation['items_with_errors'] > 0:
-                    print(f"   ⚠️  Items with forecast errors: {validation['items_with_errors']}")
-            else:
-                print(f"❌ {algo_name} failed!")
-                print(f"   Error: {result['error']}")
+            for algo_name, future in futures.items():
+                try:
+                    results[algo_name] = future.result()
+                except Exception as e:
+                    # Worker died (e.g. out of memory) before it could report
+                    print(f"{algo_name} worker failed: {str(e)}")
+                    results[algo_name] = {
+                        'status': 'failed',
+                        'error': str(e),
+                        'algorithm': algo_name,
+                        'execution_time': 'N/A',
+                        'timestamp': datetime.now().isoformat()
+                    }
+        
+        return results
+    
+    def _record_result(self, algo_name, result):
+        """Validate an algorithm result, store it in self.results and print its summary"""
+        if self.catalog is not None and result['status'] == 'success':
+            result['results'] = ForecastResults.from_results(result['results'], self.catalog)
+        
+        # Validate forecasts
+        validation = self.validate_forecasts(result, algo_name)
+        result['validation'] = validation
+        
+        self.results[algo_name] = result
+        
+        # Print summary
+        if result['status'] == 'success':
+            print(f"✅ {algo_name} completed successfully!")
+            print(f"   Execution time: {result['execution_time']}")
+            print(f"   Items processed: {validation['total_items']}")
+            print(f"   Items with 12 forecasts: {validation['items_with_12_forecasts']}")
+            if validation['items_with_errors'] > 0:
+                print(f"   ⚠️  Items with forecast errors: {validation['items_with_errors']}")
+        elif result['status'] == 'skipped':
+            print(f"⏭️  {algo_name} skipped: {result['error']}")
+        else:
+            print(f"❌ {algo_name} failed!")
+            print(f"   Error: {result['error']}")
     
     def create_comparison_table(self):
         """Create a comparison table of all algorithm results"""
@@ -333,12 +624,15 @@ class AlgorithmTester:
             print("No successful algorithms to compare!")
             return pd.DataFrame()
         
-        # Get common items across all successful algorithms
+        # Get common items across all successful algorithms (every item when
+        # routed, since each algorithm then forecasts a different subset)
         all_items = None
         for algo_name, algo_data in successful_algos.items():
             items = set(algo_data['results']['item_forecasts'].keys())
             if all_items is None:
                 all_items = items
+            elif self.router:
+                all_items = all_items.union(items)
             else:
                 all_items = all_items.intersection(items)
         
@@ -355,8 +649,9 @@ class AlgorithmTester:
                 'Historical_Total': 0
             }
             
-            # Get item info from first successful algorithm
-            first_algo = list(successful_algos.keys())[0]
+            # Get item info from first successful algorithm that forecast the item
+            first_algo = next(name for name, data in successful_algos.items()
+                              if item_id in data['results']['item_forecasts'])
             item_data = successful_algos[first_algo]['results']['item_forecasts'][item_id]
             item_row['Item_Name'] = item_data['item_name'][:30] + '...' if len(item_data['item_name']) > 30 else item_data['item_name']
             item_row['Category'] = item_data['category']
@@ -364,7 +659,11 @@ class AlgorithmTester:
             
             # Add forecast results from each algorithm
             for algo_name in successful_algos.keys():
-                forecast_data = successful_algos[algo_name]['results']['item_forecasts'][item_id]
+                forecast_data = successful_algos[algo_name]['results']['item_forecasts'].get(item_id)
+                if forecast_data is None:
+                    item_row[f'{algo_name}_Annual_Forecast'] = None
+                    item_row[f'{algo_name}_Monthly_Avg'] = None
+                    continue
                 annual_forecast = sum(forecast_data['monthly_forecasts'])
                 item_row[f'{algo_name}_Annual_Forecast'] = round(annual_forecast, 2)
                 item_row[f'{algo_name}_Monthly_Avg'] = round(annual_forecast / 12, 2)
@@ -402,6 +701,25 @@ class AlgorithmTester:
         with open(f'outputs/test_results/test_summary_{timestamp}.json', 'w') as f:
             json.dump(summary_stats, f, indent=2)
         
+        # Save the routing decisions
+        if self.routing is not None:
+            routing_df = self.routing.assign(Algorithms=self.routing['Algorithms'].str.join(', '))
+            routing_df.to_csv(f'outputs/test_results/routing_{timestamp}.csv', index=False)
+        
+        # Save per-phase timings, counters and profiles
+        instrumentation = {algo_name: result['instrumentation'] for algo_name, result in self.results.items()
+                           if result.get('instrumentation')}
+        if instrumentation:
+            with open(f'outputs/test_results/instrumentation_{timestamp}.json', 'w') as f:
+                json.dump(instrumentation, f, indent=2, default=str)
+            
+            # Sampled stacks in folded format for flamegraph tools
+            for algo_name, export in instrumentation.items():
+                if export['profile_mode'] == 'sampling' and export.get('profile'):
+                    with open(f'outputs/test_results/{algo_name}_stacks_{timestamp}.folded', 'w') as f:
+                        for stack, count in export['profile'].items():
+                            f.write(f"{stack} {count}\n")
+        
         # Save individual algorithm forecasts for detailed analysis
         for algo_name, result in self.results.items():
             if result['status'] == 'success':
@@ -430,13 +748,45 @@ class AlgorithmTester:
         return timestamp
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Test all forecasting algorithms")
+    parser.add_argument('--sample-size', type=int, default=5, help="Number of items to test")
+    parser.add_argument('--parallel', action='store_true', help="Run algorithms in separate processes")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--profile', choices=['cprofile', 'sampling'], default=None,
+                        help="Profile each algorithm run")
+    parser.add_argument('--feature-cache', default=None,
+                        help="Directory for the shared feature store (default: in memory only)")
+    parser.add_argument('--route', action='store_true',
+                        help="Only run each algorithm on the items its demand pattern is routed to")
+    parser.add_argument('--routing-table', default=None,
+                        help="JSON file mapping demand patterns to algorithm names (implies --route)")
+    parser.add_argument('--dead-after', type=int, default=None,
+                        help="Give items without a sale in this many months zero forecasts instead of model runs")
+    parser.add_argument('--checkpoint-dir', default=None,
+                        help="Checkpoint completed items here and skip them when the run is restarted")
+    parser.add_argument('--compact-results', action='store_true',
+                        help="Keep results in columnar arrays with item metadata shared across algorithms")
+    args = parser.parse_args()
+    
     print("🚀 Starting Algorithm Testing Suite")
     print("This will test all 6 forecasting algorithms and validate 12-month forecasts")
     
-    tester = AlgorithmTester()
+    router = None
+    if args.route or args.routing_table:
+        routing_table = None
+        if args.routing_table:
+            with open(args.routing_table, 'r') as f:
+                routing_table = json.load(f)
+        router = DemandRouter(routing_table=routing_table)
+    
+    tester = AlgorithmTester(profile=args.profile, feature_cache=args.feature_cache, router=router,
+                             dead_after=args.dead_after, checkpoint_dir=args.checkpoint_dir,
+                             compact_results=args.compact_results)
     
     # Test with first 5 items for quick testing
-    tester.test_all_algorithms(sample_size=5)
+    tester.test_all_algorithms(sample_size=args.sample_size, parallel=args.parallel, max_workers=args.workers)
     
     # Save results
     timestamp = tester.save_results()
@@ -448,6 +798,7 @@ if __name__ == "__main__":
     # Print final summary
     successful_algos = [name for name, result in tester.results.items() if result['status'] == 'success']
     failed_algos = [name for name, result in tester.results.items() if result['status'] == 'failed']
+    skipped_algos = [name for name, result in tester.results.items() if result['status'] == 'skipped']
     
     print(f"✅ Successful algorithms: {len(successful_algos)}")
     for algo in successful_algos:
@@ -459,5 +810,8 @@ if __name__ == "__main__":
         for algo in failed_algos:
             print(f"   - {algo}")
     
+    if skipped_algos:
+        print(f"⏭️  Skipped algorithms (no items routed): {', '.join(skipped_algos)}")
+    
     print(f"\n📊 Results saved with timestamp: {timestamp}")
     print("Ready for Streamlit app integration!")
\ No newline at end of file